@@ -1,9 +1,12 @@
-from typing import Generator
+from typing import Generator, Optional
+
+from fastapi import HTTPException, Query, status
 
 # from app.db.session import SessionLocal
 from app.core.config import settings
 
-from app.db.session import get_session as get_db
+from app.db.session import get_session
+from app.services.units import normalize_unit
 
 # Dependency: get database session
 def get_db() -> Generator:
@@ -12,11 +15,7 @@ def get_db() -> Generator:
     Usage: 
         db: Session = Depends(get_db)
     """
-    db = get_db()
-    try:
-        yield db
-    finally:
-        db.close()
+    yield from get_session()
 
 
 # Dependency: get settings (if you want to inject config globally)
@@ -29,6 +28,21 @@ def get_settings():
     return settings
 
 
+# Dependency: temperature unit requested by the client (?unit=C|F|K)
+def get_temperature_unit(
+    unit: Optional[str] = Query(None, description="Temperature unit of the response: C (default), F or K")
+) -> str:
+    """
+    Normalized temperature unit for conversion on read.
+    Usage:
+        unit: str = Depends(get_temperature_unit)
+    """
+    try:
+        return normalize_unit(unit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+
 # Example placeholder for future auth dependency
 # You can later extend this for JWT or API key checks
 def get_current_user():
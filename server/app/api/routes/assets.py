@@ -0,0 +1,179 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel import Session, select
+from typing import List, Optional
+from datetime import datetime
+from uuid import UUID
+
+from app.api.deps import get_db, get_temperature_unit
+from app.models.asset import Asset, AssetReading
+from app.models.region import Region
+from app.schemas.asset import (
+    AssetCreate,
+    AssetUpdate,
+    AssetResponse,
+    AssetTagRequest,
+    AssetReadingResponse,
+    AssetTrendRequest,
+    AssetTrendResponse
+)
+from app.services.asset_trends import asset_image_conflicts, asset_trends, remove_asset_readings, sync_asset_readings
+from app.services.units import convert_fields
+
+router = APIRouter()
+
+_READING_FIELDS = ("min_temp", "max_temp", "avg_temp", "reference_temp")
+_SUMMARY_DELTAS = ("max_temp_change", "max_temp_slope_per_30d", "delta_t_slope_per_30d", "latest_delta_t")
+
+
+def _get_asset(asset_id: UUID, db: Session) -> Asset:
+    asset = db.get(Asset, asset_id)
+    if not asset:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Asset not found")
+    return asset
+
+
+def _serialize_readings(readings: List[AssetReading], unit: str) -> list:
+    """Reading responses with the stored (Celsius) temperatures converted to `unit`"""
+    return [
+        convert_fields(AssetReadingResponse.model_validate(reading).model_dump(), _READING_FIELDS, unit, ("delta_t",))
+        for reading in readings
+    ]
+
+
+@router.post("/", response_model=AssetResponse, status_code=status.HTTP_201_CREATED)
+def create_asset(
+    asset_in: AssetCreate,
+    db: Session = Depends(get_db)
+) -> Asset:
+    """Create a physical asset that regions of different projects can be tagged with"""
+    asset = Asset(**asset_in.dict())
+    db.add(asset)
+    db.commit()
+    db.refresh(asset)
+    return asset
+
+@router.get("/", response_model=List[AssetResponse])
+def list_assets(db: Session = Depends(get_db)) -> List[Asset]:
+    """Get all assets"""
+    return db.exec(select(Asset).order_by(Asset.name)).all()
+
+@router.get("/{asset_id}", response_model=AssetResponse)
+def get_asset(asset_id: UUID, db: Session = Depends(get_db)) -> Asset:
+    """Get asset by ID"""
+    return _get_asset(asset_id, db)
+
+@router.patch("/{asset_id}", response_model=AssetResponse)
+def update_asset(
+    asset_id: UUID,
+    asset_in: AssetUpdate,
+    db: Session = Depends(get_db)
+) -> Asset:
+    """Update asset"""
+    asset = _get_asset(asset_id, db)
+    for field, value in asset_in.dict(exclude_unset=True).items():
+        setattr(asset, field, value)
+    db.add(asset)
+    db.commit()
+    db.refresh(asset)
+    return asset
+
+@router.delete("/{asset_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_asset(asset_id: UUID, db: Session = Depends(get_db)):
+    """Delete an asset with its readings; tagged regions are kept, untagged"""
+    asset = _get_asset(asset_id, db)
+    for region in db.exec(select(Region).where(Region.asset_id == asset_id)).all():
+        region.asset_id = None
+        db.add(region)
+    for reading in db.exec(select(AssetReading).where(AssetReading.asset_id == asset_id)).all():
+        db.delete(reading)
+    db.delete(asset)
+    db.commit()
+    return None
+
+@router.post("/{asset_id}/regions", response_model=List[AssetReadingResponse])
+def tag_regions(
+    asset_id: UUID,
+    request: AssetTagRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Tag regions (typically one per inspection/project) as showing this
+    asset and record their current statistics as readings. An asset has
+    one reading per image, so tagging a second region of an image is
+    rejected with 409.
+    """
+    _get_asset(asset_id, db)
+    regions = db.exec(select(Region).where(Region.id.in_(request.region_ids))).all()
+    missing = set(request.region_ids) - {region.id for region in regions}
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Regions not found: {sorted(map(str, missing))}")
+
+    conflicts = asset_image_conflicts(db, asset_id, regions)
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Asset already has a region on images: {list(map(str, conflicts))}"
+        )
+
+    retagged = [region for region in regions if region.asset_id not in (None, asset_id)]
+    remove_asset_readings(db, retagged)
+    for region in regions:
+        region.asset_id = asset_id
+        db.add(region)
+    sync_asset_readings(db, regions)
+    db.commit()
+
+    readings = db.exec(
+        select(AssetReading).where(AssetReading.asset_id == asset_id, AssetReading.region_id.in_(request.region_ids))
+    ).all()
+    return _serialize_readings(readings, unit)
+
+@router.delete("/{asset_id}/regions/{region_id}", status_code=status.HTTP_204_NO_CONTENT)
+def untag_region(asset_id: UUID, region_id: UUID, db: Session = Depends(get_db)):
+    """Remove a region from an asset together with the reading taken from it"""
+    region = db.get(Region, region_id)
+    if not region or region.asset_id != asset_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Region not tagged with this asset")
+    remove_asset_readings(db, [region])
+    region.asset_id = None
+    db.add(region)
+    db.commit()
+    return None
+
+@router.get("/{asset_id}/readings", response_model=List[AssetReadingResponse])
+def list_readings(
+    asset_id: UUID,
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """Readings of one asset in capture order"""
+    _get_asset(asset_id, db)
+    query = select(AssetReading).where(AssetReading.asset_id == asset_id)
+    if start is not None:
+        query = query.where(AssetReading.captured_at >= start)
+    if end is not None:
+        query = query.where(AssetReading.captured_at <= end)
+    return _serialize_readings(db.exec(query.order_by(AssetReading.captured_at)).all(), unit)
+
+@router.post("/trends", response_model=AssetTrendResponse)
+def trends(
+    request: AssetTrendRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Time series and trend summary (change and slope per 30 days of max
+    temperature and ΔT) for many assets at once, optionally merged per
+    day/week/month. Served from the readings table only.
+    """
+    series = asset_trends(db, request.asset_ids, request.start, request.end, request.bucket)
+    for item in series:
+        item["points"] = [
+            convert_fields(point, ("min_temp", "max_temp", "avg_temp"), unit, ("delta_t",))
+            for point in item["points"]
+        ]
+        item["summary"] = convert_fields(item["summary"], (), unit, _SUMMARY_DELTAS)
+    return {"unit": unit, "bucket": request.bucket, "series": series}
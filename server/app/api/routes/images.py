@@ -0,0 +1,1356 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, func, select
+from typing import List, Optional
+from uuid import UUID
+import base64
+import math
+import zlib
+import numpy as np
+
+from app.api.deps import get_db, get_temperature_unit
+from app.core.config import settings
+from app.models.image import ThermalImage
+from app.models.marker import Marker, MarkerType
+from app.models.project import Project
+from app.models.region import Region, RegionType
+from app.schemas.analysis import (
+    RectStatsRequest,
+    RectStatsResponse,
+    RectExtremesResponse,
+    LineProfileRequest,
+    LineProfileResponse,
+    HotspotDetectionRequest,
+    IsothermRequest,
+    IsothermResponse,
+    RecompensationRequest,
+    RecompensationResponse,
+    ImageHistogramResponse,
+    ProjectHistogramResponse,
+    TemperatureDistributionResponse,
+    TilePyramidResponse,
+    ProjectPreviewsResponse,
+    DifferenceRequest,
+    DifferenceResponse,
+    RegistrationRequest,
+    RegistrationResponse,
+    MoistureRiskRequest,
+    MoistureRiskResponse,
+    TemperatureFactorRequest,
+    TemperatureFactorResponse,
+    CoordinateMappingRequest,
+    CoordinateMappingResponse,
+    DuplicatesResponse,
+    PanoramaRequest,
+    PanoramaResponse,
+    AnomalyScoringRequest,
+    AnomalyRankingResponse
+)
+from app.schemas.marker import MarkerResponse
+from app.services.anomaly import SEVERITIES, ranking_summary, score_project
+from app.services.asset_trends import sync_asset_readings
+from app.services.difference_map import get_difference, get_difference_png
+from app.services.hotspot_detector import detect_extrema
+from app.services.fingerprint import compute_image_fingerprint, find_near_duplicates, fingerprint_candidates
+from app.services.file_manager import FileManager
+from app.services.fusion import FUSION_MODES, get_fusion_png, open_visual_image
+from app.services.isotherm import get_isotherm
+from app.services.line_profile import compute_line_profiles
+from app.services.matrix_codec import etag_matches, get_encoded_matrix, negotiate_compression, parse_range
+from app.services.moisture import get_moisture_risk, normalize_humidity
+from app.services.roi_export import (
+    EXPORT_FORMATS,
+    EXPORT_MEDIA_TYPES,
+    crop_rectangle,
+    crop_region,
+    export_filename,
+    render_crop,
+    safe_name,
+    stream_zip
+)
+from app.services.panorama import frame_to_mosaic, stitch_mosaic
+from app.services.preview import convert_preview, get_image_preview
+from app.services.radiometry import (
+    camera_parameters,
+    get_recompensated_data,
+    global_radiometric_parameters,
+    project_surface_data,
+    recompensate_image_stats
+)
+from app.services.range_extrema import get_range_extrema_index
+from app.services.registration import get_registration, resample_to_grid
+from app.services.region_stats import compute_region_statistics, rasterize_region
+from app.services.summed_area import get_summed_area_table, rectangle_bounds
+from app.services.temperature_factor import get_temperature_factor
+from app.services.thermal_render import PALETTES, get_thermal_render
+from app.services.tile_pyramid import get_tile_pyramid
+from app.services.units import (
+    convert_fields,
+    convert_temperature_stats,
+    delta_from_celsius,
+    delta_to_celsius,
+    from_celsius,
+    get_unit_data,
+    to_celsius
+)
+from app.services.view_mapping import ViewMapping, region_outline
+from app.services.temperature_stats import (
+    STATS_VERSION,
+    get_image_temperature_stats,
+    histogram_for_display,
+    merge_temperature_stats,
+    stats_cdf,
+    stats_quantiles
+)
+from app.services.temperature_matrix import TemperatureMatrix, get_image_matrix
+
+router = APIRouter()
+
+
+def _finite_or_none(value: float):
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def _load_image_matrix(image_id: UUID, db: Session) -> TemperatureMatrix:
+    """Fetch an image and its cached temperature matrix, or raise 404"""
+    image = db.get(ThermalImage, image_id)
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    try:
+        return get_image_matrix(image)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+
+def _detect_spots(
+    image: ThermalImage,
+    request: HotspotDetectionRequest,
+    db: Session
+) -> List[Marker]:
+    """Run hotspot/coldspot detection on one image and build (unsaved) markers"""
+    matrix = get_image_matrix(image)
+    step = matrix.step
+
+    mask = None
+    if request.region_id:
+        region = db.get(Region, request.region_id)
+        if not region or region.image_id != image.id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Region not found for this image"
+            )
+        mask = np.zeros(matrix.shape, dtype=bool)
+        mask.ravel()[rasterize_region(region.type, region.points, matrix.shape, step)] = True
+
+    emissivity = (image.thermal_data or {}).get("emissivity") or 0.95
+    markers = []
+    for kind in request.kinds:
+        spots = detect_extrema(
+            matrix.data,
+            kind=kind,
+            top_k=request.top_k,
+            min_separation=max(request.min_separation // step, 1),
+            min_delta=request.min_delta,
+            background_radius=max(request.background_radius // step, 1),
+            mask=mask,
+            summed_area=get_summed_area_table(matrix)
+        )
+        for rank, spot in enumerate(spots, start=1):
+            markers.append(Marker(
+                project_id=image.project_id,
+                image_id=image.id,
+                type=MarkerType(kind),
+                x=float(spot["col"] * step),
+                y=float(spot["row"] * step),
+                temperature=spot["temperature"],
+                label=f"{'Hotspot' if kind == 'hotspot' else 'Coldspot'} {rank} (ΔT {spot['delta_t']:.1f})",
+                emissivity=emissivity,
+                auto_detected=True
+            ))
+    return markers
+
+
+def _replace_spot_markers(image_ids: List[UUID], db: Session) -> None:
+    """Delete previously detected hotspot/coldspot markers of the given images (hand-placed ones are kept)"""
+    existing = db.exec(
+        select(Marker).where(
+            Marker.image_id.in_(image_ids),
+            Marker.type.in_([MarkerType.hotspot, MarkerType.coldspot]),
+            Marker.auto_detected.is_(True)
+        )
+    ).all()
+    for marker in existing:
+        db.delete(marker)
+
+
+def _serialize_markers(markers: List[Marker], unit: str) -> list:
+    """Marker responses with the stored (Celsius) temperature converted to `unit`"""
+    return [
+        convert_fields(MarkerResponse.model_validate(marker).model_dump(), ("temperature",), unit)
+        for marker in markers
+    ]
+
+
+@router.post("/project/{project_id}/hotspots", response_model=List[MarkerResponse])
+def detect_project_hotspots(
+    project_id: UUID,
+    request: HotspotDetectionRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+) -> List[Marker]:
+    """Detect hotspots/coldspots on every image of a project and store them as markers (min_delta in `unit`)"""
+    if request.region_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="region_id is only supported for single-image detection"
+        )
+    request = request.model_copy(update={"min_delta": delta_to_celsius(request.min_delta, unit)})
+
+    images = db.exec(select(ThermalImage).where(ThermalImage.project_id == project_id)).all()
+    markers = []
+    processed = []
+    for image in images:
+        try:
+            markers.extend(_detect_spots(image, request, db))
+            processed.append(image.id)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"[HOTSPOTS] Skipping image {image.id}: {e}")
+
+    if request.replace_existing and processed:
+        _replace_spot_markers(processed, db)
+    db.add_all(markers)
+    db.commit()
+    for marker in markers:
+        db.refresh(marker)
+    return _serialize_markers(markers, unit)
+
+
+@router.post("/{image_id}/hotspots", response_model=List[MarkerResponse])
+def detect_image_hotspots(
+    image_id: UUID,
+    request: HotspotDetectionRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+) -> List[Marker]:
+    """Detect hotspots/coldspots on one image and store them as markers (min_delta in `unit`)"""
+    image = db.get(ThermalImage, image_id)
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    request = request.model_copy(update={"min_delta": delta_to_celsius(request.min_delta, unit)})
+    try:
+        markers = _detect_spots(image, request, db)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    if request.replace_existing:
+        _replace_spot_markers([image.id], db)
+    db.add_all(markers)
+    db.commit()
+    for marker in markers:
+        db.refresh(marker)
+    return _serialize_markers(markers, unit)
+
+
+@router.post("/{image_id}/rect-stats", response_model=RectStatsResponse)
+def rectangle_statistics(
+    image_id: UUID,
+    request: RectStatsRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Mean, variance and area of many rectangles in O(1) each,
+    answered from the image's cached summed-area table.
+    """
+    matrix = _load_image_matrix(image_id, db)
+    table = get_summed_area_table(matrix)
+
+    x0, y0, x1, y1 = rectangle_bounds([r.model_dump() for r in request.rectangles], matrix.step)
+    stats = table.query(x0, y0, x1, y1)
+    pixel_area = matrix.step * matrix.step
+
+    results = []
+    for i in range(len(request.rectangles)):
+        variance = _finite_or_none(stats["variance"][i])
+        std = math.sqrt(variance) if variance is not None else None
+        results.append({
+            "count": int(stats["count"][i]) * pixel_area,
+            "pixels": int(stats["pixels"][i]) * pixel_area,
+            "mean": from_celsius(_finite_or_none(stats["mean"][i]), unit),
+            "variance": delta_from_celsius(std, unit) ** 2 if std is not None else None,
+            "std": delta_from_celsius(std, unit),
+        })
+
+    return {"image_id": str(image_id), "results": results}
+
+
+@router.post("/{image_id}/rect-extremes", response_model=RectExtremesResponse)
+def rectangle_extremes(
+    image_id: UUID,
+    request: RectStatsRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Min/max temperature and their pixel positions for many rectangles,
+    answered from the image's range-extrema index (built on first use).
+    """
+    matrix = _load_image_matrix(image_id, db)
+    index = get_range_extrema_index(matrix)
+
+    x0, y0, x1, y1 = rectangle_bounds([r.model_dump() for r in request.rectangles], matrix.step)
+    step = matrix.step
+
+    results = []
+    for extremes in index.query(x0, y0, x1, y1):
+        if extremes["min"] is None:
+            results.append({})
+            continue
+        (min_row, min_col), (max_row, max_col) = extremes["min_index"], extremes["max_index"]
+        results.append({
+            "min_temp": from_celsius(extremes["min"], unit),
+            "min_x": min_col * step,
+            "min_y": min_row * step,
+            "max_temp": from_celsius(extremes["max"], unit),
+            "max_x": max_col * step,
+            "max_y": max_row * step,
+        })
+
+    return {"image_id": str(image_id), "results": results}
+
+
+@router.post("/{image_id}/line-profiles", response_model=LineProfileResponse)
+def line_profiles(
+    image_id: UUID,
+    request: LineProfileRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Temperature profiles along many polylines in one call: ad-hoc lines
+    (e.g. while the user drags) and/or stored line regions of the image.
+    """
+    matrix = _load_image_matrix(image_id, db)
+
+    lines = [[point.model_dump() for point in line.points] for line in request.lines]
+    region_ids = [None] * len(lines)
+
+    if request.region_ids:
+        regions = db.exec(
+            select(Region).where(
+                Region.image_id == image_id,
+                Region.id.in_(request.region_ids),
+                Region.type == RegionType.line
+            )
+        ).all()
+        for region in regions:
+            if len(region.points) >= 2:
+                lines.append(region.points)
+                region_ids.append(str(region.id))
+
+    profiles = compute_line_profiles(get_unit_data(matrix, unit), lines, step=matrix.step, spacing=request.spacing)
+    for profile, region_id in zip(profiles, region_ids):
+        profile["region_id"] = region_id
+
+    return {"image_id": str(image_id), "profiles": profiles}
+
+
+@router.post("/{image_id}/isotherms", response_model=IsothermResponse)
+def isotherms(
+    image_id: UUID,
+    request: IsothermRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Isotherm masks (run-length or bit-packed) and optional contours for
+    temperature bands (in `unit`). Results are memoized per (image, band),
+    so toggling bands in the viewer does not recompute them.
+    """
+    matrix = _load_image_matrix(image_id, db)
+    results = [
+        convert_fields(
+            get_isotherm(
+                matrix, to_celsius(band.min_temp, unit), to_celsius(band.max_temp, unit), request.encoding, request.contours
+            ),
+            ("min_temp", "max_temp"),
+            unit
+        )
+        for band in request.bands
+    ]
+    return {"image_id": str(image_id), "unit": unit, "isotherms": results}
+
+
+@router.post("/{image_id}/recompensate", response_model=RecompensationResponse)
+def recompensate_image(
+    image_id: UUID,
+    request: RecompensationRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Preview image and region temperatures for another emissivity /
+    reflected temperature without re-extraction. Nothing is persisted;
+    the recompensated matrix is cached per parameter set. Temperatures
+    (including reflected_temp) are in `unit`.
+    """
+    image = db.get(ThermalImage, image_id)
+    if not image:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    try:
+        matrix = get_image_matrix(image)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    camera = camera_parameters(image)
+    reflected_temp = to_celsius(request.reflected_temp, unit) if request.reflected_temp is not None else camera[1]
+    data = get_recompensated_data(matrix, camera, request.emissivity, reflected_temp)
+
+    valid = data[~np.isnan(data)]
+    response = {
+        "image_id": str(image_id),
+        "emissivity": request.emissivity,
+        "reflected_temp": reflected_temp,
+        "camera_emissivity": camera[0],
+        "camera_reflected_temp": camera[1],
+        "min_temp": float(valid.min()) if valid.size else None,
+        "max_temp": float(valid.max()) if valid.size else None,
+        "avg_temp": float(valid.mean()) if valid.size else None,
+        "regions": [],
+    }
+
+    query = select(Region).where(Region.image_id == image_id)
+    if request.region_ids:
+        query = query.where(Region.id.in_(request.region_ids))
+    regions = db.exec(query).all()
+    if regions:
+        stats = compute_region_statistics(
+            data,
+            [{"type": r.type, "points": r.points} for r in regions],
+            step=matrix.step
+        )
+        response["regions"] = [
+            {
+                "region_id": str(region.id),
+                "min_temp": region_stats["min_temp"],
+                "max_temp": region_stats["max_temp"],
+                "avg_temp": region_stats["avg_temp"],
+            }
+            for region, region_stats in zip(regions, stats)
+        ]
+    temperature_fields = ("reflected_temp", "camera_reflected_temp", "min_temp", "max_temp", "avg_temp")
+    response = convert_fields(response, temperature_fields, unit)
+    response["regions"] = [convert_fields(region, temperature_fields, unit) for region in response["regions"]]
+    response["unit"] = unit
+    return response
+
+
+@router.get("/project/{project_id}/histogram", response_model=ProjectHistogramResponse)
+def project_histogram(
+    project_id: UUID,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Project-wide temperature histogram, merged from the per-image
+    histograms stored at ingest (no temperature data is re-read).
+    """
+    images = db.exec(select(ThermalImage).where(ThermalImage.project_id == project_id)).all()
+    missing = [image for image in images if (image.temperature_stats or {}).get("version") != STATS_VERSION]
+    stats = [get_image_temperature_stats(image) for image in images]
+    if missing:
+        db.commit()
+    return {
+        "project_id": str(project_id),
+        "unit": unit,
+        "stats": convert_temperature_stats(merge_temperature_stats(stats), unit),
+    }
+
+
+@router.get("/distribution", response_model=TemperatureDistributionResponse)
+def temperature_distribution(
+    project_ids: List[UUID] = Query(..., description="One or more projects to pool"),
+    quantiles: List[float] = Query([0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]),
+    thresholds: List[float] = Query([], description="Temperatures (in `unit`) to report the fraction of pixels at or below"),
+    bins: int = Query(30, ge=1, le=1000, description="Max bars of the display histogram"),
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Pooled temperature distribution of all images of one or more projects,
+    merged from the t-digests and histograms stored at ingest. Only the
+    stats column is read, so memory grows with the number of images, not
+    pixels; images with outdated stats are refreshed once.
+    """
+    if any(not 0.0 <= q <= 1.0 for q in quantiles):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Quantiles must lie in [0, 1]")
+
+    rows = db.exec(
+        select(ThermalImage.id, ThermalImage.temperature_stats).where(ThermalImage.project_id.in_(project_ids))
+    ).all()
+    stats, refreshed = [], False
+    for image_id, image_stats in rows:
+        if (image_stats or {}).get("version") != STATS_VERSION:
+            image_stats = get_image_temperature_stats(db.get(ThermalImage, image_id))
+            refreshed = True
+        stats.append(image_stats)
+    if refreshed:
+        db.commit()
+
+    merged = merge_temperature_stats(stats)
+    histogram = histogram_for_display(merged, max_bins=bins)
+    if histogram:
+        histogram["edges"] = [from_celsius(edge, unit) for edge in histogram["edges"]]
+    fractions = stats_cdf(merged, [to_celsius(t, unit) for t in thresholds])
+    return {
+        "project_ids": [str(project_id) for project_id in project_ids],
+        "unit": unit,
+        "images": merged["images"],
+        "sketch": "t-digest" if merged["digest"] else "histogram",
+        "quantiles": {q: from_celsius(v, unit) for q, v in stats_quantiles(merged, quantiles).items()},
+        "fraction_below": {f"{t:g}": fraction for t, fraction in zip(thresholds, fractions.values())},
+        "histogram": histogram,
+        "stats": convert_temperature_stats(merged, unit),
+    }
+
+
+@router.get("/{image_id}/histogram", response_model=ImageHistogramResponse)
+def image_histogram(
+    image_id: UUID,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """Histogram, percentiles and summary statistics stored with the image"""
+    image = db.get(ThermalImage, image_id)
+    if not image:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+
+    had_stats = image.temperature_stats is not None
+    stats = get_image_temperature_stats(image)
+    if stats is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Temperature data not found")
+    if not had_stats:
+        db.add(image)
+        db.commit()
+    return {"image_id": str(image_id), "unit": unit, "stats": convert_temperature_stats(stats, unit)}
+
+
+@router.get("/{image_id}/tiles", response_model=TilePyramidResponse)
+def tile_pyramid(
+    image_id: UUID,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Levels of the temperature tile pyramid (1/1, 1/2, 1/4 ...) with their
+    tile grids and min/max/mean, for clients that zoom and pan instead of
+    downloading the full matrix.
+    """
+    matrix = _load_image_matrix(image_id, db)
+    pyramid = get_tile_pyramid(matrix)
+    return {
+        "image_id": str(image_id),
+        "tile_size": pyramid.tile_size,
+        "dtype": "float32-le",
+        "unit": unit,
+        "levels": [
+            convert_fields(level, ("min_temp", "max_temp", "mean_temp"), unit)
+            for level in pyramid.level_info(matrix.step)
+        ],
+    }
+
+
+@router.get("/{image_id}/tiles/{level}/{tx}/{ty}")
+def tile(
+    image_id: UUID,
+    level: int,
+    tx: int,
+    ty: int,
+    aggregate: str = Query("mean", pattern="^(mean|min|max)$"),
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    One tile as raw little-endian float32 values, row-major, NaN for
+    missing pixels. Edge tiles are smaller; see the X-Tile-* headers.
+    """
+    matrix = _load_image_matrix(image_id, db)
+    try:
+        values = get_tile_pyramid(matrix).tile(level, tx, ty, aggregate)
+    except IndexError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    return Response(
+        content=from_celsius(values.astype("<f4"), unit).tobytes(),
+        media_type="application/octet-stream",
+        headers={
+            "X-Tile-Rows": str(values.shape[0]),
+            "X-Tile-Cols": str(values.shape[1]),
+            "X-Tile-Dtype": "float32-le",
+            "X-Tile-Aggregate": aggregate,
+            "X-Temperature-Unit": unit,
+            "Cache-Control": "private, max-age=3600",
+        }
+    )
+
+
+@router.get("/{image_id}/matrix")
+def temperature_matrix(
+    image_id: UUID,
+    request: Request,
+    encoding: str = Query("int16", pattern="^(int16|float16|float32)$"),
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Temperature matrix in compact binary form (see matrix_codec.encode_matrix
+    for the header): int16 centi-degrees by default, or float16/float32.
+
+    Full responses are zstd/gzip/deflate compressed per Accept-Encoding.
+    Range requests are answered from the uncompressed representation so
+    clients can fetch the header or individual rows by byte offset.
+    """
+    matrix = _load_image_matrix(image_id, db)
+    payload = get_encoded_matrix(matrix, encoding, unit=unit)
+    range_header = request.headers.get("range")
+    # Ranges are answered from the identity representation
+    compression = None if range_header else negotiate_compression(request.headers.get("accept-encoding"))
+    # Strong validators must differ between content-codings
+    tag = f"{zlib.crc32(payload):08x}-{encoding}-{unit}"
+    etag = f'"{tag}-{compression}"' if compression else f'"{tag}"'
+    headers = {
+        "X-Temperature-Unit": unit,
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Cache-Control": "private, max-age=3600",
+        "Vary": "Accept-Encoding, Range",
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if range_header:
+        byte_range = parse_range(range_header, len(payload))
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{len(payload)}"
+            return Response(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, headers=headers)
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(payload)}"
+        return Response(
+            content=payload[start:end + 1],
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type="application/octet-stream",
+            headers=headers
+        )
+
+    if compression:
+        headers["Content-Encoding"] = compression
+    return Response(
+        content=get_encoded_matrix(matrix, encoding, compression, unit),
+        media_type="application/octet-stream",
+        headers=headers
+    )
+
+
+@router.get("/project/{project_id}/previews", response_model=ProjectPreviewsResponse)
+def project_previews(
+    project_id: UUID,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Low-resolution previews of all images of a project in one request, for
+    list and thumbnail-grid views. Reads only the stored preview columns.
+    """
+    images = db.exec(
+        select(ThermalImage).where(ThermalImage.project_id == project_id).order_by(ThermalImage.created_at)
+    ).all()
+    missing = [image for image in images if image.preview is None]
+    items = []
+    for image in images:
+        stats = image.temperature_stats or {}
+        items.append({
+            "image_id": str(image.id),
+            "name": image.name,
+            "preview": convert_preview(get_image_preview(image), unit),
+            "mean_temp": from_celsius(stats.get("mean"), unit),
+        })
+    if missing:
+        db.commit()
+    return {"project_id": str(project_id), "unit": unit, "images": items}
+
+
+def _check_alignment(matrix_a, matrix_b, align: str, min_confidence: float) -> None:
+    """Reject a registered difference whose alignment confidence is below `min_confidence`"""
+    if align == "none":
+        return
+    registration = get_registration(matrix_a, matrix_b, with_rotation=(align == "similarity"))
+    if registration["confidence"] < min_confidence:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Registration confidence {registration['confidence']:.2f} is below {min_confidence:.2f}"
+        )
+
+
+@router.post("/difference", response_model=DifferenceResponse)
+def difference_map(
+    request: DifferenceRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    What changed between two images of the same asset: ΔT = B - A on A's
+    grid (B is resampled if resolutions differ), delta statistics and the
+    largest warmer/colder areas. Results are cached per image pair.
+    threshold and all ΔT values are in `unit`.
+    """
+    matrix_a = _load_image_matrix(request.image_a, db)
+    matrix_b = _load_image_matrix(request.image_b, db)
+    _check_alignment(matrix_a, matrix_b, request.align, request.min_confidence)
+    result = get_difference(
+        matrix_a, matrix_b, delta_to_celsius(request.threshold, unit), request.min_area, request.top_k, request.align
+    )
+    render_url = f"/api/v1/images/difference/{request.image_a}/{request.image_b}/render"
+    if request.align != "none":
+        render_url += f"?align={request.align}&min_confidence={request.min_confidence}"
+    return {
+        **result,
+        "stats": convert_fields(result["stats"], (), unit, ("mean", "std", "min", "max", "mean_abs", "p5", "p95")),
+        "regions": [convert_fields(region, (), unit, ("mean_delta", "max_delta", "score")) for region in result["regions"]],
+        "unit": unit,
+        "image_a": str(request.image_a),
+        "image_b": str(request.image_b),
+        "render_url": render_url,
+    }
+
+
+@router.get("/difference/{image_a}/{image_b}/render")
+def difference_render(
+    image_a: UUID,
+    image_b: UUID,
+    limit: Optional[float] = Query(None, gt=0, description="ΔT (in `unit`) at full colour saturation"),
+    align: str = Query("none", pattern="^(none|translation|similarity)$"),
+    min_confidence: float = Query(0.0, ge=0, le=1, description="Smallest accepted registration confidence"),
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """ΔT map of an image pair as a diverging-palette PNG (blue colder, red warmer)"""
+    matrix_a = _load_image_matrix(image_a, db)
+    matrix_b = _load_image_matrix(image_b, db)
+    _check_alignment(matrix_a, matrix_b, align, min_confidence)
+    return Response(
+        content=get_difference_png(matrix_a, matrix_b, delta_to_celsius(limit, unit), align),
+        media_type="image/png",
+        headers={"Cache-Control": "private, max-age=3600"}
+    )
+
+
+@router.post("/register", response_model=RegistrationResponse)
+def register_images(
+    request: RegistrationRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    FFT phase-correlation registration of image B onto image A
+    (translation, optionally rotation and scale). Cached per image pair.
+    """
+    matrix_a = _load_image_matrix(request.image_a, db)
+    matrix_b = _load_image_matrix(request.image_b, db)
+    return {
+        "image_a": str(request.image_a),
+        "image_b": str(request.image_b),
+        "registration": get_registration(matrix_a, matrix_b, with_rotation=request.rotation),
+    }
+
+
+@router.post("/{image_id}/moisture-risk", response_model=MoistureRiskResponse)
+def moisture_risk(
+    image_id: UUID,
+    request: MoistureRiskRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Dew-point margin and mould risk of the surfaces in an image (Magnus
+    formula), from the inner air temperature and humidity. Missing inputs
+    fall back to the project's global parameters. Cached per parameter set.
+    Request and response temperatures are in `unit`.
+    """
+    image = db.get(ThermalImage, image_id)
+    if not image:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    matrix = _load_image_matrix(image_id, db)
+
+    parameters = (image.project.global_parameters if image.project else None) or {}
+    air_temp = to_celsius(request.air_temp, unit)
+    if air_temp is None:
+        air_temp = parameters.get("ambientTemp", parameters.get("ambient_temp"))
+    humidity = request.relative_humidity if request.relative_humidity is not None else parameters.get("humidity")
+    if air_temp is None or not humidity:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Air temperature and relative humidity are required"
+        )
+
+    data, variant = project_surface_data(image, matrix)
+    result = get_moisture_risk(
+        matrix, data, float(air_temp), normalize_humidity(humidity), to_celsius(request.outside_temp, unit),
+        delta_to_celsius(request.safety_margin, unit), request.mould_surface_rh, variant=variant
+    )
+    return {
+        "image_id": str(image_id),
+        "unit": unit,
+        "stats": convert_fields(
+            result["stats"], ("air_temp", "dew_point", "mould_critical_temp", "min_surface_temp"), unit, ("min_dew_point_margin",)
+        ),
+        "overlay_png": base64.b64encode(result["overlay_png"]).decode("ascii"),
+    }
+
+
+@router.post("/{image_id}/temperature-factor", response_model=TemperatureFactorResponse)
+def temperature_factor(
+    image_id: UUID,
+    request: TemperatureFactorRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Temperature factor fRsi = (Tsi - Te) / (Ti - Te) over the whole image,
+    with connected thermal bridge areas below the fRsi thresholds.
+    Cached per parameter set. Ti and Te are in `unit` (fRsi has none).
+    """
+    image = db.get(ThermalImage, image_id)
+    if not image:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    matrix = _load_image_matrix(image_id, db)
+
+    inner_temp = to_celsius(request.inner_temp, unit)
+    outer_temp = to_celsius(request.outer_temp, unit)
+    if inner_temp is None:
+        parameters = (image.project.global_parameters if image.project else None) or {}
+        inner_temp = parameters.get("ambientTemp", parameters.get("ambient_temp"))
+    if inner_temp is None or float(inner_temp) == outer_temp:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Inner and outer temperature are required and must differ"
+        )
+
+    data, variant = project_surface_data(image, matrix)
+    result = get_temperature_factor(
+        matrix, data, float(inner_temp), outer_temp, request.threshold,
+        request.severe_threshold, request.min_area, request.top_k, variant=variant
+    )
+    return {"image_id": str(image_id), "unit": unit, **convert_fields(result, ("inner_temp", "outer_temp"), unit)}
+
+
+@router.get("/{image_id}/render")
+def render_image(
+    image_id: UUID,
+    palette: str = Query("iron", pattern=f"^({'|'.join(PALETTES)})$"),
+    mode: str = Query("auto", pattern="^(auto|custom|percentile|equalize)$"),
+    min_temp: Optional[float] = Query(None, description="Lower bound for mode=custom (project custom range if omitted)"),
+    max_temp: Optional[float] = Query(None, description="Upper bound for mode=custom (project custom range if omitted)"),
+    low: float = Query(1.0, ge=0, lt=100, description="Lower percentile for mode=percentile"),
+    high: float = Query(99.0, gt=0, le=100, description="Upper percentile for mode=percentile"),
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Thermal image rendered server-side on the matrix grid: full range,
+    explicit range, percentile clipping or histogram equalization. The
+    applied range is returned in the X-Range-Min / X-Range-Max headers.
+    min_temp / max_temp and the headers are in `unit`; the PNG itself does
+    not depend on the unit and is shared between them.
+    """
+    image = db.get(ThermalImage, image_id)
+    if not image:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    if low >= high:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="low must be below high")
+    matrix = _load_image_matrix(image_id, db)
+    stats = get_image_temperature_stats(image)
+    db.commit()
+    if not stats or not stats.get("count"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No temperature data for image")
+
+    min_temp, max_temp = to_celsius(min_temp, unit), to_celsius(max_temp, unit)
+    if mode == "custom" and image.project:
+        min_temp = image.project.custom_min_temp if min_temp is None else min_temp
+        max_temp = image.project.custom_max_temp if max_temp is None else max_temp
+
+    result = get_thermal_render(matrix, stats, palette, mode, min_temp, max_temp, low, high)
+    return Response(
+        content=result["png"],
+        media_type="image/png",
+        headers={
+            "X-Range-Min": f"{from_celsius(result['min'], unit):.3f}",
+            "X-Range-Max": f"{from_celsius(result['max'], unit):.3f}",
+            "X-Temperature-Unit": unit,
+            "Cache-Control": "private, max-age=3600",
+        }
+    )
+
+
+@router.get("/{image_id}/fusion")
+def fusion_render(
+    image_id: UUID,
+    mode: str = Query("blend", pattern=f"^({'|'.join(FUSION_MODES)})$"),
+    palette: str = Query("iron", pattern=f"^({'|'.join(PALETTES)})$"),
+    alpha: float = Query(0.5, ge=0, le=1, description="Thermal opacity (blend) or edge strength (edges)"),
+    pip_scale: float = Query(0.5, gt=0, le=1, description="Window size for picture-in-picture"),
+    max_width: int = Query(1024, ge=64, le=4096),
+    db: Session = Depends(get_db)
+):
+    """
+    Thermal image aligned onto the visual photo with the extractor's
+    parallax maps and fused as an alpha blend, picture-in-picture or edge
+    overlay. PNG at the (reduced) visual resolution.
+    """
+    image = db.get(ThermalImage, image_id)
+    if not image:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    matrix = _load_image_matrix(image_id, db)
+    stats = get_image_temperature_stats(image)
+    db.commit()
+    if not stats or not stats.get("count"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No temperature data for image")
+
+    try:
+        content = get_fusion_png(matrix, image, stats, mode, palette, alpha, pip_scale, max_width)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    return Response(content=content, media_type="image/png", headers={"Cache-Control": "private, max-age=3600"})
+
+
+@router.post("/{image_id}/map-coordinates", response_model=CoordinateMappingResponse)
+def map_coordinates(
+    image_id: UUID,
+    request: CoordinateMappingRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Convert points and polygons between thermal image pixels and visual
+    photo pixels through the parallax maps, all in one vectorized pass.
+    With include_annotations, the image's markers and regions are mapped
+    onto the visual photo as well (rectangles become polygons).
+    """
+    image = db.get(ThermalImage, image_id)
+    if not image:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    matrix = _load_image_matrix(image_id, db)
+    try:
+        visual_size = open_visual_image(image).size
+        mapping = ViewMapping((matrix.shape[1] * matrix.step, matrix.shape[0] * matrix.step), visual_size)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    to_visual = request.direction == "thermal_to_visual"
+    shapes = [request.points] + list(request.polygons)
+    markers, regions, outlines = [], [], []
+    if request.include_annotations and to_visual:
+        markers = db.exec(select(Marker).where(Marker.image_id == image_id)).all()
+        regions = db.exec(select(Region).where(Region.image_id == image_id)).all()
+        outlines = [region_outline(r.type, r.points or []) for r in regions]
+        shapes.append([{"x": m.x, "y": m.y} for m in markers])
+        shapes.extend(points for _, points in outlines)
+
+    mapped = mapping.map_shapes(shapes, to_visual)
+    n_polygons = len(request.polygons)
+    mapped_markers = mapped[1 + n_polygons] if request.include_annotations and to_visual else []
+    mapped_regions = mapped[2 + n_polygons:]
+    return {
+        "image_id": str(image_id),
+        "direction": request.direction,
+        "thermal_size": list(mapping.thermal_size),
+        "visual_size": list(mapping.visual_size),
+        "points": mapped[0],
+        "polygons": mapped[1:1 + n_polygons],
+        "markers": [
+            {"id": str(m.id), "label": m.label, "type": "point", "points": [p]}
+            for m, p in zip(markers, mapped_markers)
+        ],
+        "regions": [
+            {"id": str(r.id), "label": r.label, "type": region_type, "points": points}
+            for r, (region_type, _), points in zip(regions, outlines, mapped_regions)
+        ],
+    }
+
+
+@router.get("/{image_id}/export")
+def export_roi(
+    image_id: UUID,
+    format: str = Query("csv", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+    region_id: Optional[UUID] = Query(None, description="Export the bounding box of a stored region"),
+    x0: Optional[float] = None,
+    y0: Optional[float] = None,
+    x1: Optional[float] = None,
+    y1: Optional[float] = None,
+    mask: bool = Query(True, description="Blank pixels outside the region outline"),
+    encoding: str = Query("int16", pattern="^(int16|float16|float32)$"),
+    palette: str = Query("iron", pattern=f"^({'|'.join(PALETTES)})$"),
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Crop of the temperature matrix around a defect, by rectangle (image
+    pixels) or stored region: TMAT binary, extractor-style CSV or a PNG
+    rendered over the crop's own range. Sliced from the cached matrix and
+    streamed; the crop origin and size are in the X-Crop-* headers.
+    """
+    image = db.get(ThermalImage, image_id)
+    if not image:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    matrix = _load_image_matrix(image_id, db)
+
+    try:
+        if region_id is not None:
+            region = db.get(Region, region_id)
+            if not region or region.image_id != image_id:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Region not found")
+            crop = crop_region(matrix, region.type, region.points, mask)
+            label = region.label
+        elif None not in (x0, y0, x1, y1):
+            crop = crop_rectangle(matrix, x0, y0, x1, y1)
+            label = f"{image.name}_roi"
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Either region_id or x0, y0, x1, y1 is required"
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    bounds = crop.bounds
+    return StreamingResponse(
+        render_crop(crop, format, unit, encoding, palette),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{export_filename(label, format)}"',
+            "X-Crop-X": str(bounds["x"]),
+            "X-Crop-Y": str(bounds["y"]),
+            "X-Crop-Width": str(bounds["width"]),
+            "X-Crop-Height": str(bounds["height"]),
+            "X-Temperature-Unit": unit,
+        }
+    )
+
+
+@router.get("/project/{project_id}/regions/export")
+def export_project_regions(
+    project_id: UUID,
+    format: str = Query("csv", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+    mask: bool = Query(True, description="Blank pixels outside each region outline"),
+    encoding: str = Query("int16", pattern="^(int16|float16|float32)$"),
+    palette: str = Query("iron", pattern=f"^({'|'.join(PALETTES)})$"),
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Every region of a project exported as a crop (one file per region,
+    grouped by image) in a zip that is compressed while it streams. A
+    manifest.json lists each file with its region, image and bounds.
+    """
+    images = db.exec(select(ThermalImage).where(ThermalImage.project_id == project_id)).all()
+    regions = db.exec(select(Region).where(Region.project_id == project_id)).all()
+    if not images:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found or has no images")
+
+    # Resolve crops up front so the response can stream without the session
+    by_image = {image.id: image for image in images}
+    entries, manifest = [], []
+    for region in regions:
+        image = by_image.get(region.image_id)
+        if image is None:
+            continue
+        try:
+            crop = crop_region(get_image_matrix(image), region.type, region.points, mask)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"[EXPORT] Skipping region {region.id}: {e}")
+            continue
+        name = f"{safe_name(image.name)}/{export_filename(region.label, format, '_' + str(region.id)[:8])}"
+        entries.append((name, crop))
+        manifest.append({
+            "file": name,
+            "region_id": str(region.id),
+            "label": region.label,
+            "image_id": str(image.id),
+            "image_name": image.name,
+            "unit": unit,
+            **crop.bounds,
+        })
+
+    return StreamingResponse(
+        stream_zip(
+            ((name, render_crop(crop, format, unit, encoding, palette)) for name, crop in entries),
+            manifest
+        ),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="regions_{project_id}.zip"'}
+    )
+
+
+@router.get("/{image_id}/duplicates", response_model=DuplicatesResponse)
+def image_duplicates(
+    image_id: UUID,
+    max_distance: Optional[int] = Query(None, ge=0, le=64, description="Max differing hash bits, default from settings"),
+    project_only: bool = Query(False, description="Only search the image's own project"),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    """
+    Near-duplicate images by fingerprint: Hamming distance between the DCT
+    hashes of the temperature fields, closest first (visual hash breaks ties).
+    Images uploaded before fingerprinting get theirs computed here.
+    """
+    image = db.get(ThermalImage, image_id)
+    if not image:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    if image.thermal_hash is None:
+        if not compute_image_fingerprint(image):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Temperature data not found")
+        db.add(image)
+        db.commit()
+
+    max_distance = settings.FINGERPRINT_MAX_DISTANCE if max_distance is None else max_distance
+    candidates = fingerprint_candidates(db, exclude_id=image.id)
+    if project_only:
+        candidates = [c for c in candidates if c.project_id == image.project_id]
+    return {
+        "image_id": str(image_id),
+        "thermal_hash": image.thermal_hash,
+        "visual_hash": image.visual_hash,
+        "max_distance": max_distance,
+        "matches": find_near_duplicates(candidates, image.thermal_hash, image.visual_hash, max_distance, limit),
+    }
+
+
+@router.post("/project/{project_id}/panorama", response_model=PanoramaResponse, status_code=status.HTTP_201_CREATED)
+def stitch_panorama(
+    project_id: UUID,
+    request: PanoramaRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Stitch overlapping frames of a project (e.g. a façade shot in parts)
+    into one mosaic image. Frames are registered pairwise on their
+    temperature structure, optionally levelled and blended in temperature
+    space. The mosaic is stored as a memory-mapped matrix with a tile
+    pyramid and becomes a regular image of the project, so regions,
+    markers and every analysis endpoint work on it.
+    """
+    project = db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+    if request.image_ids:
+        by_id = {
+            image.id: image
+            for image in db.exec(select(ThermalImage).where(ThermalImage.id.in_(request.image_ids))).all()
+        }
+        missing = [str(i) for i in request.image_ids if i not in by_id or by_id[i].project_id != project_id]
+        if missing:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Images not found in project: {missing}")
+        images = [by_id[i] for i in request.image_ids]
+    else:
+        images = [
+            image for image in db.exec(
+                select(ThermalImage).where(ThermalImage.project_id == project_id).order_by(ThermalImage.name)
+            ).all()
+            if "mosaic" not in (image.thermal_data or {})
+        ]
+    if not 2 <= len(images) <= settings.PANORAMA_MAX_FRAMES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"A panorama needs 2 to {settings.PANORAMA_MAX_FRAMES} frames, got {len(images)}"
+        )
+
+    try:
+        matrices = [get_image_matrix(image) for image in images]
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    # Frames are placed on the first frame's grid
+    reference = matrices[0]
+    frames = [resample_to_grid(matrix.data, reference.shape) for matrix in matrices]
+
+    mosaic = ThermalImage(
+        project_id=project_id,
+        name=request.name or f"Panorama ({len(images)} frames)",
+        thermal_data={key: value for key, value in (images[0].thermal_data or {}).items() if key != "mosaic"},
+    )
+    npy_path = FileManager().get_project_dir(str(project_id)) / "mosaics" / f"{mosaic.id}.matrix.npy"
+    try:
+        layout = stitch_mosaic(
+            frames, npy_path, reference.step, request.blend, request.equalize,
+            request.min_overlap, request.min_confidence
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    for frame, image in zip(layout["frames"], images):
+        frame["image_id"] = str(image.id)
+        frame["name"] = image.name
+        frame["reference_image_id"] = str(images[frame["reference"]].id) if frame["reference"] is not None else None
+    mosaic.thermal_data["mosaic"] = layout
+    mosaic.csv_url = f"/files/projects/{project_id}/mosaics/{npy_path.name}"
+    get_image_temperature_stats(mosaic)
+    get_image_preview(mosaic)
+    db.add(mosaic)
+
+    regions, markers = [], []
+    if request.transfer_annotations:
+        frame_ids = [image.id for image in images]
+        index = {image_id: i for i, image_id in enumerate(frame_ids)}
+        for region in db.exec(select(Region).where(Region.image_id.in_(frame_ids))).all():
+            i = index[region.image_id]
+            scale = (reference.shape[1] / matrices[i].shape[1], reference.shape[0] / matrices[i].shape[0])
+            area_scale = scale[0] * scale[1] * (reference.step / matrices[i].step) ** 2
+            regions.append(Region(
+                project_id=project_id,
+                image_id=mosaic.id,
+                type=region.type,
+                points=frame_to_mosaic(layout, i, region.points, matrices[i].step, scale),
+                min_temp=region.min_temp,
+                max_temp=region.max_temp,
+                avg_temp=region.avg_temp,
+                area=region.area * area_scale if region.area is not None else None,
+                label=region.label,
+                emissivity=region.emissivity
+            ))
+        for marker in db.exec(select(Marker).where(Marker.image_id.in_(frame_ids))).all():
+            i = index[marker.image_id]
+            scale = (reference.shape[1] / matrices[i].shape[1], reference.shape[0] / matrices[i].shape[0])
+            point = frame_to_mosaic(layout, i, [{"x": marker.x, "y": marker.y}], matrices[i].step, scale)[0]
+            markers.append(Marker(
+                project_id=project_id,
+                image_id=mosaic.id,
+                type=marker.type,
+                x=point["x"],
+                y=point["y"],
+                temperature=marker.temperature,
+                label=marker.label,
+                emissivity=marker.emissivity
+            ))
+        if regions or markers:
+            _, reflected_temp = global_radiometric_parameters(project.global_parameters)
+            recompensate_image_stats(mosaic, regions, markers, reflected_temp=reflected_temp)
+            db.add_all(regions + markers)
+
+    db.commit()
+    print(f"[PANORAMA] Stitched {len(images)} frames into {mosaic.id} ({layout['shape'][1]}x{layout['shape'][0]})")
+    return {
+        "image_id": str(mosaic.id),
+        "project_id": str(project_id),
+        "name": mosaic.name,
+        "shape": layout["shape"],
+        "step": layout["step"],
+        "blend": layout["blend"],
+        "equalized": layout["equalized"],
+        "unit": unit,
+        "frames": [convert_fields(frame, (), unit, ("correction",)) for frame in layout["frames"]],
+        "regions": len(regions),
+        "markers": len(markers),
+    }
+
+
+def _convert_ranking(summary: dict, unit: str) -> dict:
+    """Anomaly ranking with its temperatures (and ΔT) in `unit`"""
+    summary = convert_fields(summary, ("project_median",), unit, ("project_sigma",))
+    summary["unit"] = unit
+    summary["ranking"] = [
+        dict(
+            convert_fields(entry, ("reference_temp", "max_temp", "p99"), unit, ("delta_t",)),
+            regions=[convert_fields(region, ("max_temp",), unit, ("delta_t",)) for region in entry["regions"]]
+        )
+        for entry in summary["ranking"]
+    ]
+    return summary
+
+
+@router.post("/project/{project_id}/anomalies", response_model=AnomalyRankingResponse)
+def score_project_anomalies(
+    project_id: UUID,
+    request: AnomalyScoringRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """
+    Score every image and region of a project for anomalies (robust
+    z-scores against the project, ΔT against reference regions, severity
+    classes) in a pool of worker processes, and store the ranking on the
+    images and regions.
+    """
+    project = db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+    images = db.exec(select(ThermalImage).where(ThermalImage.project_id == project_id)).all()
+    regions = db.exec(select(Region).where(Region.project_id == project_id)).all()
+    summary = score_project(
+        project, images, regions,
+        reference_region_ids=request.reference_region_ids,
+        reference_label=request.reference_label,
+        workers=request.workers or settings.ANOMALY_WORKERS or None
+    )
+    db.add_all(list(images) + list(regions))
+    sync_asset_readings(db, regions)
+    db.commit()
+    print(f"[ANOMALY] Scored {summary['images']} image(s) of project {project_id}: {summary['counts']}")
+    return _convert_ranking(dict(summary, project_id=str(project_id)), unit)
+
+
+@router.get("/project/{project_id}/anomalies", response_model=AnomalyRankingResponse)
+def project_anomalies(
+    project_id: UUID,
+    min_severity: Optional[str] = Query(None, description="Only images of this severity class or worse"),
+    limit: Optional[int] = Query(None, ge=1),
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+):
+    """Stored anomaly ranking of a project, most severe first (no matrix is loaded)"""
+    if min_severity is not None and min_severity not in SEVERITIES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown severity '{min_severity}', expected one of {list(SEVERITIES)}"
+        )
+    if not db.get(Project, project_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+    statement = select(ThermalImage.anomaly).where(
+        ThermalImage.project_id == project_id, ThermalImage.anomaly_rank.is_not(None)
+    )
+    if min_severity is not None:
+        statement = statement.where(ThermalImage.anomaly_severity.in_(SEVERITIES[SEVERITIES.index(min_severity):]))
+    statement = statement.order_by(ThermalImage.anomaly_rank)
+    if limit is not None:
+        statement = statement.limit(limit)
+    summary = ranking_summary(db.exec(statement).all())
+
+    # Counts cover the whole project, not just the returned page
+    counts = db.exec(
+        select(ThermalImage.anomaly_severity, func.count()).where(
+            ThermalImage.project_id == project_id, ThermalImage.anomaly_rank.is_not(None)
+        ).group_by(ThermalImage.anomaly_severity)
+    ).all()
+    summary["counts"].update(dict(counts))
+    summary["images"] = sum(summary["counts"].values())
+    return _convert_ranking(dict(summary, project_id=str(project_id)), unit)
@@ -6,46 +6,61 @@ from uuid import UUID
 
 from app.models.marker import Marker
 from app.schemas.marker import MarkerCreate, MarkerUpdate, MarkerResponse
-from app.api.deps import get_db
+from app.api.deps import get_db, get_temperature_unit
+from app.services.radiometry import global_radiometric_parameters, recompensate_image_stats
+from app.services.units import convert_fields, to_celsius
 
 router = APIRouter()
 
+
+def _serialize_markers(markers: List[Marker], unit: str) -> list:
+    """Marker responses with the stored (Celsius) temperature converted to `unit`"""
+    return [
+        convert_fields(MarkerResponse.model_validate(marker).model_dump(), ("temperature",), unit)
+        for marker in markers
+    ]
+
+
 @router.post("/", response_model=MarkerResponse, status_code=status.HTTP_201_CREATED)
 def create_marker(
     marker_in: MarkerCreate,
+    unit: str = Depends(get_temperature_unit),
     db: Session = Depends(get_db)
 ) -> Marker:
-    """Create new marker"""
-    marker = Marker(**marker_in.dict())
+    """Create new marker (temperature in `unit`)"""
+    marker = Marker(**dict(marker_in.dict(), temperature=to_celsius(marker_in.temperature, unit)))
     db.add(marker)
     db.commit()
     db.refresh(marker)
-    return marker
+    return _serialize_markers([marker], unit)[0]
 
 @router.get("/project/{project_id}", response_model=List[MarkerResponse])
 def list_project_markers(
     project_id: UUID,
+    unit: str = Depends(get_temperature_unit),
     db: Session = Depends(get_db)
 ) -> List[Marker]:
     """Get all markers for a project"""
     statement = select(Marker).where(Marker.project_id == project_id)
     markers = db.exec(statement).all()
-    return markers
+    return _serialize_markers(markers, unit)
 
 @router.get("/image/{image_id}", response_model=List[MarkerResponse])
 def list_image_markers(
     image_id: UUID,
+    unit: str = Depends(get_temperature_unit),
     db: Session = Depends(get_db)
 ) -> List[Marker]:
     """Get all markers for an image"""
     statement = select(Marker).where(Marker.image_id == image_id)
     markers = db.exec(statement).all()
-    return markers
+    return _serialize_markers(markers, unit)
 
 @router.patch("/{marker_id}", response_model=MarkerResponse)
 def update_marker(
     marker_id: UUID,
     marker_in: MarkerUpdate,
+    unit: str = Depends(get_temperature_unit),
     db: Session = Depends(get_db)
 ) -> Marker:
     """Update marker"""
@@ -59,11 +74,21 @@ def update_marker(
     update_data = marker_in.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(marker, field, value)
+
+    if "emissivity" in update_data and marker.image:
+        image = marker.image
+        _, reflected_temp = global_radiometric_parameters(
+            image.project.global_parameters if image.project else None
+        )
+        try:
+            recompensate_image_stats(image, [], [marker], reflected_temp=reflected_temp)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"[MARKERS] Keeping temperature of marker {marker_id}: {e}")
     
     db.add(marker)
     db.commit()
     db.refresh(marker)
-    return marker
+    return _serialize_markers([marker], unit)[0]
 
 @router.delete("/{marker_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_marker(
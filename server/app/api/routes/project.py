@@ -14,6 +14,9 @@ from app.models.image import ThermalImage
 from app.models.marker import Marker
 from app.models.region import Region
 from app.services.file_manager import FileManager
+from app.models.asset import AssetReading
+from app.services.asset_trends import remove_asset_readings, sync_asset_readings
+from app.services.radiometry import recompensate_project
 from app.schemas.project import (
     ProjectCreate,
     ProjectUpdate,
@@ -202,6 +205,8 @@ def get_project(
                 "thermal_data": img.thermal_data,
                 "server_palettes": img.server_palettes,  # Already base64
                 "csv_url": img.csv_url,
+                "temperature_stats": img.temperature_stats,
+                "preview": img.preview,
                 "created_at": img.created_at.isoformat(),
                 "updated_at": img.updated_at.isoformat()
             }
@@ -281,8 +286,22 @@ def update_project(
         )
     
     update_data = project_in.dict(exclude_unset=True)
+    previous_parameters = dict(project.global_parameters or {})
     for field, value in update_data.items():
         setattr(project, field, value)
+
+    # Changed emissivity / reflected temperature: refresh all stats in place
+    if "global_parameters" in update_data:
+        images = db.exec(select(ThermalImage).where(ThermalImage.project_id == project_id)).all()
+        regions = db.exec(select(Region).where(Region.project_id == project_id)).all()
+        markers = db.exec(select(Marker).where(Marker.project_id == project_id)).all()
+        refreshed = recompensate_project(project, images, regions, markers, previous_parameters)
+        if refreshed:
+            print(f"[PROJECT] Recompensated statistics of {refreshed} image(s)")
+            for row in list(regions) + list(markers):
+                db.add(row)
+        # Ambient temperature is the ΔT reference of asset readings
+        sync_asset_readings(db, regions)
     
     from datetime import datetime
     project.updated_at = datetime.utcnow()
@@ -310,6 +329,8 @@ def delete_project(
     sanitized_name = FileManager.sanitize_folder_name(project.name)
     file_manager.delete_project_directory(sanitized_name)
 
+    for reading in db.exec(select(AssetReading).where(AssetReading.project_id == project_id)):
+        db.delete(reading)
     db.delete(project)
     db.commit()
     return None
@@ -561,10 +582,16 @@ async def bulk_save_project(
     db.commit()
 
     # Delete existing markers and regions for this project
-    db.exec(select(Marker).where(Marker.project_id == project.id)).all()
-    for marker in db.exec(select(Marker).where(Marker.project_id == project.id)):
+    existing_markers = db.exec(select(Marker).where(Marker.project_id == project.id)).all()
+    # Markers are recreated below; remember which ones came from detection
+    detected_markers = {str(marker.id) for marker in existing_markers if marker.auto_detected}
+    for marker in existing_markers:
         db.delete(marker)
-    for region in db.exec(select(Region).where(Region.project_id == project.id)):
+    # Regions are recreated below; remember which asset each one showed
+    existing_regions = db.exec(select(Region).where(Region.project_id == project.id)).all()
+    previous_assets = {str(region.id): region.asset_id for region in existing_regions}
+    remove_asset_readings(db, existing_regions)
+    for region in existing_regions:
         db.delete(region)
     db.commit()
 
@@ -585,7 +612,8 @@ async def bulk_save_project(
                 y=marker_data.y,
                 temperature=marker_data.temperature or 0.0,
                 label=marker_data.label or marker_data.name,
-                emissivity=marker_data.emissivity or 0.95
+                emissivity=marker_data.emissivity or 0.95,
+                auto_detected=marker_data.id in detected_markers
             )
             db.add(new_marker)
         except Exception as e:
@@ -593,6 +621,7 @@ async def bulk_save_project(
             continue
 
     # Process regions
+    new_regions = []
     for region_data in data.regions:
         try:
             # Find the corresponding image
@@ -611,13 +640,17 @@ async def bulk_save_project(
                 avg_temp=region_data.avg_temp or 0.0,
                 area=region_data.area,
                 label=region_data.label or region_data.name,
-                emissivity=region_data.emissivity or 0.95
+                emissivity=region_data.emissivity or 0.95,
+                asset_id=UUID(region_data.asset_id) if region_data.asset_id else previous_assets.get(region_data.id)
             )
             db.add(new_region)
+            new_regions.append(new_region)
         except Exception as e:
             print(f"Error processing region {region_data.name}: {e}")
             continue
 
+    db.flush()
+    sync_asset_readings(db, new_regions)
     db.commit()
 
     # Refresh project to get all relationships
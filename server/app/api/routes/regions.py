@@ -1,53 +1,112 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from app.api.deps import get_db
+from app.api.deps import get_db, get_temperature_unit
+from app.models.image import ThermalImage
+from app.models.marker import Marker
+from app.models.project import Project
 from app.models.region import Region
-from app.schemas.region import RegionCreate, RegionUpdate, RegionResponse
+from app.schemas.region import RegionCreate, RegionUpdate, RegionResponse, RegionTransferRequest
+from app.services.asset_trends import asset_image_conflicts, remove_asset_readings, sync_asset_readings
+from app.services.radiometry import global_radiometric_parameters, recompensate_image_stats
+from app.services.registration import get_registration, transfer_points
+from app.services.temperature_matrix import get_image_matrix
+from app.services.units import convert_fields, to_celsius
 
 router = APIRouter()
 
+
+def _recalculate_regions(image: ThermalImage, regions: List[Region], markers: Optional[List[Marker]] = None) -> None:
+    """
+    Update min/max/avg of the given regions and the temperature of the
+    image's markers (or `markers`) in a single vectorized pass per
+    emissivity, honouring the project's reflected temperature.
+    """
+    _, reflected_temp = global_radiometric_parameters(
+        image.project.global_parameters if image.project else None
+    )
+    if markers is None:
+        markers = list(image.markers)
+    recompensate_image_stats(image, regions, markers, reflected_temp=reflected_temp)
+
+
+_TEMPERATURE_FIELDS = ("min_temp", "max_temp", "avg_temp")
+
+
+def _serialize_regions(regions: List[Region], unit: str) -> list:
+    """Region responses with the stored (Celsius) statistics converted to `unit`"""
+    return [
+        convert_fields(RegionResponse.model_validate(region).model_dump(), _TEMPERATURE_FIELDS, unit, ("delta_t",))
+        for region in regions
+    ]
+
+
+def _check_asset_conflicts(db: Session, asset_id: Optional[UUID], regions: List[Region]) -> None:
+    """409 when `asset_id` would end up on two regions of one image (one reading per asset and image)"""
+    if asset_id is None:
+        return
+    conflicts = asset_image_conflicts(db, asset_id, regions)
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Asset already has a region on images: {list(map(str, conflicts))}"
+        )
+
+
+def _celsius_fields(data: dict, unit: str) -> dict:
+    """Request data with temperatures given in `unit` converted to Celsius for storage"""
+    return {
+        field: to_celsius(value, unit) if field in _TEMPERATURE_FIELDS else value
+        for field, value in data.items()
+    }
+
 @router.post("/", response_model=RegionResponse, status_code=status.HTTP_201_CREATED)
 def create_region(
     region_in: RegionCreate,
+    unit: str = Depends(get_temperature_unit),
     db: Session = Depends(get_db)
 ) -> Region:
-    """Create new region"""
-    region = Region(**region_in.dict())
+    """Create new region (statistics in `unit`)"""
+    region = Region(**_celsius_fields(region_in.dict(), unit))
+    _check_asset_conflicts(db, region.asset_id, [region])
     db.add(region)
+    sync_asset_readings(db, [region])
     db.commit()
     db.refresh(region)
-    return region
+    return _serialize_regions([region], unit)[0]
 
 @router.get("/project/{project_id}", response_model=List[RegionResponse])
 def list_project_regions(
     project_id: UUID,
+    unit: str = Depends(get_temperature_unit),
     db: Session = Depends(get_db)
 ) -> List[Region]:
     """Get all regions for a project"""
     statement = select(Region).where(Region.project_id == project_id)
     regions = db.exec(statement).all()
-    return regions
+    return _serialize_regions(regions, unit)
 
 @router.get("/image/{image_id}", response_model=List[RegionResponse])
 def list_image_regions(
     image_id: UUID,
+    unit: str = Depends(get_temperature_unit),
     db: Session = Depends(get_db)
 ) -> List[Region]:
     """Get all regions for an image"""
     statement = select(Region).where(Region.image_id == image_id)
     regions = db.exec(statement).all()
-    return regions
+    return _serialize_regions(regions, unit)
 
 @router.patch("/{region_id}", response_model=RegionResponse)
 def update_region(
     region_id: UUID,
     region_in: RegionUpdate,
+    unit: str = Depends(get_temperature_unit),
     db: Session = Depends(get_db)
 ) -> Region:
-    """Update region"""
+    """Update region (statistics in `unit`)"""
     region = db.get(Region, region_id)
     if not region:
         raise HTTPException(
@@ -55,14 +114,24 @@ def update_region(
             detail="Region not found"
         )
     
-    update_data = region_in.dict(exclude_unset=True)
+    update_data = _celsius_fields(region_in.dict(exclude_unset=True), unit)
+    if "asset_id" in update_data and update_data["asset_id"] != region.asset_id:
+        _check_asset_conflicts(db, update_data["asset_id"], [region])
+        remove_asset_readings(db, [region])
     for field, value in update_data.items():
         setattr(region, field, value)
+
+    if "emissivity" in update_data and region.image:
+        try:
+            _recalculate_regions(region.image, [region], markers=[])
+        except (FileNotFoundError, ValueError) as e:
+            print(f"[REGIONS] Keeping statistics of region {region_id}: {e}")
     
     db.add(region)
+    sync_asset_readings(db, [region])
     db.commit()
     db.refresh(region)
-    return region
+    return _serialize_regions([region], unit)[0]
 
 @router.delete("/{region_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_region(
@@ -77,6 +146,148 @@ def delete_region(
             detail="Region not found"
         )
     
+    remove_asset_readings(db, [region])
     db.delete(region)
     db.commit()
-    return None
\ No newline at end of file
+    return None
+
+@router.post("/image/{image_id}/recalculate", response_model=List[RegionResponse])
+def recalculate_image_regions(
+    image_id: UUID,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+) -> List[Region]:
+    """Recalculate statistics of all regions of an image from its temperature matrix"""
+    image = db.get(ThermalImage, image_id)
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+
+    regions = db.exec(select(Region).where(Region.image_id == image_id)).all()
+    if regions:
+        try:
+            _recalculate_regions(image, regions)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+        db.add_all(regions)
+        sync_asset_readings(db, regions)
+        db.commit()
+        for region in regions:
+            db.refresh(region)
+    return _serialize_regions(regions, unit)
+
+@router.post("/project/{project_id}/recalculate", response_model=List[RegionResponse])
+def recalculate_project_regions(
+    project_id: UUID,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+) -> List[Region]:
+    """Recalculate statistics of all regions of a project, one pass per image"""
+    if not db.get(Project, project_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    regions = db.exec(select(Region).where(Region.project_id == project_id)).all()
+
+    by_image = {}
+    for region in regions:
+        by_image.setdefault(region.image_id, []).append(region)
+
+    for image_id, image_regions in by_image.items():
+        image = db.get(ThermalImage, image_id)
+        if not image:
+            continue
+        try:
+            _recalculate_regions(image, image_regions)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"[REGIONS] Skipping image {image_id}: {e}")
+
+    db.add_all(regions)
+    sync_asset_readings(db, regions)
+    db.commit()
+    for region in regions:
+        db.refresh(region)
+    return _serialize_regions(regions, unit)
+
+@router.post("/transfer", response_model=List[RegionResponse], status_code=status.HTTP_201_CREATED)
+def transfer_regions(
+    request: RegionTransferRequest,
+    unit: str = Depends(get_temperature_unit),
+    db: Session = Depends(get_db)
+) -> List[Region]:
+    """
+    Copy regions from one image onto another image of the same asset
+    (e.g. a re-inspection), registering the two images first so the
+    regions land on the same spot. Statistics are computed on the target.
+    """
+    source = db.get(ThermalImage, request.source_image_id)
+    target = db.get(ThermalImage, request.target_image_id)
+    if not source or not target:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+
+    try:
+        source_matrix = get_image_matrix(source)
+        target_matrix = get_image_matrix(target)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    registration = get_registration(source_matrix, target_matrix, with_rotation=request.rotation)
+    if registration["confidence"] < request.min_confidence:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Registration confidence {registration['confidence']:.2f} is below {request.min_confidence:.2f}"
+        )
+
+    statement = select(Region).where(Region.image_id == request.source_image_id)
+    if request.region_ids:
+        statement = statement.where(Region.id.in_(request.region_ids))
+    source_regions = db.exec(statement).all()
+
+    rotated = abs(registration["rotation"]) > 0.5
+    pixel_ratio = (target_matrix.step / source_matrix.step) * target_matrix.shape[1] / source_matrix.shape[1]
+    area_scale = (registration["scale"] * pixel_ratio) ** 2
+
+    transferred = []
+    for region in source_regions:
+        region_type, points = region.type, region.points
+        if region_type == "rectangle" and rotated and len(points) >= 2:
+            # A rotated rectangle is no longer axis-aligned
+            (x0, y0), (x1, y1) = (points[0]["x"], points[0]["y"]), (points[1]["x"], points[1]["y"])
+            region_type = "polygon"
+            points = [{"x": x0, "y": y0}, {"x": x1, "y": y0}, {"x": x1, "y": y1}, {"x": x0, "y": y1}]
+
+        transferred.append(Region(
+            project_id=target.project_id,
+            image_id=target.id,
+            type=region_type,
+            points=transfer_points(source_matrix, target_matrix, registration, points),
+            min_temp=region.min_temp,
+            max_temp=region.max_temp,
+            avg_temp=region.avg_temp,
+            area=region.area * area_scale if region.area is not None else None,
+            label=region.label,
+            emissivity=region.emissivity,
+            asset_id=region.asset_id
+        ))
+
+    for asset_id in {region.asset_id for region in transferred}:
+        _check_asset_conflicts(db, asset_id, [region for region in transferred if region.asset_id == asset_id])
+
+    if transferred:
+        _recalculate_regions(target, transferred)
+        db.add_all(transferred)
+        sync_asset_readings(db, transferred)
+        db.commit()
+        for region in transferred:
+            db.refresh(region)
+    return _serialize_regions(transferred, unit)
@@ -12,8 +12,8 @@ router = APIRouter()
 from fastapi import APIRouter, Body, HTTPException, Request
 from fastapi.responses import FileResponse
 from pydantic import BaseModel, ValidationError, ConfigDict, Field
-from typing import List, Dict, Any, Optional
-from uuid import uuid4
+from typing import List, Dict, Any, Optional, Tuple
+from uuid import UUID, uuid4
 from app.services.report_generator import ReportGenerator
 import json
 import zipfile
@@ -22,6 +22,103 @@ from pathlib import Path
 
 router = APIRouter()
 
+
+def _stored_temperature_stats(image_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Ingest-time temperature stats of the report images, keyed by image id"""
+    from sqlmodel import Session
+    from app.db.session import engine
+    from app.models.image import ThermalImage
+    from app.services.temperature_stats import get_image_temperature_stats
+
+    stats = {}
+    with Session(engine) as db:
+        for image_id in image_ids:
+            try:
+                image = db.get(ThermalImage, UUID(image_id))
+            except ValueError:
+                continue
+            if image:
+                image_stats = get_image_temperature_stats(image)
+                if image_stats:
+                    stats[image_id] = image_stats
+        db.commit()
+    return stats
+
+def _stored_anomaly_ranks(image_ids: List[str]) -> Dict[str, Tuple[int, str]]:
+    """Stored anomaly ranking position and severity of the report images, keyed by image id"""
+    from sqlmodel import Session, select
+    from app.db.session import engine
+    from app.models.image import ThermalImage
+
+    ids = []
+    for image_id in image_ids:
+        try:
+            ids.append(UUID(image_id))
+        except ValueError:
+            continue
+    with Session(engine) as db:
+        rows = db.exec(
+            select(ThermalImage.id, ThermalImage.anomaly_rank, ThermalImage.anomaly_severity).where(
+                ThermalImage.id.in_(ids), ThermalImage.anomaly_rank.is_not(None)
+            )
+        ).all()
+    return {str(row.id): (row.anomaly_rank, row.anomaly_severity) for row in rows}
+
+def _parse_temperature(text: str) -> Optional[float]:
+    """First number in a free-text temperature field ("-3,5 °C" -> -3.5)"""
+    import re
+    match = re.search(r"[-+]?\d+(?:[.,]\d+)?", text or "")
+    return float(match.group(0).replace(",", ".")) if match else None
+
+
+def _building_temperatures(settings: "ReportSettings") -> Optional[Tuple[float, float]]:
+    """
+    Inner air and outside temperature for the temperature factor: outside is
+    the mean of the min/max during the measurement, else of the last 24 h.
+    """
+    inner = _parse_temperature(settings.inner_air_temp)
+    for low, high in (
+        (settings.outer_temp_min_while, settings.outer_temp_max_while),
+        (settings.outer_temp_min_24h, settings.outer_temp_max_24h),
+    ):
+        values = [v for v in (_parse_temperature(low), _parse_temperature(high)) if v is not None]
+        if values:
+            outer = sum(values) / len(values)
+            break
+    else:
+        return None
+    if inner is None or inner == outer:
+        return None
+    return inner, outer
+
+
+def _thermal_bridges(image_ids: List[str], settings: "ReportSettings") -> Dict[str, Dict[str, Any]]:
+    """fRsi thermal bridge analysis of the report images, keyed by image id"""
+    temperatures = _building_temperatures(settings)
+    if temperatures is None:
+        return {}
+    from sqlmodel import Session
+    from app.db.session import engine
+    from app.models.image import ThermalImage
+    from app.services.radiometry import project_surface_data
+    from app.services.temperature_factor import get_temperature_factor
+    from app.services.temperature_matrix import get_image_matrix
+
+    inner, outer = temperatures
+    results = {}
+    with Session(engine) as db:
+        for image_id in image_ids:
+            try:
+                image = db.get(ThermalImage, UUID(image_id))
+                if not image:
+                    continue
+                matrix = get_image_matrix(image)
+            except (ValueError, FileNotFoundError):
+                continue
+            data, variant = project_surface_data(image, matrix)
+            results[image_id] = get_temperature_factor(matrix, data, inner, outer, variant=variant)
+    return results
+
 class ReportSettings(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
     
@@ -38,6 +135,8 @@ class ReportSettings(BaseModel):
     include_markers: bool = Field(default=True, alias="includeMarkers")
     include_regions: bool = Field(default=True, alias="includeRegions")
     include_parameters: bool = Field(default=True, alias="includeParameters")
+    # Order images by the stored anomaly ranking (most severe first)
+    sort_by_severity: bool = Field(default=False, alias="sortBySeverity")
 
     company: str = ""
     device: str = ""
@@ -182,7 +281,10 @@ async def generate_report(request: GenerateReportRequest):
                 if key not in metadata:
                     metadata[key] = value
 
-        # Prepare images data (including CSV URLs for histogram)
+        # Prepare images data (stored stats / CSV URLs for histogram)
+        stored_stats = _stored_temperature_stats([img.id for img in request.images])
+        thermal_bridges = _thermal_bridges([img.id for img in request.images], request.settings)
+        anomaly_ranks = _stored_anomaly_ranks([img.id for img in request.images])
         images_data = []
         for img in request.images:
             img_dict = {
@@ -190,9 +292,14 @@ async def generate_report(request: GenerateReportRequest):
                 "name": img.name,
                 "thermal_base64": img.thermal_base64,
                 "real_base64": img.real_base64,
-                "csv_url": img.csv_url
+                "csv_url": img.csv_url,
+                "temperature_stats": stored_stats.get(img.id),
+                "thermal_bridges": thermal_bridges.get(img.id),
+                "anomaly_severity": anomaly_ranks.get(img.id, (None, None))[1]
             }
             images_data.append(img_dict)
+        if request.settings.sort_by_severity:
+            images_data.sort(key=lambda item: anomaly_ranks.get(item["id"], (float("inf"), None))[0])
 
         # Prepare markers data
         markers_data = []
@@ -305,7 +412,10 @@ async def generate_bilingual_report(request: GenerateReportRequest):
                 if key not in metadata:
                     metadata[key] = value
 
-        # Prepare images data (including CSV URLs for histogram)
+        # Prepare images data (stored stats / CSV URLs for histogram)
+        stored_stats = _stored_temperature_stats([img.id for img in request.images])
+        thermal_bridges = _thermal_bridges([img.id for img in request.images], request.settings)
+        anomaly_ranks = _stored_anomaly_ranks([img.id for img in request.images])
         images_data = []
         for img in request.images:
             img_dict = {
@@ -313,9 +423,14 @@ async def generate_bilingual_report(request: GenerateReportRequest):
                 "name": img.name,
                 "thermal_base64": img.thermal_base64,
                 "real_base64": img.real_base64,
-                "csv_url": img.csv_url
+                "csv_url": img.csv_url,
+                "temperature_stats": stored_stats.get(img.id),
+                "thermal_bridges": thermal_bridges.get(img.id),
+                "anomaly_severity": anomaly_ranks.get(img.id, (None, None))[1]
             }
             images_data.append(img_dict)
+        if request.settings.sort_by_severity:
+            images_data.sort(key=lambda item: anomaly_ranks.get(item["id"], (float("inf"), None))[0])
 
         # Prepare markers data
         markers_data = []
@@ -116,7 +116,7 @@ def normalize_metadata(raw_metadata: dict) -> dict:
 
 
 @router.post("")
-async def upload_bmt(file: UploadFile, project_id: str = Form(...)):
+async def upload_bmt(file: UploadFile, project_id: str = Form(...), duplicates: str = Form("warn")):
     """
     Upload and process BMT thermal imaging file
     Only ONE BMT file per project is allowed.
@@ -124,6 +124,8 @@ async def upload_bmt(file: UploadFile, project_id: str = Form(...)):
     Args:
         file: BMT file to process
         project_id: ID of the project
+        duplicates: "warn" (report near-duplicates), "skip" (do not store
+            them) or "allow" (no duplicate check)
 
     Returns:
         JSON response with extracted images, CSV, and JSON data
@@ -149,6 +151,12 @@ async def upload_bmt(file: UploadFile, project_id: str = Form(...)):
             detail="Only .BMT files are supported"
         )
 
+    if duplicates not in ("warn", "skip", "allow"):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="duplicates must be one of: warn, skip, allow"
+        )
+
     # Validate extractor exists
     validate_extractor()
 
@@ -158,6 +166,11 @@ async def upload_bmt(file: UploadFile, project_id: str = Form(...)):
         from app.db.session import engine
         from app.models.project import Project
         from app.models.image import ThermalImage
+        from app.services.fingerprint import (
+            compute_image_fingerprint, file_sha256, find_near_duplicates, fingerprint_candidates
+        )
+        from app.services.preview import get_image_preview
+        from app.services.temperature_stats import get_image_temperature_stats
         from uuid import UUID
         
         logger.info(f"[UPLOAD_BMT] Starting upload for project_id: {project_id}")
@@ -213,6 +226,39 @@ async def upload_bmt(file: UploadFile, project_id: str = Form(...)):
                 detail="یک فایل BMT قبلاً برای این پروژه آپلود شده است. لطفاً ابتدا فایل قبلی را حذف کنید."
             )
 
+        # Exact re-upload of a known file: checked before saving and extracting
+        source_sha256 = file_sha256(file.file)
+        file.file.seek(0)
+        duplicate_report = []
+        if duplicates != "allow":
+            with Session(engine) as db:
+                same_file = db.exec(
+                    select(ThermalImage.id, ThermalImage.project_id, ThermalImage.name)
+                    .where(ThermalImage.source_sha256 == source_sha256)
+                ).all()
+            duplicate_report = [
+                {
+                    "image_id": str(row.id),
+                    "project_id": str(row.project_id),
+                    "name": row.name,
+                    "match": "identical_file",
+                    "thermal_distance": 0,
+                    "visual_distance": 0,
+                }
+                for row in same_file
+            ]
+            if duplicate_report:
+                logger.warning(f"[UPLOAD_BMT] Identical file already ingested as {[d['image_id'] for d in duplicate_report]}")
+                if duplicates == "skip":
+                    return {
+                        "status": "skipped",
+                        "project_id": project_id,
+                        "duplicates": duplicate_report,
+                        "images": [],
+                        "csv_files": [],
+                        "json_files": []
+                    }
+
         # Save uploaded file
         bmt_path = project_path / file.filename
         logger.info(f"Saving BMT file to: {bmt_path}")
@@ -400,9 +446,12 @@ async def upload_bmt(file: UploadFile, project_id: str = Form(...)):
         logger.info(f"Images in response: {[img.get('name', img.get('type')) for img in images]}")
 
         # Save images to database
+        saved = 0
         with Session(engine) as db:
             # Save visual image
             visual_image = next((img for img in images if img.get('type') == 'real'), None)
+            candidates = fingerprint_candidates(db) if duplicates != "allow" else []
+            identical_ids = {d["image_id"] for d in duplicate_report}
             
             # Save thermal images
             for thermal_img in thermal_images:
@@ -413,15 +462,35 @@ async def upload_bmt(file: UploadFile, project_id: str = Form(...)):
                     thermal_image_path=None,  # We don't have a single thermal path
                     server_palettes=thermal_img.get('palettes', {}),
                     csv_url=thermal_img.get('csv_url'),
-                    thermal_data=thermal_img.get('metadata', {})
+                    thermal_data=thermal_img.get('metadata', {}),
+                    source_sha256=source_sha256
                 )
+                # Fingerprint first (cheap), so duplicates skip histogram and preview
+                if compute_image_fingerprint(thermal_image) and candidates:
+                    matches = find_near_duplicates(
+                        candidates, thermal_image.thermal_hash, thermal_image.visual_hash
+                    )
+                    matches = [m for m in matches if m["image_id"] not in identical_ids]
+                    if matches:
+                        logger.warning(f"[UPLOAD_BMT] {thermal_img['name']} looks like {[m['image_id'] for m in matches]}")
+                        duplicate_report.extend({**m, "match": "near_duplicate", "new_image": thermal_img['name']} for m in matches)
+                        if duplicates == "skip":
+                            thermal_img["skipped"] = True
+                            continue
+                # Histogram / percentiles and preview once at ingest (also writes the matrix sidecar)
+                if get_image_temperature_stats(thermal_image) is None:
+                    logger.warning(f"No temperature data for histogram: {thermal_img['name']}")
+                else:
+                    get_image_preview(thermal_image)
                 db.add(thermal_image)
+                saved += 1
             
             db.commit()
-            logger.info(f"Saved {len(thermal_images)} thermal images to database")
+            logger.info(f"Saved {saved} thermal images to database")
 
         return {
             "status": "success",
+            "duplicates": duplicate_report,
             "project_id": project_id,
             "output_dir": str(output_dir),
             "validation": validation,
@@ -3,10 +3,12 @@ from fastapi import APIRouter
 from app.api.routes import (
     project,  # Changed from 'projects' to 'project' for SQLModel
     thermal,
+    images,
     markers,
     regions,
     # template,
-    reports
+    reports,
+    assets
 )
 
 api_router = APIRouter()
@@ -23,6 +25,12 @@ api_router.include_router(
     tags=["thermal"]
 )
 
+api_router.include_router(
+    images.router,
+    prefix="/images",
+    tags=["images"]
+)
+
 api_router.include_router(
     markers.router,
     prefix="/markers",
@@ -45,4 +53,10 @@ api_router.include_router(
     reports.router,
     prefix="/reports",
     tags=["reports"]
-)
\ No newline at end of file
+)
+
+api_router.include_router(
+    assets.router,
+    prefix="/assets",
+    tags=["assets"]
+)
@@ -31,6 +31,32 @@ class Settings(BaseSettings):
     # File Upload
     MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024  # 100MB
     ALLOWED_EXTENSIONS: list[str] = [".bmt"]
+
+    # Temperature matrix cache (number of decoded matrices kept in memory)
+    MATRIX_CACHE_SIZE: int = 16
+    # Memory budget per matrix for derived indexes, masks and renders
+    MATRIX_DERIVED_CACHE_MB: int = 128
+    # Memory cap for the rectangle min/max sparse table of one matrix
+    EXTREMA_INDEX_MAX_MB: int = 48
+    # Ingest-time temperature histogram: base bin width (°C) and max bins
+    HISTOGRAM_BIN_WIDTH: float = 0.1
+    HISTOGRAM_MAX_BINS: int = 4096
+    # Ingest-time preview matrix size (block mean / block max)
+    PREVIEW_WIDTH: int = 80
+    PREVIEW_HEIGHT: int = 60
+    # Temperature factor fRsi below which surfaces count as thermal bridges
+    # (DIN 4108-2 minimum 0.70) and below which they are rated severe
+    FRSI_THRESHOLD: float = 0.70
+    FRSI_SEVERE_THRESHOLD: float = 0.60
+    # Directory holding the extractor's t880_x.txt / t880_y.txt parallax maps
+    # (defaults to the extractor's directory, then the bundled BmtExtract build)
+    PARALLAX_MAP_DIR: Optional[str] = os.getenv("PARALLAX_MAP_DIR")
+    # Max Hamming distance (of 64 bits) between fingerprints of near-duplicates
+    FINGERPRINT_MAX_DISTANCE: int = 6
+    # Upper bound on frames per panorama (all pairs are registered)
+    PANORAMA_MAX_FRAMES: int = 40
+    # Worker processes of batch anomaly scoring (0 = one per CPU)
+    ANOMALY_WORKERS: int = 0
     class Config:
         case_sensitive = True
         env_file = ".env"
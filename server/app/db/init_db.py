@@ -3,7 +3,7 @@ from sqlmodel import SQLModel
 
 from app.db.session import engine
 # Import all models to register them with SQLModel
-from app.models import Project, ThermalImage, Marker, Region, Template
+from app.models import Project, ThermalImage, Marker, Region, Template, Asset, AssetReading
 
 
 def init_db() -> None:
@@ -1,3 +1,4 @@
+from sqlalchemy import inspect, text
 from sqlmodel import Session, create_engine, SQLModel
 from app.core.config import settings
 import os
@@ -15,17 +16,43 @@ engine = create_engine(
     connect_args={"check_same_thread": False}  # Needed for SQLite
 )
 
+def _add_missing_columns() -> None:
+    """
+    Add columns (and their indexes) introduced after a table was created
+    (create_all never alters existing tables). New columns are nullable,
+    so a plain ALTER TABLE ADD COLUMN is enough for SQLite.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+                print(f"[DB] Added column {table.name}.{column.name}")
+            existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+                    print(f"[DB] Added index {index.name}")
+
 def init_db() -> None:
     """
     Initialize database by creating all tables.
     Should be called once at application startup.
     """
     # Import all models to register them with SQLModel
-    from app.models import Project, ThermalImage, Marker, Region, Template
+    from app.models import Project, ThermalImage, Marker, Region, Template, Asset, AssetReading
     
     print("[DB] Initializing database...")
     try:
         SQLModel.metadata.create_all(bind=engine)
+        _add_missing_columns()
         print("[DB] ✅ Database tables created successfully")
         print(f"[DB] ✅ Database location: {db_path}")
     except Exception as e:
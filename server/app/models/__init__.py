@@ -8,6 +8,7 @@ from .image import ThermalImage
 from .marker import Marker
 from .region import Region
 from .template import Template
+from .asset import Asset, AssetReading
 
 
 __all__ = [
@@ -15,5 +16,7 @@ __all__ = [
     "ThermalImage", 
     "Marker",
     "Region",
-    "Template"
+    "Template",
+    "Asset",
+    "AssetReading"
 ]
\ No newline at end of file
@@ -0,0 +1,48 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, UniqueConstraint
+from typing import Optional
+from datetime import datetime
+from uuid import uuid4, UUID
+
+
+class Asset(SQLModel, table=True):
+    """A physical component (breaker, busbar joint ...) inspected repeatedly across projects"""
+    __tablename__ = "assets"
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    name: str = Field(index=True)
+    description: Optional[str] = None
+    location: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class AssetReading(SQLModel, table=True):
+    """
+    Statistics of an asset's region in one image, at the image's capture
+    time. One reading per asset and image, refreshed whenever the region's
+    statistics change.
+    """
+    __tablename__ = "asset_readings"
+    __table_args__ = (
+        UniqueConstraint("asset_id", "image_id", name="uq_asset_readings_asset_image"),
+        Index("ix_asset_readings_asset_captured", "asset_id", "captured_at"),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    asset_id: UUID = Field(foreign_key="assets.id")
+    image_id: UUID
+    project_id: UUID = Field(index=True)
+    region_id: Optional[UUID] = Field(default=None, index=True)
+    label: Optional[str] = None
+
+    captured_at: datetime = Field(index=True)
+    min_temp: float
+    max_temp: float
+    avg_temp: float
+
+    # ΔT = max_temp - reference_temp (ambient, or the image median)
+    reference_temp: Optional[float] = None
+    reference: Optional[str] = None
+    delta_t: Optional[float] = None
+
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
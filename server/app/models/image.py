@@ -27,6 +27,25 @@ class ThermalImage(SQLModel, table=True):
     # CSV URL for temperature data
     csv_url: Optional[str] = None
 
+    # Ingest-time summary: histogram, percentiles, NaN count, min/max/mean/std
+    temperature_stats: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+
+    # Ingest-time low-resolution block-mean / block-max preview matrices
+    preview: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+
+    # Ingest-time fingerprints: SHA-256 of the uploaded file, 64-bit DCT
+    # hashes (16 hex digits) of the temperature field and the visual photo
+    source_sha256: Optional[str] = Field(default=None, index=True)
+    thermal_hash: Optional[str] = Field(default=None, index=True)
+    visual_hash: Optional[str] = Field(default=None, index=True)
+
+    # Batch anomaly scoring: severity class, score and position in the
+    # project ranking (1 = most severe), plus the scoring details
+    anomaly_severity: Optional[str] = Field(default=None, index=True)
+    anomaly_score: Optional[float] = None
+    anomaly_rank: Optional[int] = Field(default=None, index=True)
+    anomaly: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
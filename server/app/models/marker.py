@@ -26,6 +26,9 @@ class Marker(SQLModel, table=True):
     temperature: float
     label: str
     emissivity: float = 0.95
+    # Set on markers created by hotspot/coldspot detection, which a rerun
+    # may replace; hand-placed markers of the same types are kept
+    auto_detected: Optional[bool] = Field(default=False, index=True)
 
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -31,6 +31,14 @@ class Region(SQLModel, table=True):
 
     label: str
     emissivity: float = 0.95
+
+    # Physical asset this region shows (links inspections across projects)
+    asset_id: Optional[UUID] = Field(default=None, foreign_key="assets.id", index=True)
+
+    # Batch anomaly scoring: ΔT against the image's reference, severity class
+    delta_t: Optional[float] = None
+    anomaly_score: Optional[float] = None
+    anomaly_severity: Optional[str] = Field(default=None, index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     # Relationships
@@ -0,0 +1,467 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, List, Literal, Optional
+from uuid import UUID
+from datetime import datetime
+
+class RectangleQuery(BaseModel):
+    """Axis-aligned rectangle in image pixel coordinates (corners in any order)"""
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+
+class RectStatsRequest(BaseModel):
+    rectangles: List[RectangleQuery] = Field(..., min_length=1)
+
+class RectStatsResult(BaseModel):
+    count: int
+    pixels: int
+    mean: Optional[float] = None
+    variance: Optional[float] = None
+    std: Optional[float] = None
+
+class RectStatsResponse(BaseModel):
+    image_id: str
+    results: List[RectStatsResult]
+
+class RectExtremesResult(BaseModel):
+    min_temp: Optional[float] = None
+    min_x: Optional[int] = None
+    min_y: Optional[int] = None
+    max_temp: Optional[float] = None
+    max_x: Optional[int] = None
+    max_y: Optional[int] = None
+
+class RectExtremesResponse(BaseModel):
+    image_id: str
+    results: List[RectExtremesResult]
+
+class PointQuery(BaseModel):
+    """Point in image pixel coordinates"""
+    x: float
+    y: float
+
+class PolylineQuery(BaseModel):
+    points: List[PointQuery] = Field(..., min_length=2)
+
+class LineProfileRequest(BaseModel):
+    """Ad-hoc polylines and/or stored line regions to profile in one call"""
+    lines: List[PolylineQuery] = []
+    region_ids: List[UUID] = []
+    spacing: float = Field(default=0.5, gt=0, le=10)
+
+class ProfilePoint(BaseModel):
+    x: float
+    y: float
+    distance: float
+
+class LineProfile(BaseModel):
+    region_id: Optional[str] = None
+    distances: List[float]
+    x: List[float]
+    y: List[float]
+    temperatures: List[Optional[float]]
+    length: float
+    min_temp: Optional[float] = None
+    max_temp: Optional[float] = None
+    avg_temp: Optional[float] = None
+    min_point: Optional[ProfilePoint] = None
+    max_point: Optional[ProfilePoint] = None
+
+class LineProfileResponse(BaseModel):
+    image_id: str
+    profiles: List[LineProfile]
+
+class HotspotDetectionRequest(BaseModel):
+    kinds: List[Literal["hotspot", "coldspot"]] = ["hotspot", "coldspot"]
+    top_k: int = Field(default=5, ge=1, le=100)
+    min_separation: int = Field(default=10, ge=1, description="Minimum distance between spots (pixels)")
+    min_delta: float = Field(default=1.0, ge=0, description="Minimum ΔT over the local background")
+    background_radius: int = Field(default=15, ge=1)
+    region_id: Optional[UUID] = None
+    replace_existing: bool = True
+
+class IsothermBand(BaseModel):
+    min_temp: float
+    max_temp: float
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.min_temp > self.max_temp:
+            raise ValueError("min_temp must not exceed max_temp")
+        return self
+
+class IsothermRequest(BaseModel):
+    bands: List[IsothermBand] = Field(..., min_length=1)
+    encoding: Literal["rle", "bitpack"] = "rle"
+    contours: bool = False
+
+class IsothermMask(BaseModel):
+    encoding: str
+    shape: List[int]
+    step: int
+    data: Any
+
+class IsothermResult(BaseModel):
+    min_temp: float
+    max_temp: float
+    pixel_count: int
+    coverage: float
+    mask: IsothermMask
+    contours: Optional[List[List[Dict[str, float]]]] = None
+
+class IsothermResponse(BaseModel):
+    image_id: str
+    unit: str = "C"
+    isotherms: List[IsothermResult]
+
+class RecompensationRequest(BaseModel):
+    emissivity: float = Field(..., gt=0, le=1)
+    reflected_temp: Optional[float] = Field(default=None, description="Reflected temperature (in `unit`); camera value if omitted")
+    region_ids: Optional[List[UUID]] = None
+
+class RecompensatedRegion(BaseModel):
+    region_id: str
+    min_temp: Optional[float] = None
+    max_temp: Optional[float] = None
+    avg_temp: Optional[float] = None
+
+class RecompensationResponse(BaseModel):
+    image_id: str
+    unit: str = "C"
+    emissivity: float
+    reflected_temp: float
+    camera_emissivity: float
+    camera_reflected_temp: float
+    min_temp: Optional[float] = None
+    max_temp: Optional[float] = None
+    avg_temp: Optional[float] = None
+    regions: List[RecompensatedRegion] = []
+
+class TemperatureHistogram(BaseModel):
+    bin_width: float
+    start: int = Field(..., description="Index of the first bin; bin k covers [k*bin_width + offset, (k+1)*bin_width + offset)")
+    counts: List[int]
+    offset: float = 0.0
+
+class TemperatureStats(BaseModel):
+    count: int
+    nan_count: int
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    sum: float
+    sum_sq: float
+    percentiles: Dict[str, float]
+    histogram: TemperatureHistogram
+    step: Optional[int] = None
+    images: Optional[int] = None
+
+class ImageHistogramResponse(BaseModel):
+    image_id: str
+    unit: str = "C"
+    stats: TemperatureStats
+
+class ProjectHistogramResponse(BaseModel):
+    project_id: str
+    unit: str = "C"
+    stats: TemperatureStats
+
+class TemperatureDistributionResponse(BaseModel):
+    project_ids: List[str]
+    unit: str = "C"
+    images: int
+    sketch: Literal["t-digest", "histogram"]
+    quantiles: Dict[str, float] = Field(..., description="Quantile (0..1) -> temperature")
+    fraction_below: Dict[str, float] = Field(default_factory=dict, description="Threshold temperature -> fraction of pixels at or below it")
+    histogram: Optional[Dict[str, List[float]]] = Field(default=None, description="Merged histogram coarsened for display: {edges, counts}")
+    stats: TemperatureStats
+
+class TileLevel(BaseModel):
+    level: int
+    scale: float
+    pixel_size: int = Field(..., description="Image pixels per tile pixel")
+    rows: int
+    cols: int
+    tiles_x: int
+    tiles_y: int
+    min_temp: Optional[float] = None
+    max_temp: Optional[float] = None
+    mean_temp: Optional[float] = None
+
+class TilePyramidResponse(BaseModel):
+    image_id: str
+    tile_size: int
+    dtype: str
+    unit: str = "C"
+    levels: List[TileLevel]
+
+class PreviewData(BaseModel):
+    encoding: str
+    width: int
+    height: int
+    pixel_size: int = Field(..., description="Image pixels per preview pixel")
+    min_temp: Optional[float] = None
+    max_temp: Optional[float] = None
+    mean: str = Field(..., description="Block-mean matrix, base64 of a deflated int16 matrix blob")
+    max: str = Field(..., description="Block-max matrix, same encoding")
+
+class ImagePreviewItem(BaseModel):
+    image_id: str
+    name: str
+    preview: Optional[PreviewData] = None
+    mean_temp: Optional[float] = None
+
+class ProjectPreviewsResponse(BaseModel):
+    project_id: str
+    unit: str = "C"
+    images: List[ImagePreviewItem]
+
+class DifferenceRequest(BaseModel):
+    image_a: UUID = Field(..., description="Reference (earlier) image; its grid is used")
+    image_b: UUID = Field(..., description="Compared (later) image; ΔT = B - A")
+    threshold: float = Field(default=2.0, gt=0, description="|ΔT| that counts as changed (in `unit`)")
+    min_area: int = Field(default=4, ge=1, description="Smallest changed region (matrix pixels)")
+    top_k: int = Field(default=10, ge=1, le=100)
+    align: Literal["none", "translation", "similarity"] = Field(
+        default="none", description="Register B onto A before differencing"
+    )
+    min_confidence: float = Field(
+        default=0.0, ge=0, le=1, description="Reject (422) an alignment whose registration confidence is lower"
+    )
+
+class DifferenceStats(BaseModel):
+    count: int
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean_abs: Optional[float] = None
+    p5: Optional[float] = None
+    p95: Optional[float] = None
+    increased_fraction: float
+    decreased_fraction: float
+
+class ChangedRegion(BaseModel):
+    direction: Literal["warmer", "colder"]
+    area: int
+    mean_delta: float
+    max_delta: float
+    x: int
+    y: int
+    width: int
+    height: int
+    centroid: Dict[str, float]
+    score: float
+
+class DifferenceResponse(BaseModel):
+    image_a: str
+    image_b: str
+    unit: str = "C"
+    shape: List[int]
+    step: int
+    resampled: bool
+    registration: Optional["Registration"] = None
+    stats: DifferenceStats
+    regions: List[ChangedRegion]
+    render_url: str
+
+class RegistrationRequest(BaseModel):
+    image_a: UUID = Field(..., description="Reference image")
+    image_b: UUID = Field(..., description="Image registered onto the reference")
+    rotation: bool = Field(default=False, description="Also estimate rotation and scale (log-polar)")
+
+class Registration(BaseModel):
+    dx: float = Field(..., description="Shift in A matrix pixels")
+    dy: float
+    rotation: float = Field(..., description="Degrees")
+    scale: float
+    confidence: float = Field(..., description="Correlation peak relative to a perfect match")
+    centre: List[float]
+
+class RegistrationResponse(BaseModel):
+    image_a: str
+    image_b: str
+    registration: Registration
+
+DifferenceResponse.model_rebuild()
+
+class MoistureRiskRequest(BaseModel):
+    air_temp: Optional[float] = Field(default=None, description="Inner air temperature (in `unit`); project ambientTemp if omitted")
+    relative_humidity: Optional[float] = Field(default=None, gt=0, description="Fraction (0.55) or percent (55); project humidity if omitted")
+    outside_temp: Optional[float] = Field(default=None, description="Outside temperature (in `unit`) for critical temperature factors")
+    safety_margin: float = Field(default=0.0, ge=0, description="Flag surfaces within this many degrees (in `unit`) above the dew point")
+    mould_surface_rh: float = Field(default=0.8, gt=0, le=1)
+
+class MoistureRiskStats(BaseModel):
+    air_temp: float
+    relative_humidity: float
+    dew_point: float
+    mould_critical_temp: float
+    min_surface_temp: Optional[float] = None
+    min_dew_point_margin: Optional[float] = None
+    max_surface_rh: Optional[float] = None
+    condensation_pixels: int
+    condensation_fraction: float
+    mould_pixels: int
+    mould_fraction: float
+    f_crit_condensation: Optional[float] = None
+    f_crit_mould: Optional[float] = None
+
+class MoistureRiskResponse(BaseModel):
+    image_id: str
+    unit: str = "C"
+    stats: MoistureRiskStats
+    overlay_png: str = Field(..., description="Base64 PNG overlay on the matrix grid: condensation blue, mould risk orange")
+
+class TemperatureFactorRequest(BaseModel):
+    inner_temp: Optional[float] = Field(default=None, description="Inner air temperature Ti (in `unit`); project ambientTemp if omitted")
+    outer_temp: float = Field(..., description="Outside air temperature Te (in `unit`)")
+    threshold: Optional[float] = Field(default=None, description="fRsi below which a surface is a thermal bridge")
+    severe_threshold: Optional[float] = Field(default=None, description="fRsi below which a thermal bridge is severe")
+    min_area: int = Field(default=4, ge=1, description="Minimum area in image pixels")
+    top_k: int = Field(default=20, ge=1, le=200)
+
+class ThermalBridgeArea(BaseModel):
+    severity: Literal["warning", "severe"]
+    area: int
+    min_frsi: float
+    mean_frsi: float
+    x: int
+    y: int
+    width: int
+    height: int
+    centroid: Dict[str, float]
+
+class TemperatureFactorResponse(BaseModel):
+    image_id: str
+    unit: str = "C"
+    inner_temp: float
+    outer_temp: float
+    threshold: float
+    severe_threshold: float
+    min_frsi: Optional[float] = None
+    mean_frsi: Optional[float] = None
+    p5_frsi: Optional[float] = None
+    below_threshold_pixels: int
+    below_threshold_fraction: float
+    severe_pixels: int
+    areas: List[ThermalBridgeArea]
+
+class CoordinateMappingRequest(BaseModel):
+    direction: Literal["thermal_to_visual", "visual_to_thermal"] = "thermal_to_visual"
+    points: List[Dict[str, float]] = Field(default_factory=list)
+    polygons: List[List[Dict[str, float]]] = Field(default_factory=list)
+    include_annotations: bool = Field(default=False, description="Also map the image's stored markers and regions (thermal_to_visual)")
+
+class MappedPoint(BaseModel):
+    x: float
+    y: float
+    inside: bool
+
+class MappedAnnotation(BaseModel):
+    id: str
+    label: Optional[str] = None
+    type: str
+    points: List[Optional[MappedPoint]]
+
+class CoordinateMappingResponse(BaseModel):
+    image_id: str
+    direction: str
+    thermal_size: List[int]
+    visual_size: List[int]
+    points: List[Optional[MappedPoint]]
+    polygons: List[List[Optional[MappedPoint]]]
+    markers: List[MappedAnnotation] = Field(default_factory=list)
+    regions: List[MappedAnnotation] = Field(default_factory=list)
+
+class DuplicateMatch(BaseModel):
+    image_id: str
+    project_id: str
+    name: str
+    thermal_distance: int
+    visual_distance: Optional[int] = None
+
+class DuplicatesResponse(BaseModel):
+    image_id: str
+    thermal_hash: str
+    visual_hash: Optional[str] = None
+    max_distance: int
+    matches: List[DuplicateMatch]
+
+class PanoramaRequest(BaseModel):
+    image_ids: List[UUID] = Field(default_factory=list, description="Frames to stitch; default all non-mosaic images of the project")
+    name: Optional[str] = None
+    blend: Literal["feather", "first"] = "feather"
+    equalize: bool = Field(default=False, description="Level per-frame temperature offsets measured in the overlaps")
+    min_overlap: float = Field(default=0.1, gt=0, lt=1, description="Minimum overlap as a fraction of a frame")
+    min_confidence: float = Field(default=0.7, ge=0, le=1, description="Minimum overlap NCC to accept a frame pair")
+    transfer_annotations: bool = Field(default=True, description="Copy the frames' regions and markers onto the mosaic")
+
+class PanoramaFrame(BaseModel):
+    image_id: str
+    name: str
+    x: int
+    y: int
+    rows: int
+    cols: int
+    reference_image_id: Optional[str] = None
+    ncc: float
+    overlap: float
+    correction: float
+
+class PanoramaResponse(BaseModel):
+    image_id: str
+    project_id: str
+    name: str
+    shape: List[int]
+    step: int
+    blend: str
+    equalized: bool
+    unit: str = "C"
+    frames: List[PanoramaFrame]
+    regions: int
+    markers: int
+
+class AnomalyScoringRequest(BaseModel):
+    reference_region_ids: List[UUID] = Field(default_factory=list, description="Regions showing a healthy similar component (ΔT reference of their image)")
+    reference_label: Optional[str] = Field(default="reference", description="Regions whose label starts with this (case-insensitive) are references too")
+    workers: Optional[int] = Field(default=None, ge=1, le=64, description="Worker processes; ANOMALY_WORKERS if omitted")
+
+class RegionAnomaly(BaseModel):
+    region_id: str
+    label: Optional[str] = None
+    reference_region: bool
+    severity: Optional[str] = None
+    score: Optional[float] = None
+    max_temp: Optional[float] = None
+    delta_t: Optional[float] = None
+    hot_z: Optional[float] = None
+    peer_z: Optional[float] = None
+
+class ImageAnomaly(BaseModel):
+    image_id: str
+    name: str
+    rank: int
+    severity: str
+    score: Optional[float] = None
+    reference: Optional[str] = None
+    reference_temp: Optional[float] = None
+    max_temp: Optional[float] = None
+    p99: Optional[float] = None
+    delta_t: Optional[float] = None
+    hot_z: Optional[float] = None
+    peer_z: Optional[float] = None
+    regions: List[RegionAnomaly]
+
+class AnomalyRankingResponse(BaseModel):
+    project_id: str
+    unit: str
+    scored_at: Optional[datetime] = None
+    images: int
+    skipped: List[str]
+    counts: Dict[str, int]
+    project_median: Optional[float] = None
+    project_sigma: Optional[float] = None
+    ranking: List[ImageAnomaly]
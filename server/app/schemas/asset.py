@@ -0,0 +1,81 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import datetime
+from uuid import UUID
+
+class AssetBase(BaseModel):
+    name: str
+    description: Optional[str] = None
+    location: Optional[str] = None
+
+class AssetCreate(AssetBase):
+    pass
+
+class AssetUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+
+class AssetResponse(AssetBase):
+    id: UUID
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class AssetTagRequest(BaseModel):
+    region_ids: List[UUID] = Field(..., min_length=1)
+
+class AssetReadingResponse(BaseModel):
+    id: UUID
+    asset_id: UUID
+    image_id: UUID
+    project_id: UUID
+    region_id: Optional[UUID] = None
+    label: Optional[str] = None
+    captured_at: datetime
+    min_temp: float
+    max_temp: float
+    avg_temp: float
+    reference_temp: Optional[float] = None
+    reference: Optional[str] = None
+    delta_t: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+class AssetTrendRequest(BaseModel):
+    asset_ids: List[UUID] = Field(default_factory=list, description="Assets to include; empty for all")
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    bucket: Literal["none", "day", "week", "month"] = "none"
+
+class AssetTrendPoint(BaseModel):
+    captured_at: datetime
+    min_temp: float
+    max_temp: float
+    avg_temp: float
+    delta_t: Optional[float] = None
+    count: int = 1
+    image_id: UUID
+    project_id: UUID
+
+class AssetTrendSummary(BaseModel):
+    count: int
+    first: Optional[datetime] = None
+    last: Optional[datetime] = None
+    max_temp_change: Optional[float] = None
+    max_temp_slope_per_30d: Optional[float] = None
+    delta_t_slope_per_30d: Optional[float] = None
+    latest_delta_t: Optional[float] = None
+
+class AssetSeries(BaseModel):
+    asset_id: UUID
+    name: str
+    points: List[AssetTrendPoint]
+    summary: AssetTrendSummary
+
+class AssetTrendResponse(BaseModel):
+    unit: str
+    bucket: str
+    series: List[AssetSeries]
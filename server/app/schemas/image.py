@@ -32,6 +32,11 @@ class ImageResponse(ImageBase):
     thermal_data: Optional[Dict[str, Any]] = None
     server_palettes: Optional[Dict[str, str]] = None
     csv_url: Optional[str] = None
+    temperature_stats: Optional[Dict[str, Any]] = None
+    preview: Optional[Dict[str, Any]] = None
+    anomaly_severity: Optional[str] = None
+    anomaly_score: Optional[float] = None
+    anomaly_rank: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     
@@ -23,6 +23,7 @@ class MarkerResponse(MarkerBase):
     id: UUID
     project_id: UUID
     image_id: UUID
+    auto_detected: Optional[bool] = False
     created_at: datetime
     
     class Config:
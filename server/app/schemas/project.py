@@ -99,6 +99,7 @@ class BulkRegionData(BaseModel):
     avg_temp: Optional[float] = None
     area: Optional[float] = None
     emissivity: Optional[float] = 0.95
+    asset_id: Optional[str] = None
 
 class BulkSaveRequest(BaseModel):
     """Request schema for bulk save operation"""
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Literal
 from datetime import datetime
 from uuid import UUID
@@ -16,6 +16,7 @@ class RegionBase(BaseModel):
     area: Optional[float] = None
     label: str
     emissivity: float = 0.95
+    asset_id: Optional[UUID] = None
 
 class RegionCreate(RegionBase):
     project_id: UUID
@@ -27,12 +28,23 @@ class RegionUpdate(BaseModel):
     min_temp: Optional[float] = None
     max_temp: Optional[float] = None
     avg_temp: Optional[float] = None
+    asset_id: Optional[UUID] = None
 
 class RegionResponse(RegionBase):
     id: UUID
     project_id: UUID
     image_id: UUID
+    delta_t: Optional[float] = None
+    anomaly_score: Optional[float] = None
+    anomaly_severity: Optional[str] = None
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class RegionTransferRequest(BaseModel):
+    source_image_id: UUID
+    target_image_id: UUID
+    region_ids: Optional[List[UUID]] = None
+    rotation: bool = False
+    min_confidence: float = Field(default=0.0, ge=0, le=1)
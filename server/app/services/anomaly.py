@@ -0,0 +1,343 @@
+# server/app/services/anomaly.py
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.radiometry import camera_parameters, get_recompensated_data, global_radiometric_parameters
+from app.services.region_stats import compute_region_statistics
+from app.services.temperature_matrix import matrix_cache, resolve_data_path
+from app.services.temperature_stats import compute_temperature_stats, merge_temperature_stats
+
+SEVERITIES = ("normal", "minor", "intermediate", "serious", "critical")
+
+# ΔT (°C) from which the four non-normal classes start, after the NETA
+# MTS tables. Against a similar component (reference region) the table
+# has no third class, so "serious" is skipped.
+DELTA_T_CLASSES = {
+    "reference": (1.0, 4.0, 16.0, 16.0),
+    "ambient": (1.0, 11.0, 21.0, 41.0),
+    "image_median": (1.0, 11.0, 21.0, 41.0),
+}
+
+# Modified z-score above which a ΔT is an outlier among its peers and its
+# class is raised by one (Iglewicz & Hoaglin)
+OUTLIER_Z = 3.5
+
+
+def robust_z(values: Sequence[Optional[float]]) -> np.ndarray:
+    """
+    Modified z-scores 0.6745·(x - median) / MAD; with MAD = 0 the mean
+    absolute deviation (·1.2533) is used instead. None/NaN stay NaN.
+    """
+    x = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    valid = ~np.isnan(x)
+    z = np.full(x.shape, np.nan)
+    if not valid.any():
+        return z
+    median = np.median(x[valid])
+    deviation = np.abs(x[valid] - median)
+    mad = np.median(deviation)
+    if mad > 0:
+        z[valid] = 0.6745 * (x[valid] - median) / mad
+    else:
+        mean_ad = deviation.mean()
+        z[valid] = (x[valid] - median) / (1.2533 * mean_ad) if mean_ad > 0 else 0.0
+    return z
+
+
+def severity_level(delta_t: Optional[float], reference: Optional[str], peer_z: float = np.nan) -> int:
+    """Index into SEVERITIES of a ΔT against a reference kind, raised for peer outliers"""
+    if delta_t is None or reference is None:
+        return 0
+    level = int(np.searchsorted(DELTA_T_CLASSES[reference], delta_t, side="right"))
+    if np.isfinite(peer_z) and peer_z >= OUTLIER_Z:
+        level = min(level + 1, len(SEVERITIES) - 1)
+    return level
+
+
+def build_image_task(image, regions: Sequence[Any], project=None) -> Optional[Dict[str, Any]]:
+    """
+    Plain-data description of one image for a worker process: matrix path,
+    camera and project radiometric parameters, region outlines. None when
+    the image has no temperature data on disk.
+    """
+    path = resolve_data_path(image.csv_url)
+    if not path or not path.exists():
+        return None
+    camera = camera_parameters(image)
+    emissivity, reflected_temp = global_radiometric_parameters(project.global_parameters if project else None)
+    return {
+        "image_id": str(image.id),
+        "path": str(path),
+        "camera": camera,
+        "emissivity": emissivity if emissivity is not None else camera[0],
+        "reflected_temp": reflected_temp if reflected_temp is not None else camera[1],
+        "regions": [
+            {"type": getattr(r.type, "value", r.type), "points": r.points, "emissivity": r.emissivity}
+            for r in regions
+        ],
+    }
+
+
+def score_image_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Worker: temperature stats of the image's surface temperatures and
+    statistics of its regions (one vectorized pass per emissivity), from
+    the memory-mapped matrix sidecar.
+    """
+    try:
+        matrix = matrix_cache.get(Path(task["path"]))
+    except (FileNotFoundError, ValueError) as e:
+        return {"image_id": task["image_id"], "error": str(e)}
+
+    camera, reflected_temp = tuple(task["camera"]), task["reflected_temp"]
+    surface = get_recompensated_data(matrix, camera, task["emissivity"], reflected_temp)
+    stats = compute_temperature_stats(surface, matrix.step)
+
+    region_stats: List[Optional[Dict[str, Any]]] = [None] * len(task["regions"])
+    groups: Dict[float, List[int]] = {}
+    for i, region in enumerate(task["regions"]):
+        groups.setdefault(round(region["emissivity"], 4), []).append(i)
+    for emissivity, indices in groups.items():
+        data = get_recompensated_data(matrix, camera, emissivity, reflected_temp)
+        results = compute_region_statistics(data, [task["regions"][i] for i in indices], matrix.step)
+        for i, result in zip(indices, results):
+            region_stats[i] = result
+    return {"image_id": task["image_id"], "stats": stats, "regions": region_stats}
+
+
+def run_image_tasks(tasks: List[Dict[str, Any]], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Run score_image_task over all tasks in a process pool (spawned workers,
+    a few images per chunk); in-process for a single worker or task, or
+    when no pool can be started.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        return [score_image_task(task) for task in tasks]
+    chunksize = max(1, len(tasks) // (workers * 4))
+    try:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            return list(pool.map(score_image_task, tasks, chunksize=chunksize))
+    except (BrokenProcessPool, OSError) as e:
+        print(f"[ANOMALY] Process pool unavailable ({e}); scoring in-process")
+        return [score_image_task(task) for task in tasks]
+
+
+def _project_distribution(stats: Sequence[Dict[str, Any]]) -> Dict[str, Optional[float]]:
+    """Median and robust spread (IQR / 1.349) of all pixels of the project"""
+    merged = merge_temperature_stats(stats)
+    percentiles = merged["percentiles"]
+    median = percentiles.get("p50")
+    sigma = None
+    if percentiles:
+        sigma = (percentiles["p75"] - percentiles["p25"]) / 1.349 or merged["std"]
+    return {"median": median, "sigma": sigma or None}
+
+
+def _hot_z(value: Optional[float], distribution: Dict[str, Optional[float]]) -> float:
+    if value is None or distribution["sigma"] is None:
+        return np.nan
+    return (value - distribution["median"]) / distribution["sigma"]
+
+
+def _finite(value: float) -> Optional[float]:
+    return round(float(value), 3) if np.isfinite(value) else None
+
+
+def score_project(
+    project,
+    images: Sequence[Any],
+    regions: Sequence[Any],
+    reference_region_ids: Sequence[Any] = (),
+    reference_label: Optional[str] = None,
+    workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Anomaly scores of every image and region of a project.
+
+    Workers compute surface temperature stats and region statistics per
+    image; region min/max/avg are written back. ΔT of a region (and of an
+    image's maximum) is taken against the mean maximum of the image's
+    reference regions, else the project ambient temperature, else the image median.
+    Scores are robust z-scores: against the project-wide pixel distribution
+    (max, or p99 for images) and among the ΔT of all regions/images. The
+    severity class follows from ΔT and is raised by one for peer outliers;
+    an image is at least as severe as its worst region.
+
+    Results are stored on the rows (anomaly_* columns, ranking 1 = most
+    severe) and returned as a ranking; the caller commits.
+    """
+    scored_at = datetime.utcnow()
+    by_image: Dict[Any, List[Any]] = {}
+    for region in regions:
+        by_image.setdefault(region.image_id, []).append(region)
+
+    tasks, skipped = [], []
+    for image in images:
+        task = build_image_task(image, by_image.get(image.id, []), project)
+        if task is None:
+            skipped.append(str(image.id))
+        else:
+            tasks.append(task)
+
+    results = {}
+    for result in run_image_tasks(tasks, workers):
+        if "error" in result:
+            print(f"[ANOMALY] Skipping image {result['image_id']}: {result['error']}")
+            skipped.append(result["image_id"])
+        else:
+            results[result["image_id"]] = result
+
+    distribution = _project_distribution([r["stats"] for r in results.values()])
+    parameters = (project.global_parameters if project else None) or {}
+    ambient = parameters.get("ambientTemp", parameters.get("ambient_temp"))
+    reference_ids = {str(region_id) for region_id in reference_region_ids}
+    label_prefix = reference_label.strip().lower() if reference_label else None
+
+    def is_reference(region) -> bool:
+        return str(region.id) in reference_ids or bool(
+            label_prefix and (region.label or "").strip().lower().startswith(label_prefix)
+        )
+
+    entries, region_entries = [], []
+    for image in images:
+        result = results.get(str(image.id))
+        if result is None:
+            continue
+        stats = result["stats"]
+        image_regions = by_image.get(image.id, [])
+        for region, region_stats in zip(image_regions, result["regions"]):
+            if region_stats and region_stats["count"]:
+                region.min_temp = region_stats["min_temp"]
+                region.max_temp = region_stats["max_temp"]
+                region.avg_temp = region_stats["avg_temp"]
+
+        references = [r for r in image_regions if is_reference(r)]
+        image_reference_ids = {r.id for r in references}
+        if references:
+            reference_temp, reference = float(np.mean([r.max_temp for r in references])), "reference"
+        elif ambient is not None:
+            reference_temp, reference = float(ambient), "ambient"
+        elif stats["percentiles"]:
+            reference_temp, reference = stats["percentiles"]["p50"], "image_median"
+        else:
+            reference_temp, reference = None, None
+
+        def delta(value):
+            return value - reference_temp if value is not None and reference_temp is not None else None
+
+        entry = {
+            "image_id": str(image.id),
+            "name": image.name,
+            "reference": reference,
+            "reference_temp": reference_temp,
+            "max_temp": stats["max"],
+            "p99": stats["percentiles"].get("p99"),
+            "delta_t": delta(stats["max"]),
+            "hot_z": _hot_z(stats["percentiles"].get("p99"), distribution),
+            "regions": [],
+        }
+        for region in image_regions:
+            region_entry = {
+                "region_id": str(region.id),
+                "label": region.label,
+                "reference_region": region.id in image_reference_ids,
+                "max_temp": region.max_temp,
+                "delta_t": None if region.id in image_reference_ids else delta(region.max_temp),
+                "hot_z": _hot_z(region.max_temp, distribution),
+                "row": region,
+                "reference": reference,
+            }
+            entry["regions"].append(region_entry)
+            region_entries.append(region_entry)
+        entries.append(entry)
+
+    for items in (entries, region_entries):
+        for item, peer_z in zip(items, robust_z([item["delta_t"] for item in items])):
+            item["peer_z"] = peer_z
+            item["level"] = severity_level(item["delta_t"], item["reference"], peer_z)
+            item["score"] = float(np.nanmax([item["hot_z"], peer_z, -np.inf]))
+
+    def rank_key(item):
+        return item["level"], item["score"] if np.isfinite(item["score"]) else -np.inf
+
+    for entry in entries:
+        for region_entry in entry["regions"]:
+            if region_entry["reference_region"]:
+                region_entry["level"], region_entry["score"] = -1, np.nan
+            else:
+                entry["level"] = max(entry["level"], region_entry["level"])
+        entry["regions"].sort(key=rank_key, reverse=True)
+        for region_entry in entry["regions"]:
+            region = region_entry.pop("row")
+            del region_entry["reference"]
+            level = region_entry.pop("level")
+            region.delta_t = region_entry["delta_t"]
+            region.anomaly_score = _finite(region_entry["score"])
+            region.anomaly_severity = SEVERITIES[level] if level >= 0 else None
+            region_entry.update({
+                "severity": region.anomaly_severity,
+                "score": region.anomaly_score,
+                "hot_z": _finite(region_entry["hot_z"]),
+                "peer_z": _finite(region_entry["peer_z"]),
+            })
+
+    entries.sort(key=rank_key, reverse=True)
+    images_by_id = {str(image.id): image for image in images}
+    for rank, entry in enumerate(entries, start=1):
+        entry.update({
+            "rank": rank,
+            "severity": SEVERITIES[entry.pop("level")],
+            "score": _finite(entry["score"]),
+            "hot_z": _finite(entry["hot_z"]),
+            "peer_z": _finite(entry["peer_z"]),
+            "scored_at": scored_at.isoformat(),
+            "project_median": distribution["median"],
+            "project_sigma": distribution["sigma"],
+        })
+        image = images_by_id[entry["image_id"]]
+        image.anomaly_rank = rank
+        image.anomaly_severity = entry["severity"]
+        image.anomaly_score = entry["score"]
+        image.anomaly = entry
+
+    for image_id in skipped:
+        image = images_by_id.get(image_id)
+        if image is not None:
+            image.anomaly_rank = image.anomaly_severity = image.anomaly_score = image.anomaly = None
+
+    return ranking_summary(entries, skipped, scored_at, distribution)
+
+
+def ranking_summary(
+    entries: Sequence[Dict[str, Any]],
+    skipped: Sequence[str] = (),
+    scored_at: Optional[datetime] = None,
+    distribution: Optional[Dict[str, Optional[float]]] = None
+) -> Dict[str, Any]:
+    """Ranking response: entries plus counts per severity class"""
+    counts = {severity: 0 for severity in SEVERITIES}
+    for entry in entries:
+        counts[entry["severity"]] += 1
+    if distribution is None:
+        first = entries[0] if entries else {}
+        distribution = {"median": first.get("project_median"), "sigma": first.get("project_sigma")}
+    if scored_at is None and entries:
+        scored_at = datetime.fromisoformat(entries[0]["scored_at"])
+    return {
+        "scored_at": scored_at,
+        "images": len(entries),
+        "skipped": list(skipped),
+        "counts": counts,
+        "project_median": distribution["median"],
+        "project_sigma": distribution["sigma"],
+        "ranking": list(entries),
+    }
@@ -0,0 +1,261 @@
+# server/app/services/asset_trends.py
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlmodel import Session, select
+
+from app.models.asset import Asset, AssetReading
+from app.models.image import ThermalImage
+from app.models.project import Project
+from app.models.region import Region
+from app.services.temperature_stats import get_image_temperature_stats
+
+BUCKETS = ("none", "day", "week", "month")
+
+# Capture time formats seen in extractor metadata besides ISO 8601
+_CAPTURE_FORMATS = ("%m/%d/%Y %I:%M:%S %p", "%d.%m.%Y %H:%M:%S", "%Y:%m:%d %H:%M:%S")
+
+
+def parse_captured_at(value: Any) -> Optional[datetime]:
+    """Capture time from image metadata (ISO 8601 or a few camera formats), naive UTC"""
+    if isinstance(value, datetime):
+        return value
+    if not value or not isinstance(value, str):
+        return None
+    text = value.strip().replace("Z", "+00:00")
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        for fmt in _CAPTURE_FORMATS:
+            try:
+                return datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def image_captured_at(image, project=None) -> datetime:
+    """When an image was taken: metadata, else the project date, else the upload time"""
+    captured = parse_captured_at((image.thermal_data or {}).get("captured_at"))
+    if captured is None and project is not None:
+        captured = project.date
+    return captured or image.created_at
+
+
+def reference_temperature(image, project=None) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Reference for ΔT: the project's ambient temperature when set, else the
+    median of the image (from its stored histogram).
+    """
+    parameters = (project.global_parameters if project else None) or {}
+    ambient = parameters.get("ambientTemp", parameters.get("ambient_temp"))
+    if ambient is not None:
+        return float(ambient), "ambient"
+    stats = get_image_temperature_stats(image)
+    median = (stats or {}).get("percentiles", {}).get("p50")
+    return (float(median), "image_median") if median is not None else (None, None)
+
+
+def sync_asset_readings(db: Session, regions: Sequence[Any]) -> int:
+    """
+    Create or refresh the readings of asset-tagged regions from their
+    stored statistics (one reading per asset and image, so an asset is
+    tagged on at most one region of an image, see asset_image_conflicts;
+    the caller commits). Returns the number of readings written.
+    """
+    tagged = [region for region in regions if region.asset_id is not None]
+    if not tagged:
+        return 0
+
+    keys = {(region.asset_id, region.image_id) for region in tagged}
+    existing = {
+        (reading.asset_id, reading.image_id): reading
+        for reading in db.exec(
+            select(AssetReading).where(
+                AssetReading.asset_id.in_({key[0] for key in keys}),
+                AssetReading.image_id.in_({key[1] for key in keys}),
+            )
+        ).all()
+    }
+
+    images: Dict[UUID, Any] = {}
+    projects: Dict[UUID, Any] = {}
+    for region in tagged:
+        image = images.get(region.image_id) or db.get(ThermalImage, region.image_id)
+        if image is None:
+            continue
+        images[image.id] = image
+        project = projects.get(image.project_id) or db.get(Project, image.project_id)
+        projects[image.project_id] = project
+
+        reference_temp, reference = reference_temperature(image, project)
+        reading = existing.get((region.asset_id, image.id)) or AssetReading(
+            asset_id=region.asset_id, image_id=image.id, project_id=image.project_id,
+            captured_at=image_captured_at(image, project), min_temp=0.0, max_temp=0.0, avg_temp=0.0
+        )
+        reading.region_id = region.id
+        reading.label = region.label
+        reading.captured_at = image_captured_at(image, project)
+        reading.min_temp = region.min_temp
+        reading.max_temp = region.max_temp
+        reading.avg_temp = region.avg_temp
+        reading.reference_temp = reference_temp
+        reading.reference = reference
+        reading.delta_t = region.max_temp - reference_temp if reference_temp is not None else None
+        reading.updated_at = datetime.utcnow()
+        existing[(region.asset_id, image.id)] = reading
+        db.add(reading)
+    return len(tagged)
+
+
+def asset_image_conflicts(db: Session, asset_id: UUID, regions: Sequence[Any]) -> List[UUID]:
+    """
+    Images on which tagging `regions` with `asset_id` would give the asset
+    a second region: two of `regions` share an image, or another region of
+    the image already carries the asset.
+    """
+    conflicts = set()
+    by_image: Dict[UUID, Any] = {}
+    for region in regions:
+        if region.image_id in by_image and by_image[region.image_id] != region.id:
+            conflicts.add(region.image_id)
+        by_image[region.image_id] = region.id
+
+    if by_image:
+        tagged = db.exec(
+            select(Region).where(Region.asset_id == asset_id, Region.image_id.in_(set(by_image)))
+        ).all()
+        conflicts.update(region.image_id for region in tagged if region.id != by_image[region.image_id])
+    return sorted(conflicts, key=str)
+
+
+def remove_asset_readings(db: Session, regions: Iterable[Any]) -> None:
+    """Drop the readings taken from these regions (the caller commits)"""
+    region_ids = [region.id for region in regions]
+    if not region_ids:
+        return
+    for reading in db.exec(select(AssetReading).where(AssetReading.region_id.in_(region_ids))).all():
+        db.delete(reading)
+
+
+def _bucket_start(moment: datetime, bucket: str) -> datetime:
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _aggregate(points: List[Dict[str, Any]], bucket: str) -> List[Dict[str, Any]]:
+    """Readings merged per day/week/month: extremes of min/max/ΔT, mean of averages"""
+    groups: Dict[datetime, List[Dict[str, Any]]] = defaultdict(list)
+    for point in points:
+        groups[_bucket_start(point["captured_at"], bucket)].append(point)
+    merged = []
+    for start in sorted(groups):
+        group = groups[start]
+        deltas = [p["delta_t"] for p in group if p["delta_t"] is not None]
+        merged.append({
+            "captured_at": start,
+            "min_temp": min(p["min_temp"] for p in group),
+            "max_temp": max(p["max_temp"] for p in group),
+            "avg_temp": float(np.mean([p["avg_temp"] for p in group])),
+            "delta_t": max(deltas) if deltas else None,
+            "count": len(group),
+            "image_id": group[-1]["image_id"],
+            "project_id": group[-1]["project_id"],
+        })
+    return merged
+
+
+def trend_summary(points: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    First/last max temperature and ΔT of a series, plus the least-squares
+    slope of max temperature and ΔT per 30 days.
+    """
+    if not points:
+        return {"count": 0, "first": None, "last": None, "max_temp_change": None,
+                "max_temp_slope_per_30d": None, "delta_t_slope_per_30d": None, "latest_delta_t": None}
+    days = np.array([(p["captured_at"] - points[0]["captured_at"]).total_seconds() / 86400.0 for p in points])
+    highs = np.array([p["max_temp"] for p in points], dtype=np.float64)
+    deltas = np.array([np.nan if p["delta_t"] is None else p["delta_t"] for p in points], dtype=np.float64)
+
+    def slope(values: np.ndarray) -> Optional[float]:
+        valid = ~np.isnan(values)
+        if np.count_nonzero(valid) < 2 or np.ptp(days[valid]) == 0:
+            return None
+        return float(np.polyfit(days[valid], values[valid], 1)[0] * 30.0)
+
+    return {
+        "count": len(points),
+        "first": points[0]["captured_at"],
+        "last": points[-1]["captured_at"],
+        "max_temp_change": float(highs[-1] - highs[0]),
+        "max_temp_slope_per_30d": slope(highs),
+        "delta_t_slope_per_30d": slope(deltas),
+        "latest_delta_t": points[-1]["delta_t"],
+    }
+
+
+def asset_trends(
+    db: Session,
+    asset_ids: Optional[Sequence[UUID]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: str = "none"
+) -> List[Dict[str, Any]]:
+    """
+    Time series of many assets from the readings table alone (one indexed
+    query on asset_id, captured_at; no image or matrix is loaded). Assets
+    without readings in the window get an empty series.
+    """
+    asset_query = select(Asset.id, Asset.name)
+    if asset_ids:
+        asset_query = asset_query.where(Asset.id.in_(asset_ids))
+    assets = db.exec(asset_query.order_by(Asset.name)).all()
+    if not assets:
+        return []
+
+    query = select(
+        AssetReading.asset_id, AssetReading.captured_at, AssetReading.min_temp, AssetReading.max_temp,
+        AssetReading.avg_temp, AssetReading.delta_t, AssetReading.image_id, AssetReading.project_id
+    )
+    if asset_ids:
+        query = query.where(AssetReading.asset_id.in_([asset.id for asset in assets]))
+    if start is not None:
+        query = query.where(AssetReading.captured_at >= start)
+    if end is not None:
+        query = query.where(AssetReading.captured_at <= end)
+
+    series: Dict[UUID, List[Dict[str, Any]]] = defaultdict(list)
+    for row in db.exec(query.order_by(AssetReading.asset_id, AssetReading.captured_at)).all():
+        series[row.asset_id].append({
+            "captured_at": row.captured_at,
+            "min_temp": row.min_temp,
+            "max_temp": row.max_temp,
+            "avg_temp": row.avg_temp,
+            "delta_t": row.delta_t,
+            "count": 1,
+            "image_id": row.image_id,
+            "project_id": row.project_id,
+        })
+
+    results = []
+    for asset in assets:
+        points = series.get(asset.id, [])
+        if bucket != "none":
+            points = _aggregate(points, bucket)
+        results.append({
+            "asset_id": asset.id,
+            "name": asset.name,
+            "points": points,
+            "summary": trend_summary(points),
+        })
+    return results
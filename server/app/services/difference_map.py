@@ -0,0 +1,157 @@
+# server/app/services/difference_map.py
+import io
+from typing import Any, Dict, Optional
+
+import numpy as np
+from PIL import Image
+
+from app.services.labeling import component_stats, label_components
+from app.services.registration import get_registration, registration_transform, resample_to_grid
+
+# Diverging blue-white-red anchors (ColorBrewer RdBu), cold to hot
+_DIVERGING_ANCHORS = np.array([
+    [33, 102, 172],
+    [146, 197, 222],
+    [247, 247, 247],
+    [244, 165, 130],
+    [178, 24, 43],
+], dtype=np.float64)
+
+def _diverging_lut(size: int = 256) -> np.ndarray:
+    positions = np.linspace(0.0, 1.0, len(_DIVERGING_ANCHORS))
+    t = np.linspace(0.0, 1.0, size)
+    return np.stack(
+        [np.interp(t, positions, _DIVERGING_ANCHORS[:, ch]) for ch in range(3)], axis=1
+    ).astype(np.uint8)
+
+
+DIVERGING_LUT = _diverging_lut()
+
+
+def difference_statistics(delta: np.ndarray, threshold: float) -> Dict[str, Any]:
+    """Summary of a ΔT matrix (NaN where either image has no data)"""
+    valid = delta[~np.isnan(delta)].astype(np.float64)
+    if valid.size == 0:
+        return {"count": 0, "mean": None, "std": None, "min": None, "max": None,
+                "mean_abs": None, "p5": None, "p95": None,
+                "increased_fraction": 0.0, "decreased_fraction": 0.0}
+    p5, p95 = np.percentile(valid, [5, 95])
+    return {
+        "count": int(valid.size),
+        "mean": float(valid.mean()),
+        "std": float(valid.std()),
+        "min": float(valid.min()),
+        "max": float(valid.max()),
+        "mean_abs": float(np.abs(valid).mean()),
+        "p5": float(p5),
+        "p95": float(p95),
+        "increased_fraction": float(np.count_nonzero(valid >= threshold) / valid.size),
+        "decreased_fraction": float(np.count_nonzero(valid <= -threshold) / valid.size),
+    }
+
+
+def changed_regions(
+    delta: np.ndarray,
+    threshold: float,
+    min_area: int = 4,
+    top_k: int = 10,
+    step: int = 1
+) -> list:
+    """
+    Connected areas where |ΔT| >= threshold, split into warmer and colder
+    areas, ranked by area x mean |ΔT|. Boxes are in image A pixels.
+    """
+    regions = []
+    with np.errstate(invalid="ignore"):
+        masks = {"warmer": delta >= threshold, "colder": delta <= -threshold}
+    for direction, mask in masks.items():
+        labels, n = label_components(mask)
+        for comp in component_stats(labels, n, delta):
+            if comp["area"] < min_area or comp["mean"] is None:
+                continue
+            regions.append({
+                "direction": direction,
+                "area": comp["area"] * step * step,
+                "mean_delta": comp["mean"],
+                "max_delta": comp["max"] if direction == "warmer" else comp["min"],
+                "x": comp["col_min"] * step,
+                "y": comp["row_min"] * step,
+                "width": (comp["col_max"] - comp["col_min"] + 1) * step,
+                "height": (comp["row_max"] - comp["row_min"] + 1) * step,
+                "centroid": {"x": comp["centroid_col"] * step, "y": comp["centroid_row"] * step},
+                "score": comp["area"] * abs(comp["mean"]),
+            })
+    regions.sort(key=lambda r: r["score"], reverse=True)
+    return regions[:top_k]
+
+
+def render_difference_png(delta: np.ndarray, limit: Optional[float] = None) -> bytes:
+    """
+    ΔT rendered with a diverging palette symmetric around zero; `limit`
+    (°C) saturates the colours, default is the 99th percentile of |ΔT|.
+    Pixels without data are transparent.
+    """
+    nan = np.isnan(delta)
+    if limit is None:
+        valid = np.abs(delta[~nan])
+        limit = float(np.percentile(valid, 99)) if valid.size else 1.0
+    limit = max(limit, 1e-6)
+
+    with np.errstate(invalid="ignore"):
+        t = np.clip((delta / limit + 1.0) / 2.0, 0.0, 1.0)
+    index = np.where(nan, 0, np.rint(t * (len(DIVERGING_LUT) - 1))).astype(np.intp)
+    rgba = np.empty(delta.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = DIVERGING_LUT[index]
+    rgba[..., 3] = np.where(nan, 0, 255)
+
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, "RGBA").save(buffer, format="PNG", optimize=False)
+    return buffer.getvalue()
+
+
+def get_difference_matrix(matrix_a, matrix_b, align: str = "none") -> np.ndarray:
+    """
+    ΔT = B - A on A's grid, cached with matrix A per partner matrix.
+    `align` registers B onto A first ("translation" or "similarity").
+    """
+    def build() -> np.ndarray:
+        transform = None
+        if align != "none":
+            registration = get_registration(matrix_a, matrix_b, with_rotation=(align == "similarity"))
+            transform = registration_transform(matrix_a, matrix_b, registration)
+        resampled = resample_to_grid(matrix_b.data, matrix_a.shape, transform)
+        return resampled - np.asarray(matrix_a.data, dtype=np.float32)
+    return matrix_a.derived(("difference", matrix_b.token, align), build)
+
+
+def get_difference(
+    matrix_a,
+    matrix_b,
+    threshold: float = 2.0,
+    min_area: int = 4,
+    top_k: int = 10,
+    align: str = "none"
+) -> Dict[str, Any]:
+    """Statistics and top changed regions of an image pair, cached per parameters"""
+    def build() -> Dict[str, Any]:
+        delta = get_difference_matrix(matrix_a, matrix_b, align)
+        return {
+            "shape": list(delta.shape),
+            "step": matrix_a.step,
+            "resampled": tuple(matrix_a.shape) != tuple(matrix_b.shape) or align != "none",
+            "registration": (
+                get_registration(matrix_a, matrix_b, with_rotation=(align == "similarity"))
+                if align != "none" else None
+            ),
+            "stats": difference_statistics(delta, threshold),
+            "regions": changed_regions(delta, threshold, min_area, top_k, matrix_a.step),
+        }
+    return matrix_a.derived(("difference_summary", matrix_b.token, threshold, min_area, top_k, align), build)
+
+
+def get_difference_png(matrix_a, matrix_b, limit: Optional[float] = None, align: str = "none") -> bytes:
+    """Rendered ΔT map of an image pair, cached per colour limit"""
+    return matrix_a.derived(
+        ("difference_png", matrix_b.token, limit, align),
+        lambda: render_difference_png(get_difference_matrix(matrix_a, matrix_b, align), limit)
+    )
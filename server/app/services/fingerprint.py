@@ -0,0 +1,141 @@
+# server/app/services/fingerprint.py
+import hashlib
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models.image import ThermalImage
+from app.services.fusion import open_visual_image
+from app.services.temperature_matrix import get_image_matrix
+
+# DCT hash: field reduced to 32 x 32, the 8 x 8 lowest frequencies compared
+# with their median (DC excluded) give 64 bits
+_HASH_SIZE = 32
+_LOW_FREQUENCIES = 8
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II basis as an n x n matrix"""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    basis = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    basis[0] /= np.sqrt(2.0)
+    return basis
+
+
+_DCT = _dct_matrix(_HASH_SIZE)
+
+
+def dct_hash(values: np.ndarray) -> str:
+    """
+    64-bit perceptual hash of a 2-D field as 16 hex digits. The field is
+    z-normalised (NaN filled with the mean), area-resampled to 32 x 32 and
+    its low-frequency DCT coefficients thresholded at their median, so
+    offsets, contrast and resolution changes leave the hash unchanged.
+    """
+    field = np.asarray(values, dtype=np.float32)
+    valid = ~np.isnan(field)
+    if not valid.any():
+        return "0" * 16
+    mean = float(field[valid].mean())
+    std = float(field[valid].std()) or 1.0
+    field = np.where(valid, (field - mean) / std, 0.0).astype(np.float32)
+
+    small = np.asarray(Image.fromarray(field).resize((_HASH_SIZE, _HASH_SIZE), Image.BOX), dtype=np.float64)
+    coefficients = (_DCT @ small @ _DCT.T)[:_LOW_FREQUENCIES, :_LOW_FREQUENCIES].ravel()
+    # Tolerance keeps (numerically) zero coefficients of smooth fields stable
+    tolerance = 1e-6 * float(np.abs(coefficients[1:]).max())
+    bits = coefficients > np.median(coefficients[1:]) + tolerance
+    bits[0] = False
+    return f"{int(np.packbits(bits).view('>u8')[0]):016x}"
+
+
+def photo_hash(photo: Image.Image) -> str:
+    """DCT hash of a photo's luminance (reduced first, only 32 x 32 is needed)"""
+    gray = photo.convert("L")
+    gray.thumbnail((4 * _HASH_SIZE, 4 * _HASH_SIZE))
+    return dct_hash(np.asarray(gray, dtype=np.float32))
+
+
+def compute_image_fingerprint(image) -> bool:
+    """
+    Fill the hash columns of an image from its temperature matrix and
+    visual photo (the caller commits). Returns False without temperature data.
+    """
+    try:
+        matrix = get_image_matrix(image)
+    except (FileNotFoundError, ValueError):
+        return False
+    image.thermal_hash = dct_hash(matrix.data)
+    try:
+        with open_visual_image(image) as photo:
+            image.visual_hash = photo_hash(photo)
+    except (OSError, ValueError) as e:
+        print(f"[FINGERPRINT] No visual hash for image {image.id}: {e}")
+        image.visual_hash = None
+    return True
+
+
+def file_sha256(stream: BinaryIO, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a binary stream, read in chunks from its current position"""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hamming_distances(query: str, hashes: Sequence[Optional[str]]) -> np.ndarray:
+    """Bit distance between one hex hash and many (missing hashes give 65)"""
+    present = np.array([h is not None for h in hashes], dtype=bool)
+    values = np.array([int(h, 16) if h else 0 for h in hashes], dtype=np.uint64)
+    distances = np.bitwise_count(values ^ np.uint64(int(query, 16))).astype(np.int64)
+    return np.where(present, distances, 65)
+
+
+def find_near_duplicates(
+    candidates: Sequence[Any],
+    thermal_hash: Optional[str],
+    visual_hash: Optional[str] = None,
+    max_distance: Optional[int] = None,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    Rank images (rows with id / project_id / name / thermal_hash /
+    visual_hash) by fingerprint distance, closest first. An image matches
+    when its temperature-field hash is within `max_distance` bits; the
+    visual hash distance is reported and breaks ties.
+    """
+    max_distance = settings.FINGERPRINT_MAX_DISTANCE if max_distance is None else max_distance
+    if not candidates or not thermal_hash:
+        return []
+    thermal = hamming_distances(thermal_hash, [c.thermal_hash for c in candidates])
+    visual = (
+        hamming_distances(visual_hash, [c.visual_hash for c in candidates])
+        if visual_hash else np.full(len(candidates), 65)
+    )
+    matches = np.flatnonzero(thermal <= max_distance)
+    order = matches[np.lexsort((visual[matches], thermal[matches]))][:limit]
+    return [
+        {
+            "image_id": str(candidates[i].id),
+            "project_id": str(candidates[i].project_id),
+            "name": candidates[i].name,
+            "thermal_distance": int(thermal[i]),
+            "visual_distance": int(visual[i]) if visual[i] <= 64 else None,
+        }
+        for i in order
+    ]
+
+
+def fingerprint_candidates(db: Session, exclude_id=None) -> list:
+    """Hash columns of every fingerprinted image (rows, not full models)"""
+    query = select(
+        ThermalImage.id, ThermalImage.project_id, ThermalImage.name,
+        ThermalImage.thermal_hash, ThermalImage.visual_hash
+    ).where(ThermalImage.thermal_hash.is_not(None))
+    if exclude_id is not None:
+        query = query.where(ThermalImage.id != exclude_id)
+    return db.exec(query).all()
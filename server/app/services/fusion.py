@@ -0,0 +1,183 @@
+# server/app/services/fusion.py
+import base64
+import io
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.services.line_profile import bilinear_sample
+from app.services.temperature_matrix import REPO_ROOT, resolve_data_path
+from app.services.thermal_render import colorize, encode_png, resolve_range
+
+# The T880 maps are defined on the 160 x 120 detector grid: entry [r, c]
+# holds the thermal-frame (x, y) seen by visual-frame cell (c, r), both
+# frames normalised to that grid
+PARALLAX_MAP_FILES = ("t880_x.txt", "t880_y.txt")
+PARALLAX_GRID_SHAPE = (120, 160)
+
+FUSION_MODES = ("blend", "pip", "edges")
+
+
+def _parallax_map_dirs() -> List[Path]:
+    """Candidate directories for the parallax maps, in order of preference"""
+    dirs = []
+    if settings.PARALLAX_MAP_DIR:
+        dirs.append(Path(settings.PARALLAX_MAP_DIR))
+    dirs.append(Path(settings.CSHARP_EXTRACTOR_PATH).parent)
+    dirs.append(REPO_ROOT / "BmtExtract" / "BmtExteract" / "bin" / "Debug")
+    return dirs
+
+
+def read_parallax_map(path: Path) -> np.ndarray:
+    """One map file: a row of ';'-separated floats per grid row"""
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [line.strip().strip(";") for line in f if line.strip()]
+    return np.array([np.array(row.split(";"), dtype=np.float32) for row in rows], dtype=np.float32)
+
+
+@lru_cache(maxsize=1)
+def load_parallax_maps() -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The extractor's parallax maps as float32 arrays, read once per process.
+    Raises FileNotFoundError when no directory holds both files.
+    """
+    for directory in _parallax_map_dirs():
+        paths = [directory / name for name in PARALLAX_MAP_FILES]
+        if all(p.exists() for p in paths):
+            map_x, map_y = (read_parallax_map(p) for p in paths)
+            if map_x.shape != map_y.shape:
+                raise ValueError(f"Parallax maps in {directory} differ in shape")
+            print(f"[FUSION] Loaded parallax maps {map_x.shape} from {directory}")
+            return map_x, map_y
+    raise FileNotFoundError("Parallax maps (t880_x.txt / t880_y.txt) not found")
+
+
+@lru_cache(maxsize=16)
+def remap_grid(visual_shape: Tuple[int, int], thermal_shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Thermal matrix (x, y) positions for every pixel of a visual image of
+    `visual_shape`, i.e. the grids for warping a thermal matrix onto it.
+    The maps are bilinearly interpolated at each visual pixel centre.
+    """
+    map_x, map_y = load_parallax_maps()
+    grid_rows, grid_cols = map_x.shape
+    rows, cols = visual_shape
+    gx = np.clip((np.arange(cols) + 0.5) * grid_cols / cols - 0.5, 0, grid_cols - 1)
+    gy = np.clip((np.arange(rows) + 0.5) * grid_rows / rows - 0.5, 0, grid_rows - 1)
+    xs = np.broadcast_to(gx[None, :], visual_shape).ravel()
+    ys = np.broadcast_to(gy[:, None], visual_shape).ravel()
+
+    frame_x = bilinear_sample(map_x, xs, ys)
+    frame_y = bilinear_sample(map_y, xs, ys)
+    # Thermal frame (grid units) -> thermal matrix coordinates
+    thermal_rows, thermal_cols = thermal_shape
+    tx = ((frame_x + 0.5) * thermal_cols / grid_cols - 0.5).reshape(visual_shape).astype(np.float32)
+    ty = ((frame_y + 0.5) * thermal_rows / grid_rows - 0.5).reshape(visual_shape).astype(np.float32)
+    tx.flags.writeable = False
+    ty.flags.writeable = False
+    return tx, ty
+
+
+def open_visual_image(image) -> Image.Image:
+    """
+    Visual (real) photo of a thermal image, opened lazily (only the header
+    is read until pixels are accessed). Raises FileNotFoundError without one.
+    """
+    source = image.real_image_path
+    if source and source.startswith("data:"):
+        return Image.open(io.BytesIO(base64.b64decode(source.split(",", 1)[1])))
+    path = resolve_data_path(source)
+    if not path or not path.exists():
+        raise FileNotFoundError(f"Visual image not found for image {image.id}")
+    return Image.open(path)
+
+
+def load_visual_image(image, max_width: int = 1024) -> np.ndarray:
+    """Visual photo as an RGB uint8 array, reduced to at most `max_width` pixels wide"""
+    photo = open_visual_image(image).convert("RGB")
+    if photo.width > max_width:
+        photo = photo.resize((max_width, round(photo.height * max_width / photo.width)), Image.BILINEAR)
+    return np.asarray(photo)
+
+
+def edge_strength(rgb: np.ndarray) -> np.ndarray:
+    """Sobel gradient magnitude of the luminance, normalised to 0..1 (p99 = 1)"""
+    gray = rgb.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    padded = np.pad(gray, 1, mode="edge")
+    gx = (padded[:-2, 2:] + 2 * padded[1:-1, 2:] + padded[2:, 2:]
+          - padded[:-2, :-2] - 2 * padded[1:-1, :-2] - padded[2:, :-2])
+    gy = (padded[2:, :-2] + 2 * padded[2:, 1:-1] + padded[2:, 2:]
+          - padded[:-2, :-2] - 2 * padded[:-2, 1:-1] - padded[:-2, 2:])
+    magnitude = np.hypot(gx, gy)
+    scale = np.percentile(magnitude, 99)
+    return np.clip(magnitude / scale, 0.0, 1.0) if scale > 0 else np.zeros_like(magnitude)
+
+
+def fuse(
+    visual: np.ndarray,
+    thermal: np.ndarray,
+    mode: str = "blend",
+    alpha: float = 0.5,
+    pip_scale: float = 0.5
+) -> np.ndarray:
+    """
+    Combine a visual RGB image with a thermal RGBA rendering on the same
+    grid. "blend": alpha blend; "pip": thermal inside a centred window of
+    `pip_scale` of the frame; "edges": thermal with the visual edges drawn
+    on top (alpha sets the edge strength). Where the thermal image has no
+    data the visual image shows through.
+    """
+    visual_f = visual.astype(np.float32)
+    thermal_f = thermal[..., :3].astype(np.float32)
+    covered = (thermal[..., 3] > 0)[..., None]
+
+    if mode == "blend":
+        out = np.where(covered, visual_f * (1.0 - alpha) + thermal_f * alpha, visual_f)
+    elif mode == "pip":
+        rows, cols = covered.shape[:2]
+        h, w = round(rows * pip_scale), round(cols * pip_scale)
+        top, left = (rows - h) // 2, (cols - w) // 2
+        window = np.zeros_like(covered)
+        window[top:top + h, left:left + w] = True
+        out = np.where(covered & window, thermal_f, visual_f)
+        # Frame around the window
+        out[top:top + h, [left, min(left + w, cols) - 1]] = 255.0
+        out[[top, min(top + h, rows) - 1], left:left + w] = 255.0
+    elif mode == "edges":
+        edges = edge_strength(visual)[..., None] * alpha
+        base = np.where(covered, thermal_f, visual_f.mean(axis=2, keepdims=True))
+        out = base * (1.0 - edges) + 255.0 * edges
+    else:
+        raise ValueError(f"Unknown fusion mode: {mode}")
+    return np.clip(np.rint(out), 0, 255).astype(np.uint8)
+
+
+def get_fusion_png(
+    matrix,
+    image,
+    stats: Dict[str, Any],
+    mode: str = "blend",
+    palette: str = "iron",
+    alpha: float = 0.5,
+    pip_scale: float = 0.5,
+    max_width: int = 1024
+) -> bytes:
+    """
+    Thermal image warped onto the visual photo through the parallax maps
+    (bilinear on temperatures, then coloured with 1-99% percentile
+    clipping) and fused; cached per image and fusion parameters.
+    """
+    key = ("fusion", mode, palette, round(alpha, 3), round(pip_scale, 3), max_width)
+
+    def build() -> bytes:
+        visual = load_visual_image(image, max_width)
+        xs, ys = remap_grid(visual.shape[:2], matrix.shape)
+        temps = bilinear_sample(matrix.data, xs.ravel(), ys.ravel()).reshape(visual.shape[:2])
+        lo, hi = resolve_range(stats, "percentile")
+        thermal = colorize(temps, palette, lo, hi)
+        return encode_png(fuse(visual, thermal, mode, alpha, pip_scale))
+    return matrix.derived(key, build)
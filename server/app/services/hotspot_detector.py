@@ -0,0 +1,92 @@
+# server/app/services/hotspot_detector.py
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.services.summed_area import SummedAreaTable
+
+
+def maximum_filter(values: np.ndarray, radius: int) -> np.ndarray:
+    """
+    Separable (2r+1)x(2r+1) moving maximum, edges padded with -inf.
+    Vectorized with strided window views (no per-pixel Python loop).
+    """
+    if radius <= 0:
+        return values.copy()
+    size = 2 * radius + 1
+    padded = np.pad(values, ((0, 0), (radius, radius)), constant_values=-np.inf)
+    rows_max = sliding_window_view(padded, size, axis=1).max(axis=-1)
+    padded = np.pad(rows_max, ((radius, radius), (0, 0)), constant_values=-np.inf)
+    return sliding_window_view(padded, size, axis=0).max(axis=-1)
+
+
+def _local_background(table: SummedAreaTable, rows_idx: np.ndarray, cols_idx: np.ndarray, radius: int) -> np.ndarray:
+    """Mean temperature of the (2r+1)² window around each candidate"""
+    stats = table.query(cols_idx - radius, rows_idx - radius, cols_idx + radius, rows_idx + radius)
+    return stats["mean"]
+
+
+def detect_extrema(
+    data: np.ndarray,
+    kind: str = "hotspot",
+    top_k: int = 5,
+    min_separation: int = 5,
+    min_delta: float = 1.0,
+    background_radius: int = 15,
+    mask: Optional[np.ndarray] = None,
+    summed_area: Optional[SummedAreaTable] = None
+) -> List[Dict[str, Any]]:
+    """
+    Top-K local maxima (kind="hotspot") or minima (kind="coldspot").
+
+    Candidates are pixels equal to the moving max/min over a window of
+    `min_separation` radius, at least `min_delta` above (or below) the mean
+    of their `background_radius` neighbourhood. Non-maximum suppression then
+    keeps the strongest candidates at least `min_separation` pixels apart.
+    `mask` (bool, same shape) restricts detection to a region.
+    Positions are (row, col) matrix indices.
+    """
+    sign = 1.0 if kind == "hotspot" else -1.0
+    values = np.asarray(data, dtype=np.float64) * sign
+    values = np.where(np.isnan(values), -np.inf, values)
+    if mask is not None:
+        values = np.where(mask, values, -np.inf)
+
+    peaks = (values == maximum_filter(values, min_separation)) & np.isfinite(values)
+    rows_idx, cols_idx = np.nonzero(peaks)
+    if rows_idx.size == 0:
+        return []
+
+    table = summed_area if summed_area is not None else SummedAreaTable(data)
+    background = _local_background(table, rows_idx, cols_idx, background_radius) * sign
+    peak_values = values[rows_idx, cols_idx]
+    delta = peak_values - background
+
+    keep = delta >= min_delta
+    rows_idx, cols_idx = rows_idx[keep], cols_idx[keep]
+    peak_values, background, delta = peak_values[keep], background[keep], delta[keep]
+
+    order = np.argsort(-peak_values, kind="stable")
+    min_dist_sq = float(min_separation) ** 2
+    accepted: List[int] = []
+    for i in order:
+        if accepted:
+            dy = rows_idx[accepted] - rows_idx[i]
+            dx = cols_idx[accepted] - cols_idx[i]
+            if np.any(dy * dy + dx * dx < min_dist_sq):
+                continue
+        accepted.append(int(i))
+        if len(accepted) >= top_k:
+            break
+
+    return [
+        {
+            "row": int(rows_idx[i]),
+            "col": int(cols_idx[i]),
+            "temperature": float(peak_values[i] * sign),
+            "background": float(background[i] * sign),
+            "delta_t": float(delta[i]),
+        }
+        for i in accepted
+    ]
@@ -0,0 +1,153 @@
+# server/app/services/isotherm.py
+import base64
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Marching-squares edges of a cell as (row, col) offsets of the edge midpoint
+_EDGE_OFFSETS = {
+    "T": (0.0, 0.5),
+    "R": (0.5, 1.0),
+    "B": (1.0, 0.5),
+    "L": (0.5, 0.0),
+}
+
+# Case = tl*8 + tr*4 + br*2 + bl -> segments between cell edges
+# (saddles 5 and 10 are resolved as two separate corners)
+_CASE_SEGMENTS = {
+    1: [("L", "B")], 2: [("B", "R")], 3: [("L", "R")], 4: [("T", "R")],
+    5: [("L", "T"), ("B", "R")], 6: [("T", "B")], 7: [("L", "T")], 8: [("L", "T")],
+    9: [("T", "B")], 10: [("L", "B"), ("T", "R")], 11: [("T", "R")], 12: [("L", "R")],
+    13: [("B", "R")], 14: [("L", "B")],
+}
+
+
+def isotherm_mask(data: np.ndarray, min_temp: float, max_temp: float) -> np.ndarray:
+    """Pixels whose temperature lies within [min_temp, max_temp] (NaN excluded)"""
+    with np.errstate(invalid="ignore"):
+        return (data >= min_temp) & (data <= max_temp)
+
+
+def encode_rle(mask: np.ndarray) -> List[int]:
+    """
+    Run-length encode a mask in row-major order as [start, length, ...]
+    pairs of the True runs.
+    """
+    flat = np.concatenate([[0], mask.ravel().view(np.uint8), [0]]).astype(np.int8)
+    edges = np.flatnonzero(np.diff(flat))
+    starts, ends = edges[0::2], edges[1::2]
+    return np.column_stack([starts, ends - starts]).ravel().tolist()
+
+
+def encode_bitpacked(mask: np.ndarray) -> str:
+    """Row-major mask packed 8 pixels per byte (MSB first), base64 encoded"""
+    return base64.b64encode(np.packbits(mask.ravel()).tobytes()).decode("ascii")
+
+
+def trace_contours(mask: np.ndarray, min_points: int = 4) -> List[np.ndarray]:
+    """
+    Closed boundary polylines of a mask via marching squares.
+
+    Cell cases are classified in one vectorized pass; segments are then
+    chained into polylines. Returned arrays are (N, 2) as (row, col) in
+    pixel-edge coordinates, i.e. pixel (r, c) spans [r, r+1) x [c, c+1).
+    """
+    padded = np.pad(mask, 1, constant_values=False).astype(np.uint8)
+    cases = (
+        padded[:-1, :-1] * 8 + padded[:-1, 1:] * 4 +
+        padded[1:, 1:] * 2 + padded[1:, :-1]
+    )
+
+    starts, ends = [], []
+    for case, segments in _CASE_SEGMENTS.items():
+        rows, cols = np.nonzero(cases == case)
+        if rows.size == 0:
+            continue
+        cell = np.column_stack([rows, cols]).astype(np.float64)
+        for a, b in segments:
+            starts.append(cell + _EDGE_OFFSETS[a])
+            ends.append(cell + _EDGE_OFFSETS[b])
+    if not starts:
+        return []
+
+    # Integer keys (doubled coordinates) for exact endpoint matching
+    seg_a = np.rint(np.concatenate(starts) * 2).astype(np.int64)
+    seg_b = np.rint(np.concatenate(ends) * 2).astype(np.int64)
+    n_segments = seg_a.shape[0]
+
+    neighbours: Dict[tuple, List[int]] = {}
+    for i in range(n_segments):
+        neighbours.setdefault((seg_a[i, 0], seg_a[i, 1]), []).append(i)
+        neighbours.setdefault((seg_b[i, 0], seg_b[i, 1]), []).append(i)
+
+    used = np.zeros(n_segments, dtype=bool)
+    contours = []
+    for first in range(n_segments):
+        if used[first]:
+            continue
+        used[first] = True
+        path = [tuple(seg_a[first]), tuple(seg_b[first])]
+        while True:
+            nxt = next((s for s in neighbours[path[-1]] if not used[s]), None)
+            if nxt is None:
+                break
+            used[nxt] = True
+            a, b = tuple(seg_a[nxt]), tuple(seg_b[nxt])
+            path.append(b if a == path[-1] else a)
+        if len(path) >= min_points:
+            # Undo the doubling and the padding, shift centers to pixel edges
+            contours.append(np.array(path, dtype=np.float64) / 2.0 - 0.5)
+    return contours
+
+
+def compute_isotherm(
+    data: np.ndarray,
+    min_temp: float,
+    max_temp: float,
+    encoding: str = "rle",
+    with_contours: bool = False,
+    step: int = 1
+) -> Dict[str, Any]:
+    """
+    Isotherm band of a temperature matrix: encoded mask, coverage and
+    optional contour polylines (in image pixel coordinates).
+    """
+    mask = isotherm_mask(data, min_temp, max_temp)
+    valid = int(np.count_nonzero(~np.isnan(data)))
+    pixel_count = int(np.count_nonzero(mask))
+
+    result: Dict[str, Any] = {
+        "min_temp": min_temp,
+        "max_temp": max_temp,
+        "pixel_count": pixel_count * step * step,
+        "coverage": pixel_count / valid if valid else 0.0,
+        "mask": {
+            "encoding": encoding,
+            "shape": list(mask.shape),
+            "step": step,
+            "data": encode_rle(mask) if encoding == "rle" else encode_bitpacked(mask),
+        },
+        "contours": None,
+    }
+
+    if with_contours:
+        result["contours"] = [
+            [{"x": round(float(c) * step, 2), "y": round(float(r) * step, 2)} for r, c in contour]
+            for contour in trace_contours(mask)
+        ]
+    return result
+
+
+def get_isotherm(
+    matrix,
+    min_temp: float,
+    max_temp: float,
+    encoding: str = "rle",
+    with_contours: bool = False
+) -> Dict[str, Any]:
+    """Isotherm of a TemperatureMatrix, memoized per band and output options"""
+    key = ("isotherm", float(min_temp), float(max_temp), encoding, with_contours)
+    return matrix.derived(
+        key,
+        lambda: compute_isotherm(matrix.data, min_temp, max_temp, encoding, with_contours, matrix.step)
+    )
@@ -0,0 +1,124 @@
+# server/app/services/labeling.py
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+
+def _row_runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Horizontal runs of True pixels as (row, start col, end col exclusive)"""
+    rows, cols = mask.shape
+    padded = np.zeros((rows, cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    start_rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return start_rows, starts, ends
+
+
+def label_components(mask: np.ndarray, connectivity: int = 8) -> Tuple[np.ndarray, int]:
+    """
+    Connected-component labelling of a boolean mask without scipy.
+
+    Pixels are grouped into horizontal runs; runs of adjacent rows that
+    touch (diagonally too for 8-connectivity) are linked with a vectorized
+    overlap search, and the run graph is collapsed by min-label hooking
+    with pointer jumping. Returns an int32 label image (0 = background,
+    components numbered 1..n in row-major order of first pixel) and n.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    labels = np.zeros(mask.shape, dtype=np.int32)
+    run_rows, starts, ends = _row_runs(mask)
+    n_runs = run_rows.size
+    if n_runs == 0:
+        return labels, 0
+
+    reach = 1 if connectivity == 8 else 0
+    row_first = np.searchsorted(run_rows, np.arange(mask.shape[0] + 1))
+
+    # Edges between runs of consecutive rows that touch
+    edge_a, edge_b = [], []
+    for r in range(1, mask.shape[0]):
+        cur = slice(row_first[r], row_first[r + 1])
+        prev = slice(row_first[r - 1], row_first[r])
+        if cur.start == cur.stop or prev.start == prev.stop:
+            continue
+        prev_starts, prev_ends = starts[prev], ends[prev]
+        lo = np.searchsorted(prev_ends, starts[cur] - reach, side="right")
+        hi = np.searchsorted(prev_starts, ends[cur] + reach, side="left")
+        counts = np.maximum(hi - lo, 0)
+        if not counts.any():
+            continue
+        run_ids = np.repeat(np.arange(cur.start, cur.stop), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        edge_a.append(run_ids)
+        edge_b.append(prev.start + np.repeat(lo, counts) + offsets)
+
+    parent = np.arange(n_runs)
+    if edge_a:
+        a = np.concatenate(edge_a)
+        b = np.concatenate(edge_b)
+        while True:
+            previous = parent.copy()
+            low = np.minimum(parent[a], parent[b])
+            np.minimum.at(parent, parent[a], low)
+            np.minimum.at(parent, parent[b], low)
+            parent = parent[parent]
+            parent = parent[parent]
+            if np.array_equal(parent, previous):
+                break
+
+    _, run_labels = np.unique(parent, return_inverse=True)
+    run_labels = run_labels.ravel().astype(np.int32) + 1
+
+    lengths = ends - starts
+    flat_starts = run_rows * mask.shape[1] + starts
+    pixel_index = np.repeat(flat_starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    labels.ravel()[pixel_index] = np.repeat(run_labels, lengths)
+    return labels, int(run_labels.max())
+
+
+def component_stats(labels: np.ndarray, n: int, values: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    Area, bounding box, centroid and mean/min/max of `values` for each
+    labelled component (NaN values are ignored for the statistics).
+    """
+    if n == 0:
+        return []
+    flat_labels = labels.ravel()
+    inside = flat_labels > 0
+    ids = flat_labels[inside]
+    rows_idx, cols_idx = np.divmod(np.flatnonzero(inside), labels.shape[1])
+    vals = np.asarray(values, dtype=np.float64).ravel()[inside]
+    valid = ~np.isnan(vals)
+
+    size = n + 1
+    area = np.bincount(ids, minlength=size)
+    valid_count = np.bincount(ids[valid], minlength=size)
+    sums = np.bincount(ids[valid], weights=vals[valid], minlength=size)
+    row_sum = np.bincount(ids, weights=rows_idx, minlength=size)
+    col_sum = np.bincount(ids, weights=cols_idx, minlength=size)
+
+    row_min = np.full(size, labels.shape[0]); np.minimum.at(row_min, ids, rows_idx)
+    row_max = np.full(size, -1); np.maximum.at(row_max, ids, rows_idx)
+    col_min = np.full(size, labels.shape[1]); np.minimum.at(col_min, ids, cols_idx)
+    col_max = np.full(size, -1); np.maximum.at(col_max, ids, cols_idx)
+    v_min = np.full(size, np.inf); np.minimum.at(v_min, ids[valid], vals[valid])
+    v_max = np.full(size, -np.inf); np.maximum.at(v_max, ids[valid], vals[valid])
+
+    results = []
+    for label in range(1, size):
+        has_values = valid_count[label] > 0
+        results.append({
+            "label": label,
+            "area": int(area[label]),
+            "row_min": int(row_min[label]),
+            "row_max": int(row_max[label]),
+            "col_min": int(col_min[label]),
+            "col_max": int(col_max[label]),
+            "centroid_row": float(row_sum[label] / area[label]),
+            "centroid_col": float(col_sum[label] / area[label]),
+            "mean": float(sums[label] / valid_count[label]) if has_values else None,
+            "min": float(v_min[label]) if has_values else None,
+            "max": float(v_max[label]) if has_values else None,
+        })
+    return results
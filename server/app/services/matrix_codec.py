@@ -0,0 +1,172 @@
+# server/app/services/matrix_codec.py
+import struct
+import zlib
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.services.units import get_unit_data
+
+try:  # zstd is optional; gzip/deflate are always available
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"TMAT"
+FORMAT_VERSION = 1
+# magic, version, dtype code, header size, rows, cols, step, nan sentinel, scale, offset
+HEADER_FORMAT = "<4sBBHIIHhff"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+ENCODINGS = {"int16": 1, "float16": 2, "float32": 3}
+INT16_NAN = -32768
+INT16_MAX_CODE = 32767
+
+
+def _int16_scale_offset(lo: float, hi: float, scale: float = 0.01) -> Tuple[float, float]:
+    """
+    Centi-degree quantization: offset centres the range on zero, the scale
+    doubles from 0.01 °C only when the range does not fit into int16.
+    """
+    offset = round((lo + hi) / 2.0, 2)
+    half_range = max(hi - offset, offset - lo)
+    while half_range / scale > INT16_MAX_CODE:
+        scale *= 2.0
+    return scale, offset
+
+
+def encode_matrix(data: np.ndarray, encoding: str = "int16", step: int = 1) -> bytes:
+    """
+    Serialize a temperature matrix as a small header followed by raw
+    row-major little-endian values.
+
+    Header (`HEADER_FORMAT`, 28 bytes): b"TMAT", format version, dtype code
+    (1=int16, 2=float16, 3=float32), header size, rows, cols, matrix step,
+    NaN sentinel, scale, offset. int16 values decode as
+    `code * scale + offset` with `code == sentinel` meaning NaN; float
+    encodings store temperatures directly (scale 1, offset 0, NaN as NaN).
+    Row r therefore starts at byte `header_size + r * cols * itemsize`.
+    """
+    values = np.asarray(data, dtype=np.float32)
+    rows, cols = values.shape
+    nan = np.isnan(values)
+    scale, offset, sentinel = 1.0, 0.0, 0
+
+    if encoding == "int16":
+        valid = values[~nan]
+        lo, hi = (float(valid.min()), float(valid.max())) if valid.size else (0.0, 0.0)
+        scale, offset = _int16_scale_offset(lo, hi)
+        sentinel = INT16_NAN
+        with np.errstate(invalid="ignore"):
+            codes = np.rint((values - offset) / scale)
+        payload = np.where(nan, INT16_NAN, np.clip(codes, -INT16_MAX_CODE, INT16_MAX_CODE)).astype("<i2")
+    elif encoding == "float16":
+        payload = values.astype("<f2")
+    elif encoding == "float32":
+        payload = values.astype("<f4")
+    else:
+        raise ValueError(f"Unknown matrix encoding: {encoding}")
+
+    header = struct.pack(
+        HEADER_FORMAT, MAGIC, FORMAT_VERSION, ENCODINGS[encoding], HEADER_SIZE,
+        rows, cols, step, sentinel, scale, offset
+    )
+    return header + payload.tobytes()
+
+
+def decode_matrix(blob: bytes) -> Tuple[np.ndarray, int]:
+    """Inverse of `encode_matrix`: (float32 matrix with NaN, step)"""
+    magic, _, code, header_size, rows, cols, step, sentinel, scale, offset = struct.unpack_from(HEADER_FORMAT, blob)
+    if magic != MAGIC:
+        raise ValueError("Not a temperature matrix blob")
+    dtype = {1: "<i2", 2: "<f2", 3: "<f4"}[code]
+    raw = np.frombuffer(blob, dtype=dtype, count=rows * cols, offset=header_size).reshape(rows, cols)
+    if code == 1:
+        values = raw.astype(np.float32) * np.float32(scale) + np.float32(offset)
+        values[raw == sentinel] = np.nan
+        return values, step
+    return raw.astype(np.float32), step
+
+
+def available_compressions() -> Tuple[str, ...]:
+    """Content-Encodings this server can produce, most compact first"""
+    return ("zstd", "gzip", "deflate") if zstandard is not None else ("gzip", "deflate")
+
+
+def negotiate_compression(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best Content-Encoding for an Accept-Encoding header (None = identity)"""
+    accepted: Dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    for name in available_compressions():
+        if accepted.get(name, accepted.get("*", 0.0)) > 0:
+            return name
+    return None
+
+
+def compress(payload: bytes, compression: Optional[str]) -> bytes:
+    """Apply a Content-Encoding to a payload"""
+    if compression is None:
+        return payload
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(payload)
+    if compression == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress(payload) + compressor.flush()
+    if compression == "deflate":
+        return zlib.compress(payload, 6)
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    First range of a `bytes=` Range header as inclusive (start, end).
+    Returns None when the range cannot be satisfied.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+    first = spec.split(",")[0].strip()
+    start_text, _, end_text = first.partition("-")
+    try:
+        if not start_text:
+            length = int(end_text)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header (list or `*`) against an ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+def get_encoded_matrix(matrix, encoding: str, compression: Optional[str] = None, unit: str = "C") -> bytes:
+    """Encoded (and optionally compressed) matrix in `unit`, cached with the matrix"""
+    if compression is None:
+        return matrix.derived(
+            ("encoded", encoding, unit),
+            lambda: encode_matrix(get_unit_data(matrix, unit), encoding, matrix.step)
+        )
+    return matrix.derived(
+        ("encoded", encoding, compression, unit),
+        lambda: compress(get_encoded_matrix(matrix, encoding, unit=unit), compression)
+    )
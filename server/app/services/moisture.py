@@ -0,0 +1,140 @@
+# server/app/services/moisture.py
+import io
+from typing import Any, Dict, Optional
+
+import numpy as np
+from PIL import Image
+
+# Magnus coefficients over water (Sonntag 1990), valid -45..60 °C
+MAGNUS_B = 17.62
+MAGNUS_C = 243.12  # °C
+MAGNUS_P0 = 611.2  # Pa
+
+# Surface relative humidity from which mould growth is expected (DIN 4108-2)
+MOULD_SURFACE_RH = 0.80
+
+CONDENSATION_COLOR = (0, 90, 255, 200)
+MOULD_COLOR = (255, 140, 0, 160)
+
+
+def saturation_pressure(temp_c):
+    """Saturation vapour pressure (Pa) by the Magnus formula"""
+    temp_c = np.asarray(temp_c, dtype=np.float64)
+    return MAGNUS_P0 * np.exp(MAGNUS_B * temp_c / (MAGNUS_C + temp_c))
+
+
+def dew_point(air_temp: float, relative_humidity: float) -> float:
+    """Dew point (°C) of air at `air_temp` °C and relative humidity 0..1"""
+    gamma = np.log(relative_humidity) + MAGNUS_B * air_temp / (MAGNUS_C + air_temp)
+    return float(MAGNUS_C * gamma / (MAGNUS_B - gamma))
+
+
+def critical_temperature(air_temp: float, relative_humidity: float, surface_rh: float) -> float:
+    """Surface temperature at which the surface relative humidity reaches `surface_rh`"""
+    return dew_point(air_temp, relative_humidity / surface_rh)
+
+
+def normalize_humidity(value: float) -> float:
+    """Accept relative humidity as a fraction (0.55) or a percentage (55)"""
+    value = float(value)
+    return value / 100.0 if value > 1.0 else value
+
+
+def compute_moisture_risk(
+    data: np.ndarray,
+    air_temp: float,
+    relative_humidity: float,
+    outside_temp: Optional[float] = None,
+    safety_margin: float = 0.0,
+    mould_surface_rh: float = MOULD_SURFACE_RH,
+    step: int = 1
+) -> Dict[str, Any]:
+    """
+    Condensation and mould risk of a surface temperature matrix.
+
+    Condensation: surface temperature at or below the dew point (plus
+    `safety_margin`). Mould: surface relative humidity, i.e. vapour pressure
+    of the room air over saturation pressure at the surface, at or above
+    `mould_surface_rh`. Returns scalar thresholds, masks and statistics;
+    with `outside_temp` the critical temperature factors f_crit are added.
+    """
+    temps = np.asarray(data, dtype=np.float64)
+    valid = ~np.isnan(temps)
+    n_valid = int(np.count_nonzero(valid))
+
+    t_dew = dew_point(air_temp, relative_humidity)
+    t_mould = critical_temperature(air_temp, relative_humidity, mould_surface_rh)
+    vapour_pressure = relative_humidity * saturation_pressure(air_temp)
+
+    with np.errstate(invalid="ignore", over="ignore"):
+        margin = temps - t_dew
+        surface_rh = vapour_pressure / saturation_pressure(temps)
+        condensation = valid & (margin <= safety_margin)
+        mould = valid & (surface_rh >= mould_surface_rh) & ~condensation
+
+    def fraction(mask: np.ndarray) -> float:
+        return float(np.count_nonzero(mask) / n_valid) if n_valid else 0.0
+
+    stats: Dict[str, Any] = {
+        "air_temp": air_temp,
+        "relative_humidity": relative_humidity,
+        "dew_point": t_dew,
+        "mould_critical_temp": t_mould,
+        "min_surface_temp": float(temps[valid].min()) if n_valid else None,
+        "min_dew_point_margin": float(margin[valid].min()) if n_valid else None,
+        "max_surface_rh": float(np.clip(surface_rh[valid], 0, None).max()) if n_valid else None,
+        "condensation_pixels": int(np.count_nonzero(condensation)) * step * step,
+        "condensation_fraction": fraction(condensation),
+        # Mould risk includes the condensing area
+        "mould_pixels": int(np.count_nonzero(mould | condensation)) * step * step,
+        "mould_fraction": fraction(mould | condensation),
+        "f_crit_condensation": None,
+        "f_crit_mould": None,
+    }
+    if outside_temp is not None and air_temp != outside_temp:
+        stats["f_crit_condensation"] = (t_dew - outside_temp) / (air_temp - outside_temp)
+        stats["f_crit_mould"] = (t_mould - outside_temp) / (air_temp - outside_temp)
+
+    return {"stats": stats, "condensation": condensation, "mould": mould, "margin": margin.astype(np.float32)}
+
+
+def render_moisture_overlay(condensation: np.ndarray, mould: np.ndarray) -> bytes:
+    """Transparent PNG overlay: condensation blue, mould risk orange"""
+    rgba = np.zeros(condensation.shape + (4,), dtype=np.uint8)
+    rgba[mould] = MOULD_COLOR
+    rgba[condensation] = CONDENSATION_COLOR
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, "RGBA").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def get_moisture_risk(
+    matrix,
+    data: np.ndarray,
+    air_temp: float,
+    relative_humidity: float,
+    outside_temp: Optional[float] = None,
+    safety_margin: float = 0.0,
+    mould_surface_rh: float = MOULD_SURFACE_RH,
+    variant: Any = None
+) -> Dict[str, Any]:
+    """
+    Moisture risk of a matrix (or of `data` derived from it, identified by
+    `variant`, e.g. recompensated temperatures), cached per parameter set
+    together with its overlay PNG.
+    """
+    key = (
+        "moisture", variant, round(air_temp, 2), round(relative_humidity, 4),
+        None if outside_temp is None else round(outside_temp, 2),
+        round(safety_margin, 2), round(mould_surface_rh, 3)
+    )
+
+    def build() -> Dict[str, Any]:
+        result = compute_moisture_risk(
+            data, air_temp, relative_humidity, outside_temp, safety_margin, mould_surface_rh, matrix.step
+        )
+        return {
+            "stats": result["stats"],
+            "overlay_png": render_moisture_overlay(result["condensation"], result["mould"]),
+        }
+    return matrix.derived(key, build)
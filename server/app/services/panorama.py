@@ -0,0 +1,359 @@
+# server/app/services/panorama.py
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.preview import block_reduce
+from app.services.temperature_matrix import write_matrix_meta
+from app.services.tile_pyramid import TilePyramid, pyramid_dir, save_tile_pyramid
+
+# Box sizes (pixels) of the band-pass used for registration: pixel noise
+# is averaged over the small box, the local mean over the large one removed
+_NOISE_BOX = 3
+_BACKGROUND_BOX = 15
+# Frames larger than this (pixels) are first matched on a reduced grid
+_COARSE_SIZE = 256
+
+
+def _box_mean(values: np.ndarray, size: int) -> np.ndarray:
+    """Mean over a size x size window (edge-clamped) via cumulative sums"""
+    half = size // 2
+    padded = np.pad(values, half + 1, mode="edge")
+    table = padded.cumsum(axis=0).cumsum(axis=1)
+    rows, cols = values.shape
+    window = (
+        table[size:size + rows, size:size + cols] - table[:rows, size:size + cols]
+        - table[size:size + rows, :cols] + table[:rows, :cols]
+    )
+    return window / (size * size)
+
+
+def registration_features(values: np.ndarray) -> np.ndarray:
+    """
+    Band-passed temperatures (difference of box means) with NaN kept.
+    Smooth gradients correlate at almost any offset; edges such as window
+    frames, joints and hot spots pin the overlap down.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mask = ~np.isnan(values)
+    filled = np.where(mask, values, values[mask].mean() if mask.any() else 0.0)
+    band = _box_mean(filled, _NOISE_BOX) - _box_mean(filled, _BACKGROUND_BOX)
+    return np.where(mask, band, np.nan)
+
+
+def frame_spectra(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    FFTs of a frame's valid mask, masked values and masked squares,
+    zero-padded to twice the frame size so shifts up to a full frame in
+    either direction are unambiguous (no wrap-around).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mask = ~np.isnan(values)
+    centred = np.where(mask, values - (values[mask].mean() if mask.any() else 0.0), 0.0)
+    size = (2 * values.shape[0], 2 * values.shape[1])
+    return {
+        "mask": np.fft.rfft2(mask.astype(np.float64), s=size),
+        "value": np.fft.rfft2(centred, s=size),
+        "square": np.fft.rfft2(centred * centred, s=size),
+    }
+
+
+def masked_ncc(spectra_a: Dict[str, np.ndarray], spectra_b: Dict[str, np.ndarray], shape: Tuple[int, int]):
+    """
+    Normalised cross-correlation of two frames over their overlap for every
+    offset of B's origin in A (masked NCC via FFT, Padfield 2012), plus the
+    overlap pixel count per offset. Index [dy, dx] wraps negative offsets.
+    """
+    size = (2 * shape[0], 2 * shape[1])
+
+    def corr(a: str, b: str) -> np.ndarray:
+        return np.fft.irfft2(spectra_a[a] * np.conj(spectra_b[b]), s=size)
+
+    count = np.rint(corr("mask", "mask"))
+    sum_a, sum_b = corr("value", "mask"), corr("mask", "value")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var_a = corr("square", "mask") - sum_a * sum_a / count
+        var_b = corr("mask", "square") - sum_b * sum_b / count
+        covariance = corr("value", "value") - sum_a * sum_b / count
+        ncc = covariance / np.sqrt(np.maximum(var_a * var_b, 1e-12))
+    return np.nan_to_num(ncc, nan=-1.0), count
+
+
+def _overlap_slices(shape: Tuple[int, int], dy: int, dx: int):
+    """Slices of frame A and frame B (same shape) covering their overlap"""
+    rows, cols = shape
+    ya, xa = slice(max(dy, 0), min(rows, rows + dy)), slice(max(dx, 0), min(cols, cols + dx))
+    yb, xb = slice(max(-dy, 0), min(rows, rows - dy)), slice(max(-dx, 0), min(cols, cols - dx))
+    return (ya, xa), (yb, xb)
+
+
+def overlap_delta(a: np.ndarray, b: np.ndarray, dy: int, dx: int) -> Optional[float]:
+    """Median temperature difference (B - A) over the overlap of two placed frames"""
+    sa, sb = _overlap_slices(a.shape, dy, dx)
+    delta = np.asarray(b[sb], dtype=np.float64) - np.asarray(a[sa], dtype=np.float64)
+    delta = delta[~np.isnan(delta)]
+    return float(np.median(delta)) if delta.size else None
+
+
+def pairwise_offset(
+    a: np.ndarray,
+    b: np.ndarray,
+    spectra_a: Dict[str, np.ndarray],
+    spectra_b: Dict[str, np.ndarray],
+    min_overlap: float
+) -> Optional[Dict[str, Any]]:
+    """
+    Integer offset of frame B's origin in frame A coordinates maximising the
+    overlap NCC among offsets overlapping at least `min_overlap` of a frame.
+    None when no offset overlaps enough.
+    """
+    ncc, count = masked_ncc(spectra_a, spectra_b, a.shape)
+    ncc[count < max(min_overlap * a.size, 16)] = -np.inf
+    index = int(np.argmax(ncc))
+    if not np.isfinite(ncc.flat[index]):
+        return None
+    r, c = np.unravel_index(index, ncc.shape)
+    rows, cols = ncc.shape
+    dy, dx = int((r + rows // 2) % rows - rows // 2), int((c + cols // 2) % cols - cols // 2)
+    return {
+        "dy": dy,
+        "dx": dx,
+        "ncc": float(ncc[r, c]),
+        "overlap": float(count[r, c] / a.size),
+    }
+
+
+def refine_offset(a: np.ndarray, b: np.ndarray, dy: int, dx: int, radius: int) -> Optional[Dict[str, Any]]:
+    """Best full-resolution offset within `radius` pixels of a coarse estimate (direct NCC)"""
+    best = None
+    for ry in range(dy - radius, dy + radius + 1):
+        for rx in range(dx - radius, dx + radius + 1):
+            sa, sb = _overlap_slices(a.shape, ry, rx)
+            va, vb = a[sa], b[sb]
+            valid = ~(np.isnan(va) | np.isnan(vb))
+            if np.count_nonzero(valid) < 16:
+                continue
+            da = va[valid] - va[valid].mean()
+            db = vb[valid] - vb[valid].mean()
+            denominator = np.sqrt((da * da).sum() * (db * db).sum())
+            ncc = float((da * db).sum() / denominator) if denominator > 0 else 0.0
+            if best is None or ncc > best["ncc"]:
+                best = {"dy": ry, "dx": rx, "ncc": ncc, "overlap": np.count_nonzero(valid) / a.size}
+    return best
+
+
+def register_frames(
+    frames: Sequence[np.ndarray],
+    min_overlap: float = 0.1,
+    min_confidence: float = 0.7
+) -> List[Dict[str, Any]]:
+    """
+    Place overlapping frames (same grid) on a common canvas.
+
+    All frame pairs are registered; starting from frame 0 the placed set is
+    grown by the unplaced frame with the best-correlating overlap to any
+    placed frame (a maximum spanning tree), so rows, grids and shuffled
+    shot orders all work. Returns per-frame placements (x, y of the frame
+    origin relative to frame 0). Raises ValueError when some frames match
+    no placed frame with NCC >= `min_confidence`.
+    """
+    n_frames = len(frames)
+    features = [registration_features(frame) for frame in frames]
+    # Large frames are matched on a block-mean grid, then refined at full size
+    factor = max(1, max(frames[0].shape) // _COARSE_SIZE)
+    coarse = [block_reduce(feature, factor)[0] if factor > 1 else feature for feature in features]
+    spectra = [frame_spectra(feature) for feature in coarse]
+    matches: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for a in range(n_frames):
+        for b in range(a + 1, n_frames):
+            match = pairwise_offset(coarse[a], coarse[b], spectra[a], spectra[b], min_overlap)
+            if match is not None and factor > 1:
+                match = refine_offset(features[a], features[b], match["dy"] * factor, match["dx"] * factor, factor)
+            if match is not None and match["ncc"] >= min_confidence:
+                matches[(a, b)] = match
+                matches[(b, a)] = {**match, "dy": -match["dy"], "dx": -match["dx"]}
+
+    placements: List[Optional[Dict[str, Any]]] = [None] * n_frames
+    placements[0] = {"x": 0, "y": 0, "reference": None, "ncc": 1.0, "overlap": 1.0}
+    while any(p is None for p in placements):
+        edges = [
+            (match["ncc"], a, b) for (a, b), match in matches.items()
+            if placements[a] is not None and placements[b] is None
+        ]
+        if not edges:
+            unplaced = [i for i, p in enumerate(placements) if p is None]
+            raise ValueError(f"Frames {unplaced} do not overlap the mosaic (NCC >= {min_confidence})")
+        _, a, b = max(edges)
+        match = matches[(a, b)]
+        placements[b] = {
+            "x": placements[a]["x"] + match["dx"],
+            "y": placements[a]["y"] + match["dy"],
+            "reference": a,
+            "ncc": match["ncc"],
+            "overlap": match["overlap"],
+        }
+    return placements
+
+
+def level_frames(
+    frames: Sequence[np.ndarray],
+    placements: Sequence[Dict[str, Any]],
+    min_overlap: float = 0.1
+) -> np.ndarray:
+    """
+    Additive per-frame temperature corrections that best cancel the median
+    temperature differences of all placed frames overlapping by at least
+    `min_overlap` (least squares), with frame 0 kept as the radiometric
+    reference. Compensates drift between shots, not real changes.
+    """
+    n_frames = len(frames)
+    rows = []
+    for a in range(n_frames):
+        for b in range(a + 1, n_frames):
+            dy = placements[b]["y"] - placements[a]["y"]
+            dx = placements[b]["x"] - placements[a]["x"]
+            overlap = max(frames[a].shape[0] - abs(dy), 0) * max(frames[a].shape[1] - abs(dx), 0)
+            if overlap < min_overlap * frames[a].size:
+                continue
+            delta = overlap_delta(frames[a], frames[b], dy, dx)
+            if delta is not None:
+                rows.append((a, b, delta))
+    if not rows:
+        return np.zeros(n_frames)
+
+    # (T_b + c_b) - (T_a + c_a) = 0  ->  c_b - c_a = -delta; c_0 pinned to 0
+    system = np.zeros((len(rows) + 1, n_frames))
+    target = np.zeros(len(rows) + 1)
+    for row, (a, b, delta) in enumerate(rows):
+        system[row, b], system[row, a], target[row] = 1.0, -1.0, -delta
+    system[-1, 0] = 1e3
+    corrections, *_ = np.linalg.lstsq(system, target, rcond=None)
+    return corrections
+
+
+def _feather_weights(shape: Tuple[int, int]) -> np.ndarray:
+    """Weight growing linearly from each frame edge towards its centre"""
+    rows, cols = shape
+    wy = np.minimum(np.arange(rows) + 1, rows - np.arange(rows)).astype(np.float32)
+    wx = np.minimum(np.arange(cols) + 1, cols - np.arange(cols)).astype(np.float32)
+    return np.minimum.outer(wy, wx)
+
+
+def mosaic_shape(shape: Tuple[int, int], placements: Sequence[Dict[str, Any]]) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Canvas shape and the (y, x) shift that makes every placement non-negative"""
+    ys = [p["y"] for p in placements]
+    xs = [p["x"] for p in placements]
+    origin = (-min(ys), -min(xs))
+    return (max(ys) + origin[0] + shape[0], max(xs) + origin[1] + shape[1]), origin
+
+
+def blend_frames(
+    frames: Sequence[np.ndarray],
+    placements: Sequence[Dict[str, Any]],
+    out: np.ndarray,
+    corrections: Optional[np.ndarray] = None,
+    blend: str = "feather"
+) -> None:
+    """
+    Compose frames into `out` (NaN-initialised canvas). "feather" averages
+    overlapping temperatures weighted by distance to each frame edge, so
+    seams fade instead of stepping; "first" keeps the earliest frame's
+    pixel and only fills gaps from later frames (original readings kept).
+    """
+    shape = frames[0].shape
+    _, (oy, ox) = mosaic_shape(shape, placements)
+    corrections = np.zeros(len(frames)) if corrections is None else corrections
+
+    if blend == "first":
+        for frame, placement, correction in zip(frames, placements, corrections):
+            y, x = placement["y"] + oy, placement["x"] + ox
+            target = out[y:y + shape[0], x:x + shape[1]]
+            fill = np.isnan(target) & ~np.isnan(frame)
+            target[fill] = frame[fill] + correction
+        return
+
+    weights = _feather_weights(shape)
+    total = np.zeros(out.shape, dtype=np.float64)
+    weight_sum = np.zeros(out.shape, dtype=np.float64)
+    for frame, placement, correction in zip(frames, placements, corrections):
+        y, x = placement["y"] + oy, placement["x"] + ox
+        valid = ~np.isnan(frame)
+        w = np.where(valid, weights, 0.0)
+        total[y:y + shape[0], x:x + shape[1]] += w * np.where(valid, frame + correction, 0.0)
+        weight_sum[y:y + shape[0], x:x + shape[1]] += w
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out[...] = np.where(weight_sum > 0, total / weight_sum, np.nan)
+
+
+def stitch_mosaic(
+    frames: Sequence[np.ndarray],
+    npy_path: Path,
+    step: int = 1,
+    blend: str = "feather",
+    equalize: bool = False,
+    min_overlap: float = 0.1,
+    min_confidence: float = 0.7
+) -> Dict[str, Any]:
+    """
+    Register, level (optional) and blend frames into a mosaic written
+    straight into a memory-mapped .matrix.npy sidecar, together with its
+    descriptor and a stored tile pyramid. Returns the layout: canvas shape
+    and per-frame position, match quality and temperature correction.
+    """
+    placements = register_frames(frames, min_overlap, min_confidence)
+    corrections = level_frames(frames, placements, min_overlap) if equalize else np.zeros(len(frames))
+    shape, (oy, ox) = mosaic_shape(frames[0].shape, placements)
+
+    npy_path.parent.mkdir(parents=True, exist_ok=True)
+    out = np.lib.format.open_memmap(npy_path, mode="w+", dtype=np.float32, shape=shape)
+    out[...] = np.nan
+    blend_frames(frames, placements, out, corrections, blend)
+    out.flush()
+
+    layout = {
+        "shape": list(shape),
+        "step": step,
+        "blend": blend,
+        "equalized": equalize,
+        "frames": [
+            {
+                "x": placement["x"] + ox,
+                "y": placement["y"] + oy,
+                "rows": int(frames[0].shape[0]),
+                "cols": int(frames[0].shape[1]),
+                "reference": placement["reference"],
+                "ncc": round(placement["ncc"], 4),
+                "overlap": round(placement["overlap"], 4),
+                "correction": round(float(correction), 3),
+            }
+            for placement, correction in zip(placements, corrections)
+        ],
+    }
+    write_matrix_meta(npy_path, step, shape, mosaic=layout)
+    save_tile_pyramid(TilePyramid(out), pyramid_dir(npy_path))
+    del out
+    return layout
+
+
+def frame_to_mosaic(
+    layout: Dict[str, Any],
+    index: int,
+    points: Sequence[Dict[str, float]],
+    frame_step: int,
+    scale: Tuple[float, float] = (1.0, 1.0)
+) -> List[Dict[str, float]]:
+    """
+    Image-pixel points of frame `index` mapped into mosaic image pixels.
+    `scale` (x, y) is the frame-to-mosaic grid factor when the frame was
+    resampled onto the mosaic grid.
+    """
+    frame = layout["frames"][index]
+    step = layout["step"]
+    return [
+        {
+            "x": round((p["x"] / frame_step * scale[0] + frame["x"]) * step, 2),
+            "y": round((p["y"] / frame_step * scale[1] + frame["y"]) * step, 2),
+        }
+        for p in points
+    ]
@@ -0,0 +1,107 @@
+# server/app/services/preview.py
+import base64
+import math
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.matrix_codec import decode_matrix, encode_matrix
+from app.services.temperature_matrix import get_image_matrix
+from app.services.units import CANONICAL_UNIT, convert_fields, from_celsius
+
+PREVIEW_VERSION = 1
+PREVIEW_ENCODING = "tmat-int16+deflate"
+
+
+def block_reduce(data: np.ndarray, factor: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    NaN-aware block mean and block max over factor x factor blocks; edge
+    blocks are partial. Blocks without any valid pixel are NaN.
+    """
+    values = np.asarray(data, dtype=np.float32)
+    rows, cols = values.shape
+    out_rows, out_cols = -(-rows // factor), -(-cols // factor)
+    padded = np.full((out_rows * factor, out_cols * factor), np.nan, dtype=np.float32)
+    padded[:rows, :cols] = values
+    blocks = padded.reshape(out_rows, factor, out_cols, factor)
+
+    valid = ~np.isnan(blocks)
+    counts = valid.sum(axis=(1, 3))
+    sums = np.where(valid, blocks, 0.0).sum(axis=(1, 3), dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (sums / counts).astype(np.float32)
+    high = np.fmax.reduce(np.fmax.reduce(blocks, axis=3), axis=1)
+    return mean, high
+
+
+def _pack(values: np.ndarray) -> str:
+    """int16 matrix blob (see matrix_codec), deflated and base64 encoded"""
+    return base64.b64encode(zlib.compress(encode_matrix(values, "int16"), 9)).decode("ascii")
+
+
+def compute_preview(
+    data: np.ndarray,
+    step: int = 1,
+    max_width: Optional[int] = None,
+    max_height: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Small block-mean and block-max matrices for list and grid views.
+
+    One integer block size keeps the aspect ratio and fits the matrix into
+    max_width x max_height. Both matrices are stored as deflated int16
+    centi-degree blobs in the binary matrix format, a few KB per image.
+    """
+    max_width = max_width or settings.PREVIEW_WIDTH
+    max_height = max_height or settings.PREVIEW_HEIGHT
+    rows, cols = data.shape
+    block = max(math.ceil(rows / max_height), math.ceil(cols / max_width), 1)
+    mean, high = block_reduce(data, block)
+
+    valid = mean[~np.isnan(mean)]
+    return {
+        "version": PREVIEW_VERSION,
+        "encoding": PREVIEW_ENCODING,
+        "width": int(mean.shape[1]),
+        "height": int(mean.shape[0]),
+        "pixel_size": block * step,
+        "min_temp": float(np.nanmin(data)) if valid.size else None,
+        "max_temp": float(np.nanmax(high)) if valid.size else None,
+        "mean": _pack(mean),
+        "max": _pack(high),
+    }
+
+
+def decode_preview_matrix(blob: str) -> np.ndarray:
+    """Decode one packed preview matrix back to float32 (NaN for no data)"""
+    values, _ = decode_matrix(zlib.decompress(base64.b64decode(blob)))
+    return values
+
+
+def convert_preview(preview: Optional[Dict[str, Any]], unit: str) -> Optional[Dict[str, Any]]:
+    """Stored (Celsius) preview with its range and both matrices re-packed in `unit`"""
+    if not preview or unit == CANONICAL_UNIT:
+        return preview
+    converted = convert_fields(preview, ("min_temp", "max_temp"), unit)
+    for key in ("mean", "max"):
+        converted[key] = _pack(from_celsius(decode_preview_matrix(preview[key]), unit))
+    return converted
+
+
+def get_image_preview(image) -> Optional[Dict[str, Any]]:
+    """
+    Stored preview of an image; older images get it computed from their
+    matrix and written back onto the row (the caller commits). Returns None
+    when the image has no temperature data.
+    """
+    preview = image.preview
+    if preview and preview.get("version") == PREVIEW_VERSION:
+        return preview
+    try:
+        matrix = get_image_matrix(image)
+    except (FileNotFoundError, ValueError):
+        return None
+    image.preview = compute_preview(matrix.data, matrix.step)
+    return image.preview
@@ -0,0 +1,107 @@
+# server/app/services/quantile_sketch.py
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+# t-digest compression δ: at most δ/2 centroids per digest (~3 KB as JSON)
+DIGEST_COMPRESSION = 400
+
+
+def _scale(q: np.ndarray, compression: float) -> np.ndarray:
+    """k1 scale function: centroids are small at the tails, large at the median"""
+    return compression / (2.0 * np.pi) * np.arcsin(2.0 * np.clip(q, 0.0, 1.0) - 1.0)
+
+
+def _digest(means: np.ndarray, weights: np.ndarray, compression: float) -> Dict[str, Any]:
+    return {
+        "compression": compression,
+        "means": np.round(means, 4).tolist(),
+        "weights": np.rint(weights).astype(np.int64).tolist(),
+    }
+
+
+def _cluster(values: np.ndarray, weights: np.ndarray, compression: float) -> Dict[str, Any]:
+    """
+    Merge weighted points into centroids: after sorting, each point joins
+    the cluster of the unit k-interval its mid rank falls into, so every
+    centroid spans at most Δk = 1 (the t-digest size bound).
+    """
+    order = np.argsort(values, kind="stable")
+    values, weights = values[order], weights[order]
+    total = weights.sum()
+    mid_rank = (np.cumsum(weights) - weights / 2.0) / total
+    k = _scale(mid_rank, compression)
+    labels = np.floor(k - k[0]).astype(np.int64)
+    # Labels are non-decreasing; renumber to consecutive cluster ids
+    labels = np.concatenate([[0], np.cumsum(np.diff(labels) > 0)])
+    cluster_weights = np.bincount(labels, weights=weights)
+    cluster_means = np.bincount(labels, weights=values * weights) / cluster_weights
+    return _digest(cluster_means, cluster_weights, compression)
+
+
+def build_digest(values: np.ndarray, weight: int = 1, compression: float = DIGEST_COMPRESSION) -> Optional[Dict[str, Any]]:
+    """
+    t-digest of valid (non-NaN) values, each counting `weight` pixels.
+    With equal weights the unit k-intervals map to fixed rank boundaries,
+    so one sort and a segmented sum build all centroids.
+    """
+    values = np.asarray(values).ravel()
+    values = np.sort(values[~np.isnan(values)])
+    n = values.size
+    if n == 0:
+        return None
+    k_first = _scale(np.array([0.5 / n]), compression)[0]
+    k_last = _scale(np.array([1.0 - 0.5 / n]), compression)[0]
+    # Rank q_j where k(q) crosses k_first + j; the point with mid rank (i + 0.5)/n starts cluster j
+    k_edges = k_first + np.arange(1, int(np.floor(k_last - k_first)) + 1)
+    q_edges = (np.sin(k_edges * 2.0 * np.pi / compression) + 1.0) / 2.0
+    starts = np.unique(np.concatenate([[0], np.ceil(q_edges * n - 0.5).astype(np.int64)]))
+    starts = starts[starts < n]
+    counts = np.diff(np.append(starts, n))
+    sums = np.add.reduceat(values.astype(np.float64), starts)
+    return _digest(sums / counts, counts * float(weight), compression)
+
+
+def merge_digests(digests: Iterable[Optional[Dict[str, Any]]], compression: float = DIGEST_COMPRESSION) -> Optional[Dict[str, Any]]:
+    """One digest from many (e.g. every image of several projects), re-clustered"""
+    digests = [d for d in digests if d and d.get("weights")]
+    if not digests:
+        return None
+    means = np.concatenate([np.asarray(d["means"], dtype=np.float64) for d in digests])
+    weights = np.concatenate([np.asarray(d["weights"], dtype=np.float64) for d in digests])
+    return _cluster(means, weights, compression)
+
+
+def _rank_grid(digest: Dict[str, Any], lo: Optional[float], hi: Optional[float]):
+    """Cumulative ranks of centroid centres plus the exact extremes as end points"""
+    means = np.asarray(digest["means"], dtype=np.float64)
+    weights = np.asarray(digest["weights"], dtype=np.float64)
+    total = weights.sum()
+    centres = np.cumsum(weights) - weights / 2.0
+    lo = means[0] if lo is None else min(lo, means[0])
+    hi = means[-1] if hi is None else max(hi, means[-1])
+    return np.concatenate([[0.0], centres, [total]]), np.concatenate([[lo], means, [hi]]), total
+
+
+def digest_quantiles(
+    digest: Dict[str, Any],
+    quantiles: Sequence[float],
+    lo: Optional[float] = None,
+    hi: Optional[float] = None
+) -> Dict[str, float]:
+    """Quantiles (0..1) interpolated between centroids; `lo`/`hi` are the exact extremes"""
+    ranks, values, total = _rank_grid(digest, lo, hi)
+    result = np.interp(np.asarray(quantiles, dtype=np.float64) * total, ranks, values)
+    return {f"{q:g}": float(v) for q, v in zip(quantiles, result)}
+
+
+def digest_cdf(
+    digest: Dict[str, Any],
+    thresholds: Sequence[float],
+    lo: Optional[float] = None,
+    hi: Optional[float] = None
+) -> Dict[str, float]:
+    """Fraction of pixels at or below each threshold"""
+    ranks, values, total = _rank_grid(digest, lo, hi)
+    result = np.interp(np.asarray(thresholds, dtype=np.float64), values, ranks) / total
+    return {f"{t:g}": float(v) for t, v in zip(thresholds, result)}
@@ -0,0 +1,189 @@
+# server/app/services/radiometry.py
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.region_stats import update_region_rows
+from app.services.temperature_matrix import get_image_matrix
+
+KELVIN_OFFSET = 273.15
+STEFAN_BOLTZMANN = 5.670374419e-8  # W m^-2 K^-4
+
+DEFAULT_EMISSIVITY = 0.95
+DEFAULT_REFLECTED_TEMP = 20.0
+
+
+def recompensate(
+    temps_c: np.ndarray,
+    emissivity_old,
+    reflected_old_c: float,
+    emissivity_new,
+    reflected_new_c: float
+) -> np.ndarray:
+    """
+    Re-apply emissivity and reflected temperature to measured temperatures.
+
+    The camera value T was computed from the received radiance
+        W = ε·σT⁴ + (1-ε)·σT_refl⁴
+    so W is rebuilt with the original parameters and solved for the object
+    temperature with the new ones. Emissivities may be scalars or arrays
+    broadcastable to `temps_c` (per-pixel ε). Pixels whose new radiance
+    balance is non-physical become NaN.
+    """
+    t_old = np.asarray(temps_c, dtype=np.float64) + KELVIN_OFFSET
+    tr_old4 = (reflected_old_c + KELVIN_OFFSET) ** 4
+    tr_new4 = (reflected_new_c + KELVIN_OFFSET) ** 4
+    emissivity_old = np.asarray(emissivity_old, dtype=np.float64)
+    emissivity_new = np.asarray(emissivity_new, dtype=np.float64)
+
+    # σ cancels out; radiance kept in units of σ
+    radiance = emissivity_old * t_old ** 4 + (1.0 - emissivity_old) * tr_old4
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t_new4 = (radiance - (1.0 - emissivity_new) * tr_new4) / emissivity_new
+        t_new = np.where(t_new4 > 0, np.power(np.maximum(t_new4, 0.0), 0.25), np.nan)
+    return (t_new - KELVIN_OFFSET).astype(np.float32)
+
+
+def camera_parameters(image) -> Tuple[float, float]:
+    """Emissivity and reflected temperature the camera used for an image"""
+    thermal_data = image.thermal_data or {}
+    emissivity = thermal_data.get("emissivity") or DEFAULT_EMISSIVITY
+    reflected = thermal_data.get("reflected_temp")
+    if reflected is None:
+        reflected = DEFAULT_REFLECTED_TEMP
+    return float(emissivity), float(reflected)
+
+
+def global_radiometric_parameters(parameters: Optional[Dict[str, Any]]) -> Tuple[Optional[float], Optional[float]]:
+    """Emissivity / reflected temperature from project global_parameters (either key style)"""
+    parameters = parameters or {}
+    emissivity = parameters.get("emissivity")
+    reflected = parameters.get("reflectedTemp", parameters.get("reflected_temp"))
+    return (
+        float(emissivity) if emissivity is not None else None,
+        float(reflected) if reflected is not None else None,
+    )
+
+
+def get_recompensated_data(
+    matrix,
+    camera: Tuple[float, float],
+    emissivity: float,
+    reflected_temp: float
+) -> np.ndarray:
+    """
+    Temperature matrix re-evaluated for a new (ε, T_refl), cached with the
+    matrix per parameter set. Returns the original data when nothing changed.
+    """
+    emissivity_old, reflected_old = camera
+    if np.isclose(emissivity, emissivity_old) and np.isclose(reflected_temp, reflected_old):
+        return matrix.data
+
+    key = ("recompensated", round(emissivity_old, 4), round(reflected_old, 3),
+           round(emissivity, 4), round(reflected_temp, 3))
+    return matrix.derived(
+        key,
+        lambda: recompensate(matrix.data, emissivity_old, reflected_old, emissivity, reflected_temp)
+    )
+
+
+def project_surface_data(image, matrix) -> Tuple[np.ndarray, Tuple[float, float]]:
+    """
+    Matrix re-evaluated with the project's global emissivity / reflected
+    temperature (the camera values where none are set), plus the (ε, T_refl)
+    pair for cache keys of results derived from it.
+    """
+    camera = camera_parameters(image)
+    emissivity, reflected_temp = global_radiometric_parameters(
+        image.project.global_parameters if image.project else None
+    )
+    emissivity = emissivity if emissivity is not None else camera[0]
+    reflected_temp = reflected_temp if reflected_temp is not None else camera[1]
+    data = get_recompensated_data(matrix, camera, emissivity, reflected_temp)
+    return data, (round(emissivity, 4), round(reflected_temp, 3))
+
+
+def recompensate_image_stats(
+    image,
+    regions: Sequence[Any],
+    markers: Sequence[Any],
+    reflected_temp: Optional[float] = None
+) -> None:
+    """
+    Refresh region statistics and marker temperatures of one image using
+    each row's own emissivity and the given reflected temperature.
+
+    Rows are grouped by emissivity so every distinct ε costs one cached,
+    vectorized recompensation of the matrix and one statistics pass.
+    """
+    matrix = get_image_matrix(image)
+    camera = camera_parameters(image)
+    if reflected_temp is None:
+        reflected_temp = camera[1]
+
+    groups: Dict[float, Tuple[list, list]] = {}
+    for region in regions:
+        groups.setdefault(round(region.emissivity, 4), ([], []))[0].append(region)
+    for marker in markers:
+        groups.setdefault(round(marker.emissivity, 4), ([], []))[1].append(marker)
+
+    rows, cols = matrix.shape
+    for emissivity, (group_regions, group_markers) in groups.items():
+        data = get_recompensated_data(matrix, camera, emissivity, reflected_temp)
+
+        if group_regions:
+            update_region_rows(group_regions, data, matrix.step)
+
+        if group_markers:
+            ys = np.clip(np.rint([m.y / matrix.step for m in group_markers]).astype(np.int64), 0, rows - 1)
+            xs = np.clip(np.rint([m.x / matrix.step for m in group_markers]).astype(np.int64), 0, cols - 1)
+            for marker, value in zip(group_markers, data[ys, xs]):
+                if not np.isnan(value):
+                    marker.temperature = float(value)
+
+
+def recompensate_project(
+    project,
+    images: Sequence[Any],
+    regions: Sequence[Any],
+    markers: Sequence[Any],
+    previous_parameters: Optional[Dict[str, Any]]
+) -> int:
+    """
+    Re-apply changed global emissivity / reflected temperature to every
+    region and marker of a project, without re-extracting the images.
+
+    Rows whose emissivity still follows the previous global value inherit
+    the new one; rows with their own emissivity keep it. Returns the number
+    of images whose statistics were refreshed.
+    """
+    old_emissivity, old_reflected = global_radiometric_parameters(previous_parameters)
+    new_emissivity, new_reflected = global_radiometric_parameters(project.global_parameters)
+    if old_emissivity == new_emissivity and old_reflected == new_reflected:
+        return 0
+
+    inherited = old_emissivity if old_emissivity is not None else DEFAULT_EMISSIVITY
+    if new_emissivity is not None:
+        for row in list(regions) + list(markers):
+            if np.isclose(row.emissivity, inherited):
+                row.emissivity = new_emissivity
+
+    by_image: Dict[Any, Tuple[list, list]] = {image.id: ([], []) for image in images}
+    for region in regions:
+        if region.image_id in by_image:
+            by_image[region.image_id][0].append(region)
+    for marker in markers:
+        if marker.image_id in by_image:
+            by_image[marker.image_id][1].append(marker)
+
+    refreshed = 0
+    for image in images:
+        image_regions, image_markers = by_image[image.id]
+        if not image_regions and not image_markers:
+            continue
+        try:
+            recompensate_image_stats(image, image_regions, image_markers, reflected_temp=new_reflected)
+            refreshed += 1
+        except (FileNotFoundError, ValueError) as e:
+            print(f"[RADIOMETRY] Skipping image {image.id}: {e}")
+    return refreshed
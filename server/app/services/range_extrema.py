@@ -0,0 +1,242 @@
+# server/app/services/range_extrema.py
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+
+def _full_levels(rows: int, cols: int) -> Tuple[int, int]:
+    return max(int(np.floor(np.log2(rows))), 0), max(int(np.floor(np.log2(cols))), 0)
+
+
+def _sparse_table(flat_values: np.ndarray, shape: Tuple[int, int], levels: Tuple[int, int], better) -> np.ndarray:
+    """
+    Table (ly, lx) holding, for every start cell, the flat index of the
+    extreme over the 2^ly x 2^lx block starting there.
+    """
+    rows, cols = shape
+    level_y, level_x = levels
+    table = np.empty((level_y + 1, level_x + 1, rows, cols), dtype=np.int32)
+    table[0, 0] = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+
+    def merge(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return np.where(better(flat_values[b], flat_values[a]), b, a)
+
+    for ly in range(1, level_y + 1):
+        half = 1 << (ly - 1)
+        prev = table[ly - 1, 0]
+        table[ly, 0, :rows - half] = merge(prev[:rows - half], prev[half:])
+        table[ly, 0, rows - half:] = prev[rows - half:]
+
+    for ly in range(level_y + 1):
+        for lx in range(1, level_x + 1):
+            half = 1 << (lx - 1)
+            prev = table[ly, lx - 1]
+            table[ly, lx, :, :cols - half] = merge(prev[:, :cols - half], prev[:, half:])
+            table[ly, lx, :, cols - half:] = prev[:, cols - half:]
+
+    return table
+
+
+def _table_bytes(rows: int, cols: int, levels: Tuple[int, int]) -> int:
+    """Size of a min and a max sparse table"""
+    return 2 * (levels[0] + 1) * (levels[1] + 1) * rows * cols * 4
+
+
+def _layout_bytes(rows: int, cols: int, levels: Tuple[int, int], block_levels: Tuple[int, int]) -> int:
+    """Pixel tables up to `levels` plus full tables over 2^by x 2^bx blocks"""
+    block_rows, block_cols = -(-rows // (1 << block_levels[0])), -(-cols // (1 << block_levels[1]))
+    return (
+        _table_bytes(rows, cols, levels) +
+        _table_bytes(block_rows, block_cols, _full_levels(block_rows, block_cols)) +
+        2 * block_rows * block_cols * 4
+    )
+
+
+def _choose_layout(rows: int, cols: int, max_bytes: int) -> Tuple[Tuple[int, int], Optional[Tuple[int, int]]]:
+    """
+    Pixel-table levels and block levels (None: full table, no blocks) for a
+    memory budget. Among the layouts that fit, the one with the fewest
+    pixel-table lookups along the edges of a large rectangle is used; when
+    none fits, the smallest.
+    """
+    full = _full_levels(rows, cols)
+    if _table_bytes(rows, cols, full) <= max_bytes:
+        return full, None
+
+    best, best_key = None, None
+    for ly in range(full[0] + 1):
+        for lx in range(full[1] + 1):
+            for by in range(ly, full[0] + 1):
+                for bx in range(lx, full[1] + 1):
+                    size = _layout_bytes(rows, cols, (ly, lx), (by, bx))
+                    edge_lookups = (1 << (by - ly)) * -(-cols // (1 << lx)) + (1 << (bx - lx)) * -(-rows // (1 << ly))
+                    key = (size > max_bytes, edge_lookups if size <= max_bytes else size)
+                    if best_key is None or key < best_key:
+                        best, best_key = ((ly, lx), (by, bx)), key
+    return best
+
+
+def _starts(lo: int, hi: int, max_level: int):
+    """Block level and start positions covering [lo, hi]"""
+    length = hi - lo + 1
+    level = min(int(np.floor(np.log2(length))), max_level)
+    size = 1 << level
+    starts = np.arange(lo, hi - size + 2, size)
+    if starts[-1] != hi - size + 1:
+        starts = np.append(starts, hi - size + 1)
+    return level, starts
+
+
+class RangeExtremaIndex:
+    """
+    2-D sparse table answering rectangle min/max (and their positions).
+
+    Table (ly, lx) holds, for every start pixel, the flat index of the
+    extreme over the 2^ly x 2^lx block starting there. A query covers the
+    rectangle with overlapping blocks of the largest level that fits, so a
+    full index answers in O(1) (four lookups).
+
+    When the full table would exceed `max_bytes`, the pixel table keeps
+    levels up to (ky, kx) only and a second, full sparse table is built over
+    the min/max of 2^by x 2^bx blocks (by >= ky, bx >= kx; see
+    _choose_layout). The block-aligned interior of a large rectangle is then
+    answered in O(1) from the block table; only the partial edge strips are
+    covered with pixel-table blocks, O(2^(by-ky) * w / 2^kx + 2^(bx-kx) *
+    h / 2^ky) lookups.
+    """
+
+    def __init__(self, data: np.ndarray, max_bytes: int):
+        values = np.asarray(data, dtype=np.float32)
+        rows, cols = values.shape
+        self.shape = (rows, cols)
+
+        nan = np.isnan(values)
+        self._min_values = np.where(nan, np.inf, values).ravel()
+        self._max_values = np.where(nan, -np.inf, values).ravel()
+
+        self.levels, block_levels = _choose_layout(rows, cols, max_bytes)
+        self._min_table = _sparse_table(self._min_values, self.shape, self.levels, np.less)
+        self._max_table = _sparse_table(self._max_values, self.shape, self.levels, np.greater)
+
+        self.block_size: Optional[Tuple[int, int]] = None
+        if block_levels is not None:
+            self._build_block_tables(block_levels)
+
+    def _build_block_tables(self, block_levels: Tuple[int, int]) -> None:
+        """Arg-min/arg-max pixel of every block and a full sparse table over the blocks"""
+        rows, cols = self.shape
+        size_y, size_x = 1 << block_levels[0], 1 << block_levels[1]
+        self.block_size = (size_y, size_x)
+        block_rows, block_cols = -(-rows // size_y), -(-cols // size_x)
+        self.block_shape = (block_rows, block_cols)
+
+        # Pixel flat index of every cell of the padded block grid (-1 for padding)
+        padded = np.full((block_rows * size_y, block_cols * size_x), -1, dtype=np.int64)
+        padded[:rows, :cols] = np.arange(rows * cols).reshape(rows, cols)
+        cells = padded.reshape(block_rows, size_y, block_cols, size_x).transpose(0, 2, 1, 3)
+        cells = cells.reshape(block_rows * block_cols, size_y * size_x)
+
+        def block_extreme(flat_values: np.ndarray, pad, pick) -> np.ndarray:
+            candidates = np.where(cells >= 0, flat_values[np.maximum(cells, 0)], pad)
+            return cells[np.arange(cells.shape[0]), pick(candidates, axis=1)].astype(np.int32)
+
+        self._block_min_index = block_extreme(self._min_values, np.inf, np.argmin)
+        self._block_max_index = block_extreme(self._max_values, -np.inf, np.argmax)
+        levels = _full_levels(block_rows, block_cols)
+        self._block_levels = levels
+        self._block_min_table = _sparse_table(self._min_values[self._block_min_index], self.block_shape, levels, np.less)
+        self._block_max_table = _sparse_table(self._max_values[self._block_max_index], self.block_shape, levels, np.greater)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self._min_table, self._max_table, self._min_values, self._max_values]
+        if self.block_size:
+            arrays += [self._block_min_table, self._block_max_table, self._block_min_index, self._block_max_index]
+        return int(sum(a.nbytes for a in arrays))
+
+    def _pixel_candidates(self, x0: int, y0: int, x1: int, y1: int):
+        """Arg-min/arg-max candidates of a rectangle from the pixel table"""
+        ly, starts_y = _starts(y0, y1, self.levels[0])
+        lx, starts_x = _starts(x0, x1, self.levels[1])
+        grid = np.ix_(starts_y, starts_x)
+        return self._min_table[ly, lx][grid].ravel(), self._max_table[ly, lx][grid].ravel()
+
+    def _block_candidates(self, bx0: int, by0: int, bx1: int, by1: int):
+        """Arg-min/arg-max pixel of a rectangle of whole blocks, O(1)"""
+        ly, starts_y = _starts(by0, by1, self._block_levels[0])
+        lx, starts_x = _starts(bx0, bx1, self._block_levels[1])
+        grid = np.ix_(starts_y, starts_x)
+        min_blocks = self._block_min_table[ly, lx][grid].ravel()
+        max_blocks = self._block_max_table[ly, lx][grid].ravel()
+        return self._block_min_index[min_blocks], self._block_max_index[max_blocks]
+
+    def _candidates(self, x0: int, y0: int, x1: int, y1: int):
+        if not self.block_size:
+            return [self._pixel_candidates(x0, y0, x1, y1)]
+        size_y, size_x = self.block_size
+        by0, by1 = -(-y0 // size_y), (y1 + 1) // size_y - 1
+        bx0, bx1 = -(-x0 // size_x), (x1 + 1) // size_x - 1
+        if by0 > by1 or bx0 > bx1:
+            return [self._pixel_candidates(x0, y0, x1, y1)]
+
+        # Whole-block interior plus up to four partial edge strips
+        inner_y0, inner_y1 = by0 * size_y, (by1 + 1) * size_y - 1
+        inner_x0, inner_x1 = bx0 * size_x, (bx1 + 1) * size_x - 1
+        parts = [self._block_candidates(bx0, by0, bx1, by1)]
+        strips = [
+            (x0, y0, x1, inner_y0 - 1),
+            (x0, inner_y1 + 1, x1, y1),
+            (x0, inner_y0, inner_x0 - 1, inner_y1),
+            (inner_x1 + 1, inner_y0, x1, inner_y1),
+        ]
+        for sx0, sy0, sx1, sy1 in strips:
+            if sx0 <= sx1 and sy0 <= sy1:
+                parts.append(self._pixel_candidates(sx0, sy0, sx1, sy1))
+        return parts
+
+    def _query_one(self, x0: int, y0: int, x1: int, y1: int) -> Dict[str, Optional[float]]:
+        rows, cols = self.shape
+        x0, x1 = max(min(x0, x1), 0), min(max(x0, x1), cols - 1)
+        y0, y1 = max(min(y0, y1), 0), min(max(y0, y1), rows - 1)
+        if x0 > x1 or y0 > y1:
+            return {"min": None, "min_index": None, "max": None, "max_index": None}
+
+        parts = self._candidates(x0, y0, x1, y1)
+        min_candidates = np.concatenate([p[0] for p in parts])
+        max_candidates = np.concatenate([p[1] for p in parts])
+        min_index = int(min_candidates[np.argmin(self._min_values[min_candidates])])
+        max_index = int(max_candidates[np.argmax(self._max_values[max_candidates])])
+
+        min_value = float(self._min_values[min_index])
+        max_value = float(self._max_values[max_index])
+        if not np.isfinite(min_value):
+            return {"min": None, "min_index": None, "max": None, "max_index": None}
+
+        return {
+            "min": min_value,
+            "min_index": divmod(min_index, cols),
+            "max": max_value,
+            "max_index": divmod(max_index, cols),
+        }
+
+    def query(self, x0, y0, x1, y1) -> List[Dict[str, Optional[float]]]:
+        """
+        Min/max of rectangles given as inclusive matrix index bounds.
+        Positions are returned as (row, col) matrix indices.
+        """
+        x0, y0, x1, y1 = (np.atleast_1d(np.asarray(v, dtype=np.int64)) for v in (x0, y0, x1, y1))
+        return [
+            self._query_one(int(a), int(b), int(c), int(d))
+            for a, b, c, d in zip(x0, y0, x1, y1)
+        ]
+
+
+def get_range_extrema_index(matrix) -> RangeExtremaIndex:
+    """Range min/max index of a TemperatureMatrix, built lazily and cached with it"""
+    max_bytes = settings.EXTREMA_INDEX_MAX_MB * 1024 * 1024
+    return matrix.derived(
+        "range_extrema",
+        lambda: RangeExtremaIndex(matrix.data, max_bytes=max_bytes)
+    )
@@ -0,0 +1,198 @@
+# server/app/services/region_stats.py
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+
+def _bounding_box(xs: np.ndarray, ys: np.ndarray, shape) -> tuple:
+    """Integer bounding box (inclusive) clipped to the matrix"""
+    rows, cols = shape
+    x0 = max(int(np.floor(xs.min())), 0)
+    x1 = min(int(np.ceil(xs.max())), cols - 1)
+    y0 = max(int(np.floor(ys.min())), 0)
+    y1 = min(int(np.ceil(ys.max())), rows - 1)
+    return x0, x1, y0, y1
+
+
+def _line_pixels(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """Pixels covered by a polyline, one sample per pixel step along each segment"""
+    pixels = []
+    for i in range(len(xs) - 1):
+        n = int(max(abs(xs[i + 1] - xs[i]), abs(ys[i + 1] - ys[i]))) + 1
+        t = np.linspace(0.0, 1.0, n + 1)
+        px = np.rint(xs[i] + (xs[i + 1] - xs[i]) * t)
+        py = np.rint(ys[i] + (ys[i + 1] - ys[i]) * t)
+        pixels.append(np.stack([py, px], axis=1))
+    if not pixels:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(pixels).astype(np.int64), axis=0)
+
+
+def rasterize_region(
+    region_type: str,
+    points: Sequence[Dict[str, float]],
+    shape,
+    step: int = 1
+) -> np.ndarray:
+    """
+    Flat indices of the matrix pixels covered by a region.
+
+    Uses the same inclusion rules as the client viewer: rectangles are
+    floor/ceil inclusive, circles are (center, edge) with distance <= radius,
+    polygons use the even-odd rule on integer pixel positions.
+    Point coordinates are image pixels and are divided by `step`.
+    """
+    rows, cols = shape
+    if not points:
+        return np.empty(0, dtype=np.int64)
+
+    xs = np.array([p["x"] for p in points], dtype=np.float64) / step
+    ys = np.array([p["y"] for p in points], dtype=np.float64) / step
+    region_type = getattr(region_type, "value", region_type)
+
+    if region_type == "line":
+        pixels = _line_pixels(xs, ys)
+        inside = (
+            (pixels[:, 0] >= 0) & (pixels[:, 0] < rows) &
+            (pixels[:, 1] >= 0) & (pixels[:, 1] < cols)
+        )
+        pixels = pixels[inside]
+        return pixels[:, 0] * cols + pixels[:, 1]
+
+    if region_type == "circle" and len(points) >= 2:
+        radius = float(np.hypot(xs[1] - xs[0], ys[1] - ys[0]))
+        bx = np.array([xs[0] - radius, xs[0] + radius])
+        by = np.array([ys[0] - radius, ys[0] + radius])
+    else:
+        bx, by = xs, ys
+
+    x0, x1, y0, y1 = _bounding_box(bx, by, shape)
+    if x0 > x1 or y0 > y1:
+        return np.empty(0, dtype=np.int64)
+
+    gy, gx = np.mgrid[y0:y1 + 1, x0:x1 + 1]
+
+    if region_type == "rectangle":
+        mask = np.ones(gx.shape, dtype=bool)
+    elif region_type == "circle" and len(points) >= 2:
+        mask = (gx - xs[0]) ** 2 + (gy - ys[0]) ** 2 <= radius ** 2
+    elif len(points) >= 3:
+        mask = np.zeros(gx.shape, dtype=bool)
+        xj, yj = xs[-1], ys[-1]
+        for xi, yi in zip(xs, ys):
+            if yi != yj:
+                crosses = (yi > gy) != (yj > gy)
+                x_cross = (xj - xi) * (gy - yi) / (yj - yi) + xi
+                mask ^= crosses & (gx < x_cross)
+            xj, yj = xi, yi
+    else:
+        return np.empty(0, dtype=np.int64)
+
+    return (gy[mask] * cols + gx[mask]).astype(np.int64)
+
+
+def compute_region_statistics(
+    data: np.ndarray,
+    regions: Sequence[Dict[str, Any]],
+    step: int = 1
+) -> List[Dict[str, Any]]:
+    """
+    Statistics of many regions of one matrix in a single pass.
+
+    Each pixel gets a membership bitset (one bit per region, packed into
+    uint64 words). Distinct bitsets become the labels of an integer label
+    map, so overlapping regions are handled exactly. Count, sum, sum of
+    squares, min and max are reduced per label with `np.bincount` and
+    `ufunc.reduceat`, then folded back into per-region results.
+
+    `regions` items need `type` and `points`. Returns one dict per region
+    (same order) with count, sum, sum_sq, min_temp, max_temp, avg_temp, std.
+    """
+    n_regions = len(regions)
+    empty = {
+        "count": 0, "sum": 0.0, "sum_sq": 0.0,
+        "min_temp": None, "max_temp": None, "avg_temp": None, "std": None
+    }
+    if n_regions == 0:
+        return []
+
+    flat = np.asarray(data, dtype=np.float32).ravel()
+    n_words = (n_regions + 63) // 64
+    bits = np.zeros((flat.size, n_words), dtype=np.uint64)
+
+    for i, region in enumerate(regions):
+        idx = rasterize_region(region["type"], region["points"], data.shape, step)
+        bits[idx, i // 64] |= np.uint64(1) << np.uint64(i % 64)
+
+    covered = np.flatnonzero(bits.any(axis=1))
+    values = flat[covered]
+    valid = ~np.isnan(values)
+    values = values[valid].astype(np.float64)
+    if values.size == 0:
+        return [dict(empty) for _ in regions]
+
+    # Label map: one label per distinct membership bitset
+    combos, labels = np.unique(bits[covered[valid]], axis=0, return_inverse=True)
+    labels = labels.ravel()
+    n_labels = combos.shape[0]
+
+    counts = np.bincount(labels, minlength=n_labels).astype(np.float64)
+    sums = np.bincount(labels, weights=values, minlength=n_labels)
+    sums_sq = np.bincount(labels, weights=values * values, minlength=n_labels)
+
+    order = np.argsort(labels, kind="stable")
+    sorted_values = values[order]
+    starts = np.concatenate([[0], np.cumsum(counts[:-1])]).astype(np.int64)
+    mins = np.minimum.reduceat(sorted_values, starts)
+    maxs = np.maximum.reduceat(sorted_values, starts)
+
+    # membership[label, region]
+    region_ids = np.arange(n_regions)
+    words = combos[:, region_ids // 64]
+    shifts = (region_ids % 64).astype(np.uint64)
+    membership = ((words >> shifts) & np.uint64(1)).astype(bool)
+    weights = membership.astype(np.float64)
+
+    region_counts = counts @ weights
+    region_sums = sums @ weights
+    region_sums_sq = sums_sq @ weights
+    region_mins = np.where(membership, mins[:, None], np.inf).min(axis=0)
+    region_maxs = np.where(membership, maxs[:, None], -np.inf).max(axis=0)
+
+    results = []
+    for i in range(n_regions):
+        count = int(region_counts[i])
+        if count == 0:
+            results.append(dict(empty))
+            continue
+        mean = region_sums[i] / count
+        variance = max(region_sums_sq[i] / count - mean * mean, 0.0)
+        results.append({
+            "count": count,
+            "sum": float(region_sums[i]),
+            "sum_sq": float(region_sums_sq[i]),
+            "min_temp": float(region_mins[i]),
+            "max_temp": float(region_maxs[i]),
+            "avg_temp": float(mean),
+            "std": float(np.sqrt(variance)),
+        })
+    return results
+
+
+def update_region_rows(regions: Sequence[Any], data: np.ndarray, step: int = 1) -> None:
+    """
+    Recompute min/max/avg of Region rows (or any objects with type, points
+    and *_temp attributes) from a matrix in one pass. Regions that cover no
+    valid pixel keep their previous values.
+    """
+    stats = compute_region_statistics(
+        data,
+        [{"type": r.type, "points": r.points} for r in regions],
+        step=step
+    )
+    for region, region_stats in zip(regions, stats):
+        if region_stats["count"] == 0:
+            continue
+        region.min_temp = region_stats["min_temp"]
+        region.max_temp = region_stats["max_temp"]
+        region.avg_temp = region_stats["avg_temp"]
@@ -0,0 +1,226 @@
+# server/app/services/registration.py
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.services.line_profile import bilinear_sample
+
+# Spectrum bins below this fraction of the peak carry no phase information
+_SPECTRUM_FLOOR = 1e-6
+# Low-pass applied to the whitened spectrum (cycles per pixel)
+_LOWPASS_SIGMA = 0.15
+
+CoordinateTransform = Callable[[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+def scale_transform(shape_a, shape_b) -> CoordinateTransform:
+    """
+    Map matrix A pixel centres onto matrix B when only the resolution
+    differs; border centres are clamped so the outer pixels stay valid.
+    """
+    sy = shape_b[0] / shape_a[0]
+    sx = shape_b[1] / shape_a[1]
+    return lambda xs, ys: (
+        np.clip((xs + 0.5) * sx - 0.5, 0, shape_b[1] - 1),
+        np.clip((ys + 0.5) * sy - 0.5, 0, shape_b[0] - 1),
+    )
+
+
+def resample_to_grid(
+    data_b: np.ndarray,
+    shape_a: Tuple[int, int],
+    transform: Optional[CoordinateTransform] = None
+) -> np.ndarray:
+    """
+    Matrix B bilinearly resampled onto the grid of matrix A. `transform`
+    maps A matrix coordinates (x, y) to B matrix coordinates; by default
+    both matrices are assumed to cover the same field of view.
+    """
+    if transform is None:
+        if data_b.shape == tuple(shape_a):
+            return np.asarray(data_b, dtype=np.float32)
+        transform = scale_transform(shape_a, data_b.shape)
+    ys, xs = np.mgrid[0:shape_a[0], 0:shape_a[1]].astype(np.float64)
+    bx, by = transform(xs.ravel(), ys.ravel())
+    values = bilinear_sample(np.asarray(data_b, dtype=np.float64), bx, by)
+    return values.reshape(shape_a).astype(np.float32)
+
+
+def _prepare(data: np.ndarray) -> np.ndarray:
+    """Zero-mean, NaN-filled, Hann-windowed copy for FFT correlation"""
+    values = np.asarray(data, dtype=np.float64)
+    valid = ~np.isnan(values)
+    mean = values[valid].mean() if valid.any() else 0.0
+    values = np.where(valid, values - mean, 0.0)
+    window = np.outer(np.hanning(values.shape[0]), np.hanning(values.shape[1]))
+    return values * window
+
+
+def _subpixel_peak(surface: np.ndarray) -> Tuple[float, float, float]:
+    """Peak of a periodic correlation surface refined by a 3-point parabola per axis"""
+    rows, cols = surface.shape
+    r, c = np.unravel_index(int(np.argmax(surface)), surface.shape)
+    peak = float(surface[r, c])
+
+    def refine(left: float, right: float) -> float:
+        denominator = left - 2.0 * peak + right
+        return 0.0 if denominator == 0 else 0.5 * (left - right) / denominator
+
+    dr = refine(surface[(r - 1) % rows, c], surface[(r + 1) % rows, c])
+    dc = refine(surface[r, (c - 1) % cols], surface[r, (c + 1) % cols])
+    # Wrap shifts into [-n/2, n/2)
+    shift_r = (r + dr + rows / 2) % rows - rows / 2
+    shift_c = (c + dc + cols / 2) % cols - cols / 2
+    return shift_r, shift_c, peak
+
+
+def phase_correlation(reference: np.ndarray, moving: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Translation (dy, dx) with moving(p + d) ≈ reference(p), via the
+    normalised cross-power spectrum. Frequencies without energy are dropped
+    and a mild Gaussian low-pass keeps the peak smooth enough for sub-pixel
+    refinement. Also returns the peak relative to a perfect match (1.0).
+    """
+    f_ref = np.fft.rfft2(reference)
+    f_mov = np.fft.rfft2(moving)
+    cross = f_mov * np.conj(f_ref)
+    magnitude = np.abs(cross)
+    significant = magnitude > _SPECTRUM_FLOOR * magnitude.max()
+
+    fy = np.fft.fftfreq(reference.shape[0])[:, None]
+    fx = np.fft.rfftfreq(reference.shape[1])[None, :]
+    weights = np.where(significant, np.exp(-(fx ** 2 + fy ** 2) / (2.0 * _LOWPASS_SIGMA ** 2)), 0.0)
+    cross = cross / np.maximum(magnitude, 1e-300) * weights
+
+    surface = np.fft.irfft2(cross, s=reference.shape)
+    perfect = np.fft.irfft2(weights, s=reference.shape)[0, 0]
+    dy, dx, peak = _subpixel_peak(surface)
+    return dy, dx, peak / perfect if perfect > 0 else 0.0
+
+
+def _log_polar_magnitude(values: np.ndarray, n_angles: int, n_radii: int) -> Tuple[np.ndarray, float]:
+    """
+    High-pass filtered FFT magnitude resampled onto a log-polar grid over
+    half a turn (the magnitude spectrum is point-symmetric).
+    """
+    # Square FFT so frequency bins have the same scale along both axes
+    size = max(values.shape)
+    magnitude = np.abs(np.fft.fftshift(np.fft.fft2(values, s=(size, size))))
+    # Emphasise edges over the DC/low-frequency blob
+    f = np.cos(np.pi * (np.arange(size) / size - 0.5))
+    highpass = 1.0 - np.outer(f, f)
+    magnitude *= highpass * (2.0 - highpass)
+
+    centre_r = centre_c = size / 2.0
+    max_radius = size / 2.0
+    log_base = np.log(max_radius) / n_radii
+    angles = np.linspace(0.0, np.pi, n_angles, endpoint=False)
+    radii = np.exp(np.arange(n_radii) * log_base)
+    ys = centre_r + radii[None, :] * np.sin(angles)[:, None]
+    xs = centre_c + radii[None, :] * np.cos(angles)[:, None]
+    samples = bilinear_sample(magnitude, xs.ravel(), ys.ravel()).reshape(n_angles, n_radii)
+    return np.nan_to_num(samples), log_base
+
+
+def similarity_transform(
+    centre: Tuple[float, float],
+    rotation_deg: float,
+    scale: float,
+    shift: Tuple[float, float]
+) -> CoordinateTransform:
+    """p -> c + s R(θ) (p - c) + t, on (x, y) matrix coordinates"""
+    cy, cx = centre
+    theta = np.deg2rad(rotation_deg)
+    cos_t, sin_t = np.cos(theta) * scale, np.sin(theta) * scale
+    ty, tx = shift
+
+    def transform(xs: np.ndarray, ys: np.ndarray):
+        x, y = np.asarray(xs, dtype=np.float64) - cx, np.asarray(ys, dtype=np.float64) - cy
+        return cx + cos_t * x - sin_t * y + tx, cy + sin_t * x + cos_t * y + ty
+    return transform
+
+
+def register(
+    reference: np.ndarray,
+    moving: np.ndarray,
+    with_rotation: bool = False
+) -> Dict[str, Any]:
+    """
+    Align `moving` to `reference` (both already on the same grid).
+
+    Translation comes from phase correlation. With `with_rotation`, the
+    rotation and scale are first estimated by phase-correlating log-polar
+    resampled magnitude spectra (Fourier-Mellin), `moving` is de-rotated,
+    and the remaining translation is measured. The result describes the
+    similarity transform mapping reference coordinates onto `moving`.
+    """
+    ref = _prepare(reference)
+    rows, cols = ref.shape
+    centre = ((rows - 1) / 2.0, (cols - 1) / 2.0)
+    rotation, scale = 0.0, 1.0
+
+    if with_rotation:
+        n_angles, n_radii = 360, max(max(rows, cols) // 2, 16)
+        lp_ref, log_base = _log_polar_magnitude(ref, n_angles, n_radii)
+        lp_mov, _ = _log_polar_magnitude(_prepare(moving), n_angles, n_radii)
+        d_angle, d_radius, _ = phase_correlation(lp_ref, lp_mov)
+        rotation = 180.0 * d_angle / n_angles
+        scale = float(np.exp(-d_radius * log_base))
+        derotate = similarity_transform(centre, rotation, scale, (0.0, 0.0))
+        ys, xs = np.mgrid[0:rows, 0:cols].astype(np.float64)
+        mx, my = derotate(xs.ravel(), ys.ravel())
+        moving = bilinear_sample(np.asarray(moving, dtype=np.float64), mx, my).reshape(rows, cols)
+
+    dy, dx, peak = phase_correlation(ref, _prepare(moving))
+
+    # Translation measured after de-rotation lives in the rotated frame
+    theta = np.deg2rad(rotation)
+    shift_x = scale * (np.cos(theta) * dx - np.sin(theta) * dy)
+    shift_y = scale * (np.sin(theta) * dx + np.cos(theta) * dy)
+    return {
+        "dx": float(shift_x),
+        "dy": float(shift_y),
+        "rotation": float(rotation),
+        "scale": float(scale),
+        "confidence": float(peak),
+        "centre": list(centre),
+    }
+
+
+def registration_transform(matrix_a, matrix_b, registration: Dict[str, Any]) -> CoordinateTransform:
+    """Matrix A coordinates -> matrix B coordinates for a stored registration"""
+    on_grid = similarity_transform(
+        tuple(registration["centre"]), registration["rotation"], registration["scale"],
+        (registration["dy"], registration["dx"])
+    )
+    if tuple(matrix_a.shape) == tuple(matrix_b.shape):
+        return on_grid
+    sy = matrix_b.shape[0] / matrix_a.shape[0]
+    sx = matrix_b.shape[1] / matrix_a.shape[1]
+
+    def transform(xs, ys):
+        gx, gy = on_grid(xs, ys)
+        return (gx + 0.5) * sx - 0.5, (gy + 0.5) * sy - 0.5
+    return transform
+
+
+def get_registration(matrix_a, matrix_b, with_rotation: bool = False) -> Dict[str, Any]:
+    """Registration of image B onto image A, cached with matrix A per pair"""
+    def build() -> Dict[str, Any]:
+        moving = resample_to_grid(matrix_b.data, matrix_a.shape)
+        return register(matrix_a.data, moving, with_rotation)
+    return matrix_a.derived(("registration", matrix_b.token, with_rotation), build)
+
+
+def transfer_points(matrix_a, matrix_b, registration: Dict[str, Any], points) -> list:
+    """Image-pixel points of image A mapped into image B pixels"""
+    if not points:
+        return []
+    transform = registration_transform(matrix_a, matrix_b, registration)
+    xs = np.array([p["x"] for p in points], dtype=np.float64) / matrix_a.step
+    ys = np.array([p["y"] for p in points], dtype=np.float64) / matrix_a.step
+    bx, by = transform(xs, ys)
+    return [
+        {"x": round(float(x) * matrix_b.step, 2), "y": round(float(y) * matrix_b.step, 2)}
+        for x, y in zip(bx, by)
+    ]
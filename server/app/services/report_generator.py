@@ -25,6 +25,7 @@ import numpy as np
 
 from app.core.config import settings
 from app.services.file_manager import FileManager
+from app.services.temperature_stats import histogram_for_display, merge_temperature_stats
 
 class ReportGenerator:
     """Service for generating PDF and DOCX reports"""
@@ -156,15 +157,29 @@ class ReportGenerator:
             traceback.print_exc()
             return None
     
-    def _create_histogram_from_temps(self, temps: List[float], language: str = "en") -> io.BytesIO:
-        """Create a histogram from temperature array"""
+    def _create_temperature_histogram_from_stats(self, stats: Dict[str, Any], language: str = "en") -> io.BytesIO:
+        """Create a histogram from counts precomputed at ingest (no CSV parsing)"""
+        display = histogram_for_display(stats, max_bins=30)
+        if not display:
+            return None
+        edges = display["edges"]
+        return self._create_histogram_from_temps(edges[:-1], language, bins=edges, weights=display["counts"])
+    
+    def _create_histogram_from_temps(
+        self,
+        temps: List[float],
+        language: str = "en",
+        bins: Optional[List[float]] = None,
+        weights: Optional[List[float]] = None
+    ) -> io.BytesIO:
+        """Create a histogram from temperature array (or bin edges with weights)"""
         try:
             # Create figure
             fig, ax = plt.subplots(figsize=(6, 3))
             
             # Create histogram
-            n_bins = min(30, max(10, len(temps) // 100))  # Dynamic bins
-            ax.hist(temps, bins=n_bins, color='#ff6b6b', alpha=0.7, edgecolor='black')
+            n_bins = bins if bins is not None else min(30, max(10, len(temps) // 100))  # Dynamic bins
+            ax.hist(temps, bins=n_bins, weights=weights, color='#ff6b6b', alpha=0.7, edgecolor='black')
             
             # For Persian, we need to set font that supports Persian
             if language == 'fa' and self.has_persian_font:
@@ -230,6 +245,40 @@ class ReportGenerator:
             traceback.print_exc()
             return None
     
+    def _thermal_bridge_summary(self, bridges: Dict[str, Any], is_rtl: bool = False) -> str:
+        """One-line fRsi summary: temperatures, threshold, minimum and affected share"""
+        min_frsi = bridges.get('min_frsi')
+        min_text = f"{min_frsi:.2f}" if min_frsi is not None else "-"
+        share = bridges.get('below_threshold_fraction', 0) * 100
+        if is_rtl:
+            return (f"Ti = {bridges['inner_temp']:.1f}°C، Te = {bridges['outer_temp']:.1f}°C، "
+                    f"حداقل fRsi = {min_text}، زیر {bridges['threshold']:.2f}: {share:.1f}%")
+        return (f"Ti = {bridges['inner_temp']:.1f} °C, Te = {bridges['outer_temp']:.1f} °C, "
+                f"min fRsi = {min_text}, below {bridges['threshold']:.2f}: {share:.1f}% of the image")
+
+    def _anomaly_severity_text(self, severity: str, is_rtl: bool = False) -> str:
+        """One-line stored anomaly severity of an image"""
+        if is_rtl:
+            severity_fa = {"normal": "عادی", "minor": "جزئی", "intermediate": "متوسط", "serious": "جدی", "critical": "بحرانی"}
+            return f"شدت ناهنجاری: {severity_fa.get(severity, severity)}"
+        return f"Anomaly severity: {severity.capitalize()}"
+
+    def _thermal_bridge_rows(self, bridges: Dict[str, Any], is_rtl: bool = False) -> List[List[str]]:
+        """Table rows for the thermal bridge areas of an analysis"""
+        severity_fa = {"warning": "هشدار", "severe": "شدید"}
+        rows = []
+        for idx, area in enumerate(bridges.get('areas', []), 1):
+            position = f"{area['centroid']['x']:.0f}, {area['centroid']['y']:.0f}"
+            if is_rtl:
+                rows.append([position, str(area['area']), f"{area['mean_frsi']:.2f}",
+                             f"{area['min_frsi']:.2f}", severity_fa.get(area['severity'], area['severity'])])
+            else:
+                rows.append([area['severity'].capitalize(), f"{area['min_frsi']:.2f}",
+                             f"{area['mean_frsi']:.2f}", str(area['area']), position])
+        if is_rtl:
+            return [["موقعیت (X, Y)", "مساحت (px)", "میانگین fRsi", "حداقل fRsi", "شدت"]] + rows
+        return [["Severity", "Min fRsi", "Mean fRsi", "Area (px)", "Centre (X, Y)"]] + rows
+
     def _draw_table(self, canvas_obj, data: List[List[str]], x: float, y: float, col_widths: List[float], is_rtl: bool = False):
         """Draw a simple table"""
         if not data:
@@ -712,6 +761,19 @@ class ReportGenerator:
             img_title = f"تصویر {idx + 1}: {img_data.get('name', 'بدون نام')}" if is_rtl else f"Image {idx + 1}: {img_data.get('name', 'Unnamed')}"
             y = self._draw_section_header(c, img_title, y, width, is_rtl)
 
+            severity = img_data.get('anomaly_severity')
+            if severity:
+                severity_text = self._anomaly_severity_text(severity, is_rtl)
+                c.setFont(font_bold, 10)
+                if severity in ("serious", "critical"):
+                    c.setFillColorRGB(0.8, 0.1, 0.1)
+                if is_rtl:
+                    self._draw_text_right_aligned(c, severity_text, width - 50, y, is_rtl)
+                else:
+                    c.drawString(50, y, severity_text)
+                c.setFillColorRGB(0, 0, 0)
+                y -= 18
+
             # Load thermal and real images
             thermal_image = None
             real_image = None
@@ -893,32 +955,68 @@ class ReportGenerator:
                 # Draw enhanced regions table
                 y = self._draw_enhanced_table(c, region_data, 50, y, col_widths, is_rtl)
                 y -= 25
+
+            # Thermal bridges (temperature factor fRsi below threshold)
+            bridges = img_data.get('thermal_bridges')
+            if bridges:
+                if y < 200:
+                    c.showPage()
+                    page_num += 1
+                    self._draw_professional_header(c, width, height, title, is_rtl, page_num)
+                    y = height - 100
+
+                y = self._draw_section_header(c,
+                    "پل‌های حرارتی (fRsi)" if is_rtl else "Thermal Bridges (fRsi)",
+                    y, width, is_rtl)
+                summary = self._thermal_bridge_summary(bridges, is_rtl)
+                c.setFont(font_name, 9)
+                if is_rtl:
+                    self._draw_text_right_aligned(c, summary, width - 50, y, is_rtl)
+                else:
+                    c.drawString(50, y, summary)
+                y -= 18
+
+                if bridges.get('areas'):
+                    bridge_data = self._thermal_bridge_rows(bridges, is_rtl)
+                    col_widths = [70, 80, 70, 70, 100] if not is_rtl else [100, 70, 70, 80, 70]
+                    y = self._draw_enhanced_table(c, bridge_data, 50, y, col_widths, is_rtl)
+                y -= 25
         
-        # Temperature Histogram (overall - from CSV if available, otherwise from markers)
+        # Temperature Histogram (overall - stored stats, then CSV, otherwise markers)
         histogram_buffer = None
         
-        # Try to create histogram from CSV data first (more accurate)
-        for img_data in images:
-            csv_url = img_data.get('csv_url') or img_data.get('csvUrl')
-            if csv_url:
-                try:
-                    # Read CSV file
-                    import requests
-                    from pathlib import Path
+        # Histograms stored at ingest merge across all images without re-reading data
+        stored_stats = [img_data.get('temperature_stats') for img_data in images if img_data.get('temperature_stats')]
+        if stored_stats:
+            histogram_buffer = self._create_temperature_histogram_from_stats(
+                merge_temperature_stats(stored_stats), language
+            )
+            if histogram_buffer:
+                print(f"[REPORT] Histogram created from stored stats of {len(stored_stats)} image(s)")
+        
+        # Fall back to CSV data (more accurate than markers)
+        if not histogram_buffer:
+            for img_data in images:
+                csv_url = img_data.get('csv_url') or img_data.get('csvUrl')
+                if csv_url:
+                    try:
+                        # Read CSV file
+                        import requests
+                        from pathlib import Path
                     
-                    # Check if it's a local file path
-                    if csv_url.startswith('/files/'):
-                        # Local file - construct path
-                        csv_path = Path(csv_url.replace('/files/', str(Path(__file__).resolve().parents[3]) + '/'))
-                        if csv_path.exists():
-                            with open(csv_path, 'r') as f:
-                                csv_data = f.read()
-                            histogram_buffer = self._create_temperature_histogram_from_csv(csv_data, language)
-                            if histogram_buffer:
-                                print(f"[REPORT] Histogram created from CSV: {csv_url}")
-                                break
-                except Exception as e:
-                    print(f"[REPORT] Could not create histogram from CSV: {e}")
+                        # Check if it's a local file path
+                        if csv_url.startswith('/files/'):
+                            # Local file - construct path
+                            csv_path = Path(csv_url.replace('/files/', str(Path(__file__).resolve().parents[3]) + '/'))
+                            if csv_path.exists():
+                                with open(csv_path, 'r') as f:
+                                    csv_data = f.read()
+                                histogram_buffer = self._create_temperature_histogram_from_csv(csv_data, language)
+                                if histogram_buffer:
+                                    print(f"[REPORT] Histogram created from CSV: {csv_url}")
+                                    break
+                    except Exception as e:
+                        print(f"[REPORT] Could not create histogram from CSV: {e}")
         
         # Fallback to markers if CSV histogram failed
         if not histogram_buffer and markers:
@@ -1131,6 +1229,14 @@ class ReportGenerator:
                 img_heading = document.add_heading(f"Image {idx + 1}: {img_data.get('name', 'Unnamed')}", level=2)
                 img_heading.runs[0].font.color.rgb = RGBColor(50, 127, 204)
 
+                severity = img_data.get('anomaly_severity')
+                if severity:
+                    severity_para = document.add_paragraph(self._anomaly_severity_text(severity))
+                    severity_para.runs[0].font.size = Pt(10)
+                    severity_para.runs[0].font.bold = True
+                    if severity in ("serious", "critical"):
+                        severity_para.runs[0].font.color.rgb = RGBColor(204, 26, 26)
+
                 # Create table for side-by-side images
                 img_table = document.add_table(rows=2, cols=2)
                 img_table.style = 'Light Grid'
@@ -1268,6 +1374,36 @@ class ReportGenerator:
                 except Exception as e:
                     print(f"[REPORT] Error adding region {idx}: {e}")
 
+        # Thermal Bridges Section (temperature factor fRsi)
+        bridged_images = [img for img in images if img.get('thermal_bridges')]
+        if bridged_images:
+            print(f"[REPORT] Adding thermal bridges of {len(bridged_images)} images to DOCX")
+            document.add_page_break()
+
+            bridges_heading = document.add_heading("Thermal Bridges (fRsi)", level=1)
+            bridges_heading.runs[0].font.color.rgb = RGBColor(26, 77, 153)
+
+            for img_data in bridged_images:
+                bridges = img_data['thermal_bridges']
+                document.add_heading(img_data.get('name', 'Unnamed'), level=2)
+                summary_para = document.add_paragraph(self._thermal_bridge_summary(bridges))
+                summary_para.runs[0].font.size = Pt(10)
+
+                rows = self._thermal_bridge_rows(bridges)
+                if len(rows) == 1:
+                    continue
+                bridges_table = document.add_table(rows=len(rows), cols=len(rows[0]))
+                bridges_table.style = 'Medium Shading 1 Accent 1'
+                for row_idx, row in enumerate(rows):
+                    for col_idx, text in enumerate(row):
+                        cell = bridges_table.rows[row_idx].cells[col_idx]
+                        cell.text = text
+                        if row_idx == 0:
+                            for paragraph in cell.paragraphs:
+                                for run in paragraph.runs:
+                                    run.font.bold = True
+                                    run.font.color.rgb = RGBColor(255, 255, 255)
+
         # Notes Section
         if notes:
             print(f"[REPORT] Adding notes to DOCX")
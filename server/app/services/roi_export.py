@@ -0,0 +1,186 @@
+# server/app/services/roi_export.py
+import io
+import json
+import re
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from app.services.matrix_codec import encode_matrix
+from app.services.region_stats import rasterize_region
+from app.services.summed_area import rectangle_bounds
+from app.services.thermal_render import render_thermal_png
+from app.services.units import UNIT_SYMBOLS, from_celsius
+
+EXPORT_FORMATS = ("binary", "csv", "png")
+EXPORT_MEDIA_TYPES = {"binary": "application/octet-stream", "csv": "text/csv", "png": "image/png"}
+EXPORT_EXTENSIONS = {"binary": "tmat", "csv": "csv", "png": "png"}
+
+# Matrix rows formatted per CSV chunk
+_CSV_CHUNK_ROWS = 128
+
+
+class RoiCrop:
+    """
+    Rectangular crop of a temperature matrix. `data` is a view of the
+    cached matrix for rectangle crops, or a masked copy of the crop only
+    (pixels outside the region NaN) for region outlines. `row0`/`col0` is
+    the crop origin in matrix pixels.
+    """
+
+    def __init__(self, data: np.ndarray, row0: int, col0: int, step: int):
+        self.data = data
+        self.row0 = row0
+        self.col0 = col0
+        self.step = step
+
+    @property
+    def bounds(self) -> Dict[str, int]:
+        """Crop rectangle in image pixels"""
+        rows, cols = self.data.shape
+        return {
+            "x": self.col0 * self.step,
+            "y": self.row0 * self.step,
+            "width": cols * self.step,
+            "height": rows * self.step,
+        }
+
+
+def crop_rectangle(matrix, x0: float, y0: float, x1: float, y1: float) -> RoiCrop:
+    """Zero-copy crop of an image-pixel rectangle (viewer floor/ceil rule)"""
+    cx0, cy0, cx1, cy1 = (int(v[0]) for v in rectangle_bounds([{"x0": x0, "y0": y0, "x1": x1, "y1": y1}], matrix.step))
+    rows, cols = matrix.shape
+    cx0, cy0 = max(cx0, 0), max(cy0, 0)
+    cx1, cy1 = min(cx1, cols - 1), min(cy1, rows - 1)
+    if cx0 > cx1 or cy0 > cy1:
+        raise ValueError("Rectangle is outside the image")
+    return RoiCrop(matrix.data[cy0:cy1 + 1, cx0:cx1 + 1], cy0, cx0, matrix.step)
+
+
+def crop_region(matrix, region_type: str, points, mask: bool = True) -> RoiCrop:
+    """
+    Crop around a region's pixels (same inclusion rules as its statistics).
+    With `mask`, pixels of the bounding box outside the region are NaN.
+    """
+    rows, cols = matrix.shape
+    flat = rasterize_region(region_type, points or [], matrix.shape, matrix.step)
+    if flat.size == 0:
+        raise ValueError("Region covers no pixels of the image")
+    r, c = np.divmod(flat, cols)
+    r0, r1, c0, c1 = int(r.min()), int(r.max()), int(c.min()), int(c.max())
+    view = matrix.data[r0:r1 + 1, c0:c1 + 1]
+    if not mask:
+        return RoiCrop(view, r0, c0, matrix.step)
+
+    masked = np.full(view.shape, np.nan, dtype=np.float32)
+    masked[r - r0, c - c0] = view[r - r0, c - c0]
+    return RoiCrop(masked, r0, c0, matrix.step)
+
+
+def iter_csv(crop: RoiCrop, unit: str = "C") -> Iterator[bytes]:
+    """
+    Crop in the extractor's CSV layout (`Y,X,Temperature`, image pixel
+    coordinates, no rows for missing pixels), formatted in row chunks.
+    """
+    bounds = crop.bounds
+    yield (
+        f"# ROI x={bounds['x']} y={bounds['y']} width={bounds['width']} height={bounds['height']}\n"
+        f"# Unit: {UNIT_SYMBOLS[unit]}\n"
+        "Y,X,Temperature\n"
+    ).encode("utf-8")
+
+    rows, cols = crop.data.shape
+    xs = (crop.col0 + np.arange(cols)) * crop.step
+    for start in range(0, rows, _CSV_CHUNK_ROWS):
+        block = np.asarray(crop.data[start:start + _CSV_CHUNK_ROWS], dtype=np.float64)
+        r, c = np.nonzero(~np.isnan(block))
+        if r.size == 0:
+            continue
+        table = np.column_stack([(crop.row0 + start + r) * crop.step, xs[c], from_celsius(block[r, c], unit)])
+        buffer = io.StringIO()
+        np.savetxt(buffer, table, fmt=("%d", "%d", "%.2f"), delimiter=",")
+        yield buffer.getvalue().encode("utf-8")
+
+
+def render_crop(
+    crop: RoiCrop,
+    fmt: str,
+    unit: str = "C",
+    encoding: str = "int16",
+    palette: str = "iron",
+    range_: Optional[Tuple[float, float]] = None
+) -> Iterator[bytes]:
+    """
+    Chunks of one exported crop: TMAT binary (see matrix_codec), CSV, or a
+    PNG rendered over `range_` (°C; the crop's own min/max by default).
+    """
+    if fmt == "csv":
+        yield from iter_csv(crop, unit)
+    elif fmt == "binary":
+        yield encode_matrix(from_celsius(np.asarray(crop.data, dtype=np.float32), unit), encoding, crop.step)
+    elif fmt == "png":
+        valid = crop.data[~np.isnan(crop.data)]
+        lo, hi = range_ or ((float(valid.min()), float(valid.max())) if valid.size else (0.0, 1.0))
+        yield render_thermal_png(crop.data, palette, lo, hi)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+
+def safe_name(label: str) -> str:
+    """Label reduced to characters safe in file and archive names"""
+    return re.sub(r"[^\w\-. ]+", "_", label or "").strip() or "roi"
+
+
+def export_filename(label: str, fmt: str, suffix: str = "") -> str:
+    """File name for an exported crop"""
+    return f"{safe_name(label)}{suffix}.{EXPORT_EXTENSIONS[fmt]}"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable stream whose written bytes are drained as chunks"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        chunk = b"".join(self._chunks)
+        self._chunks.clear()
+        return chunk
+
+
+def stream_zip(entries: Iterable[Tuple[str, Iterable[bytes]]], manifest: Optional[Any] = None) -> Iterator[bytes]:
+    """
+    Zip archive produced while it is sent: each (name, chunks) entry is
+    deflated as its chunks arrive and only compressed bytes are buffered.
+    `manifest` is added as manifest.json at the end.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, chunks in entries:
+            # PNGs are already compressed
+            compress_type = zipfile.ZIP_STORED if name.endswith(".png") else zipfile.ZIP_DEFLATED
+            info = zipfile.ZipInfo(name)
+            info.compress_type = compress_type
+            with archive.open(info, "w") as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+        if manifest is not None:
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2, default=str))
+    yield sink.drain()
@@ -0,0 +1,95 @@
+# server/app/services/summed_area.py
+from typing import Dict, List
+
+import numpy as np
+
+
+class SummedAreaTable:
+    """
+    Integral images of T, T² and the valid-pixel count of a temperature
+    matrix. Any axis-aligned rectangle's count, sum and sum of squares (and
+    therefore mean and variance) come back in O(1), independent of its size.
+
+    Tables carry a leading row and column of zeros, so the sum over rows
+    y0..y1 and columns x0..x1 (inclusive) is
+    S[y1+1, x1+1] - S[y0, x1+1] - S[y1+1, x0] + S[y0, x0].
+    """
+
+    def __init__(self, data: np.ndarray):
+        values = np.asarray(data, dtype=np.float64)
+        valid = ~np.isnan(values)
+        values = np.where(valid, values, 0.0)
+
+        rows, cols = values.shape
+        self.shape = (rows, cols)
+        self.sum = np.zeros((rows + 1, cols + 1), dtype=np.float64)
+        self.sum_sq = np.zeros((rows + 1, cols + 1), dtype=np.float64)
+        self.count = np.zeros((rows + 1, cols + 1), dtype=np.int64)
+
+        np.cumsum(np.cumsum(values, axis=0), axis=1, out=self.sum[1:, 1:])
+        np.cumsum(np.cumsum(values * values, axis=0), axis=1, out=self.sum_sq[1:, 1:])
+        np.cumsum(np.cumsum(valid, axis=0, dtype=np.int64), axis=1, out=self.count[1:, 1:])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.sum.nbytes + self.sum_sq.nbytes + self.count.nbytes)
+
+    @staticmethod
+    def _box(table: np.ndarray, y0, x0, y1, x1) -> np.ndarray:
+        return table[y1 + 1, x1 + 1] - table[y0, x1 + 1] - table[y1 + 1, x0] + table[y0, x0]
+
+    def query(self, x0, y0, x1, y1) -> Dict[str, np.ndarray]:
+        """
+        Statistics of rectangles given as inclusive matrix index bounds.
+        Accepts scalars or equally-shaped arrays (vectorized over rectangles);
+        bounds are clipped to the matrix.
+        """
+        rows, cols = self.shape
+        x0, y0, x1, y1 = (np.asarray(v, dtype=np.int64) for v in (x0, y0, x1, y1))
+        x0, x1 = np.minimum(x0, x1), np.maximum(x0, x1)
+        y0, y1 = np.minimum(y0, y1), np.maximum(y0, y1)
+        outside = (x1 < 0) | (y1 < 0) | (x0 >= cols) | (y0 >= rows)
+
+        x0, x1 = np.clip(x0, 0, cols - 1), np.clip(x1, 0, cols - 1)
+        y0, y1 = np.clip(y0, 0, rows - 1), np.clip(y1, 0, rows - 1)
+
+        count = np.where(outside, 0, self._box(self.count, y0, x0, y1, x1))
+        total = np.where(outside, 0.0, self._box(self.sum, y0, x0, y1, x1))
+        total_sq = np.where(outside, 0.0, self._box(self.sum_sq, y0, x0, y1, x1))
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, total / count, np.nan)
+            variance = np.where(count > 0, np.maximum(total_sq / count - mean * mean, 0.0), np.nan)
+
+        return {
+            "count": count,
+            "pixels": np.where(outside, 0, (x1 - x0 + 1) * (y1 - y0 + 1)),
+            "sum": total,
+            "sum_sq": total_sq,
+            "mean": mean,
+            "variance": variance,
+        }
+
+
+def get_summed_area_table(matrix) -> SummedAreaTable:
+    """Summed-area table of a TemperatureMatrix, built once and cached with it"""
+    return matrix.derived("summed_area", lambda: SummedAreaTable(matrix.data))
+
+
+def rectangle_bounds(rectangles: List[Dict[str, float]], step: int = 1):
+    """
+    Convert image-pixel rectangles ({x0, y0, x1, y1}) to inclusive matrix
+    index bounds, using the viewer's floor/ceil rule.
+    """
+    coords = np.array(
+        [[r["x0"], r["y0"], r["x1"], r["y1"]] for r in rectangles],
+        dtype=np.float64
+    ).reshape(-1, 4) / step
+    xa, xb = np.minimum(coords[:, 0], coords[:, 2]), np.maximum(coords[:, 0], coords[:, 2])
+    ya, yb = np.minimum(coords[:, 1], coords[:, 3]), np.maximum(coords[:, 1], coords[:, 3])
+    return (
+        np.floor(xa).astype(np.int64),
+        np.floor(ya).astype(np.int64),
+        np.ceil(xb).astype(np.int64),
+        np.ceil(yb).astype(np.int64),
+    )
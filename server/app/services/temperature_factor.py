@@ -0,0 +1,109 @@
+# server/app/services/temperature_factor.py
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.labeling import component_stats, label_components
+
+
+def temperature_factor_map(data: np.ndarray, inner_temp: float, outer_temp: float) -> np.ndarray:
+    """Per-pixel fRsi = (Tsi - Te) / (Ti - Te); NaN where there is no data"""
+    span = inner_temp - outer_temp
+    if span == 0:
+        raise ValueError("Inner and outer temperature must differ")
+    return ((np.asarray(data, dtype=np.float32) - np.float32(outer_temp)) / np.float32(span)).astype(np.float32)
+
+
+def thermal_bridge_areas(
+    frsi: np.ndarray,
+    threshold: float,
+    severe_threshold: float,
+    min_area: int = 4,
+    top_k: int = 20,
+    step: int = 1
+) -> list:
+    """
+    Connected areas with fRsi below `threshold`, worst (lowest fRsi) first,
+    rated "severe" when they reach below `severe_threshold` and "warning"
+    otherwise. `min_area`, boxes and areas are in image pixels.
+    """
+    with np.errstate(invalid="ignore"):
+        mask = frsi < threshold
+    labels, n = label_components(mask)
+    areas = []
+    for comp in component_stats(labels, n, frsi):
+        area = comp["area"] * step * step
+        if area < min_area or comp["min"] is None:
+            continue
+        areas.append({
+            "severity": "severe" if comp["min"] < severe_threshold else "warning",
+            "area": area,
+            "min_frsi": comp["min"],
+            "mean_frsi": comp["mean"],
+            "x": comp["col_min"] * step,
+            "y": comp["row_min"] * step,
+            "width": (comp["col_max"] - comp["col_min"] + 1) * step,
+            "height": (comp["row_max"] - comp["row_min"] + 1) * step,
+            "centroid": {"x": comp["centroid_col"] * step, "y": comp["centroid_row"] * step},
+        })
+    areas.sort(key=lambda a: (a["min_frsi"], -a["area"]))
+    return areas[:top_k]
+
+
+def compute_temperature_factor(
+    data: np.ndarray,
+    inner_temp: float,
+    outer_temp: float,
+    threshold: Optional[float] = None,
+    severe_threshold: Optional[float] = None,
+    min_area: int = 4,
+    top_k: int = 20,
+    step: int = 1
+) -> Dict[str, Any]:
+    """fRsi statistics of a surface temperature matrix plus its thermal bridge areas"""
+    threshold = settings.FRSI_THRESHOLD if threshold is None else threshold
+    severe_threshold = settings.FRSI_SEVERE_THRESHOLD if severe_threshold is None else severe_threshold
+    frsi = temperature_factor_map(data, inner_temp, outer_temp)
+    valid = frsi[~np.isnan(frsi)]
+
+    with np.errstate(invalid="ignore"):
+        below = int(np.count_nonzero(valid < threshold))
+        severe = int(np.count_nonzero(valid < severe_threshold))
+    return {
+        "inner_temp": inner_temp,
+        "outer_temp": outer_temp,
+        "threshold": threshold,
+        "severe_threshold": severe_threshold,
+        "min_frsi": float(valid.min()) if valid.size else None,
+        "mean_frsi": float(valid.mean()) if valid.size else None,
+        "p5_frsi": float(np.percentile(valid, 5)) if valid.size else None,
+        "below_threshold_pixels": below * step * step,
+        "below_threshold_fraction": float(below / valid.size) if valid.size else 0.0,
+        "severe_pixels": severe * step * step,
+        "areas": thermal_bridge_areas(frsi, threshold, severe_threshold, min_area, top_k, step),
+    }
+
+
+def get_temperature_factor(
+    matrix,
+    data: np.ndarray,
+    inner_temp: float,
+    outer_temp: float,
+    threshold: Optional[float] = None,
+    severe_threshold: Optional[float] = None,
+    min_area: int = 4,
+    top_k: int = 20,
+    variant: Any = None
+) -> Dict[str, Any]:
+    """
+    Thermal bridge analysis of a matrix (or of `data` derived from it,
+    identified by `variant`), cached per parameter set.
+    """
+    key = (
+        "temperature_factor", variant, round(inner_temp, 2), round(outer_temp, 2),
+        threshold, severe_threshold, min_area, top_k
+    )
+    return matrix.derived(key, lambda: compute_temperature_factor(
+        data, inner_temp, outer_temp, threshold, severe_threshold, min_area, top_k, matrix.step
+    ))
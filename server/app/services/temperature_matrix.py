@@ -0,0 +1,273 @@
+# server/app/services/temperature_matrix.py
+import itertools
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.file_manager import FileManager
+from app.services.units import CANONICAL_UNIT, normalize_unit, to_celsius
+
+# Root of the repository: extractor output lives in <root>/projects
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+# Unique id per loaded matrix, used to key caches that span two matrices
+_matrix_tokens = itertools.count(1)
+
+
+class TemperatureMatrix:
+    """
+    Temperature matrix of a single thermal image.
+
+    `data` is a float32 array of shape (rows, cols) with NaN for invalid
+    pixels. When the extractor reduced the CSV resolution, `step` holds the
+    reduction factor so that image pixel coordinates map to `coord / step`.
+    """
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        step: int = 1,
+        unit: str = CANONICAL_UNIT,
+        source_path: Optional[Path] = None
+    ):
+        self.data = data
+        self.step = step
+        self.unit = unit
+        self.source_path = source_path
+        self.token = next(_matrix_tokens)
+        self._derived: "OrderedDict[Hashable, Tuple[int, Any]]" = OrderedDict()
+        self._derived_nbytes = 0
+        self._lock = threading.RLock()
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.data.shape
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes)
+
+    def derived(self, key: Hashable, builder: Callable[[], Any]) -> Any:
+        """
+        Memoize data derived from this matrix (indexes, masks, renders).
+
+        Entries live as long as the matrix stays cached and are evicted
+        least-recently-used first once settings.MATRIX_DERIVED_CACHE_MB is
+        exceeded.
+        """
+        with self._lock:
+            entry = self._derived.get(key)
+            if entry is not None:
+                self._derived.move_to_end(key)
+                return entry[1]
+
+            value = builder()
+            size = _estimate_nbytes(value)
+            budget = settings.MATRIX_DERIVED_CACHE_MB * 1024 * 1024
+            if size > budget:
+                return value
+
+            self._derived[key] = (size, value)
+            self._derived_nbytes += size
+            while self._derived_nbytes > budget:
+                _, (evicted_size, _) = self._derived.popitem(last=False)
+                self._derived_nbytes -= evicted_size
+            return value
+
+
+def _estimate_nbytes(value: Any) -> int:
+    """Approximate memory held by a derived cache entry"""
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_estimate_nbytes(v) for v in value.values())
+    return 64
+
+
+def resolve_data_path(url: Optional[str]) -> Optional[Path]:
+    """
+    Resolve a stored file URL (e.g. csv_url) to a path on disk.
+
+    Extractor output is served from <root>/projects, bulk-saved files from
+    settings.PROJECTS_DIR; both are tried.
+    """
+    if not url:
+        return None
+
+    url = url.split("?")[0]
+    if url.startswith("/files/"):
+        candidate = REPO_ROOT / url[len("/files/"):]
+        if candidate.exists():
+            return candidate
+
+    candidate = Path(url)
+    if candidate.is_absolute() and candidate.exists():
+        return candidate
+
+    return FileManager().get_file_path(url)
+
+
+MATRIX_SUFFIX = ".matrix.npy"
+
+
+def _meta_path(npy_path: Path) -> Path:
+    """JSON descriptor next to a matrix sidecar (x.matrix.npy -> x.matrix.json)"""
+    return npy_path.with_suffix(".json")
+
+
+def _sidecar_paths(csv_path: Path) -> Tuple[Path, Path]:
+    """Paths of the binary matrix sidecar and its JSON descriptor"""
+    if csv_path.name.endswith(MATRIX_SUFFIX):
+        # Matrix-only source (e.g. a stitched mosaic): the sidecar itself
+        return csv_path, _meta_path(csv_path)
+    npy_path = csv_path.with_name(csv_path.name + MATRIX_SUFFIX)
+    return npy_path, _meta_path(npy_path)
+
+
+def write_matrix_meta(npy_path: Path, step: int, shape: Tuple[int, int], **extra: Any) -> None:
+    """Write the JSON descriptor (step, unit, shape and extras) of a matrix sidecar"""
+    with open(_meta_path(npy_path), "w", encoding="utf-8") as f:
+        json.dump({"step": step, "unit": CANONICAL_UNIT, "shape": list(shape), **extra}, f)
+
+
+def parse_temperature_csv(csv_path: Path) -> TemperatureMatrix:
+    """
+    Parse an extractor CSV (`Y,X,Temperature` rows with `#` comment lines)
+    into a dense matrix in Celsius (Fahrenheit and Kelvin exports are converted).
+    """
+    unit = "C"
+    rows = []
+    with open(csv_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            first = line[:1]
+            if first.isdigit():
+                rows.append(line)
+            elif first == "#" and "Unit:" in line:
+                label = line.split("Unit:", 1)[1]
+                try:
+                    unit = normalize_unit(label)
+                except ValueError:
+                    # Mis-decoded degree sign (e.g. "Â°F")
+                    unit = "F" if "F" in label else "K" if "K" in label else CANONICAL_UNIT
+
+    if not rows:
+        raise ValueError(f"No temperature rows in {csv_path}")
+
+    table = np.loadtxt(rows, delimiter=",", dtype=np.float64, ndmin=2)
+    ys = table[:, 0].astype(np.int64)
+    xs = table[:, 1].astype(np.int64)
+    temps = table[:, 2]
+
+    # Extractor writes every `step`-th pixel for very large images
+    unique_xs = np.unique(xs)
+    step = int(np.min(np.diff(unique_xs))) if unique_xs.size > 1 else 1
+
+    rows_count = int(ys.max()) // step + 1
+    cols_count = int(xs.max()) // step + 1
+    data = np.full((rows_count, cols_count), np.nan, dtype=np.float32)
+    data[ys // step, xs // step] = temps
+
+    if unit != CANONICAL_UNIT:
+        # Matrices are kept in Celsius; other units are converted on read
+        data = to_celsius(data, unit).astype(np.float32)
+
+    return TemperatureMatrix(data, step=step, unit=CANONICAL_UNIT, source_path=csv_path)
+
+
+def load_temperature_matrix(csv_path: Path) -> TemperatureMatrix:
+    """
+    Load a temperature matrix, preferring the memory-mapped .npy sidecar.
+    The sidecar is (re)written whenever it is missing or older than the CSV.
+    A `.matrix.npy` path is a matrix without CSV and is mapped directly.
+    """
+    npy_path, meta_path = _sidecar_paths(csv_path)
+    csv_mtime = csv_path.stat().st_mtime
+
+    if npy_path == csv_path:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return TemperatureMatrix(np.load(npy_path, mmap_mode="r"), step=meta.get("step", 1), source_path=csv_path)
+
+    if npy_path.exists() and meta_path.exists() and npy_path.stat().st_mtime >= csv_mtime:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            # Sidecars written before canonical Celsius storage are rebuilt
+            if meta.get("unit", CANONICAL_UNIT) == CANONICAL_UNIT:
+                data = np.load(npy_path, mmap_mode="r")
+                return TemperatureMatrix(data, step=meta.get("step", 1), source_path=csv_path)
+        except Exception as e:
+            print(f"[MATRIX] Ignoring unreadable sidecar {npy_path}: {e}")
+
+    matrix = parse_temperature_csv(csv_path)
+
+    try:
+        np.save(npy_path, matrix.data)
+        write_matrix_meta(npy_path, matrix.step, matrix.shape)
+    except OSError as e:
+        print(f"[MATRIX] Could not write sidecar for {csv_path}: {e}")
+
+    return matrix
+
+
+class MatrixCache:
+    """
+    In-process LRU cache of decoded temperature matrices, keyed by file path
+    and invalidated when the file changes on disk.
+    """
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, TemperatureMatrix]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> TemperatureMatrix:
+        key = str(path)
+        mtime = os.path.getmtime(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == mtime:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        matrix = load_temperature_matrix(path)
+
+        with self._lock:
+            self._entries[key] = (mtime, matrix)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return matrix
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(path), None)
+
+
+matrix_cache = MatrixCache(max_entries=settings.MATRIX_CACHE_SIZE)
+
+
+def get_image_matrix(image) -> TemperatureMatrix:
+    """
+    Return the cached temperature matrix of a ThermalImage.
+    Raises FileNotFoundError if the image has no temperature data on disk.
+    """
+    path = resolve_data_path(image.csv_url)
+    if not path or not path.exists():
+        raise FileNotFoundError(f"Temperature data not found for image {image.id}")
+    return matrix_cache.get(path)
@@ -0,0 +1,217 @@
+# server/app/services/temperature_stats.py
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.quantile_sketch import build_digest, digest_cdf, digest_quantiles, merge_digests
+from app.services.temperature_matrix import get_image_matrix
+
+# 2: adds the t-digest
+STATS_VERSION = 2
+PERCENTILES = (1, 5, 10, 25, 50, 75, 90, 95, 99)
+
+
+def _bin_width_for(lo: float, hi: float, base_width: float, max_bins: int) -> float:
+    """Smallest base_width * 2^n that keeps [lo, hi] within max_bins bins"""
+    width = base_width
+    while (np.floor(hi / width) - np.floor(lo / width) + 1) > max_bins:
+        width *= 2.0
+    return width
+
+
+def compute_temperature_stats(
+    data: np.ndarray,
+    step: int = 1,
+    bin_width: Optional[float] = None,
+    max_bins: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Summary of a temperature matrix, computed once at ingest.
+
+    Holds exact min/max/mean/std, NaN count, exact percentiles, a
+    histogram on an absolute bin grid (bin k covers [k*w, (k+1)*w)), so
+    histograms of different images line up and merge by adding counts,
+    and a t-digest for accurate quantiles of merged stats.
+    Counts, sums and the NaN count are in full-resolution pixels: a
+    downsampled matrix (step > 1) weighs each sample step² times.
+    """
+    bin_width = bin_width or settings.HISTOGRAM_BIN_WIDTH
+    max_bins = max_bins or settings.HISTOGRAM_MAX_BINS
+    weight = step * step
+
+    flat = np.asarray(data, dtype=np.float64).ravel()
+    valid = flat[~np.isnan(flat)]
+    stats: Dict[str, Any] = {
+        "version": STATS_VERSION,
+        "step": step,
+        "count": int(valid.size) * weight,
+        "nan_count": int(flat.size - valid.size) * weight,
+        "min": None,
+        "max": None,
+        "mean": None,
+        "std": None,
+        "sum": 0.0,
+        "sum_sq": 0.0,
+        "percentiles": {},
+        "histogram": {"bin_width": bin_width, "start": 0, "counts": []},
+        "digest": None,
+    }
+    if valid.size == 0:
+        return stats
+
+    lo, hi = float(valid.min()), float(valid.max())
+    bin_width = _bin_width_for(lo, hi, bin_width, max_bins)
+    bins = np.floor(valid / bin_width).astype(np.int64)
+    start = int(bins.min())
+    counts = np.bincount(bins - start) * weight
+
+    mean = float(valid.mean())
+    stats.update({
+        "min": lo,
+        "max": hi,
+        "mean": mean,
+        "std": float(valid.std()),
+        "sum": float(valid.sum()) * weight,
+        "sum_sq": float(np.dot(valid, valid)) * weight,
+        "percentiles": {
+            f"p{q}": float(v) for q, v in zip(PERCENTILES, np.percentile(valid, PERCENTILES))
+        },
+        "histogram": {"bin_width": bin_width, "start": start, "counts": counts.tolist()},
+        "digest": build_digest(valid, weight),
+    })
+    return stats
+
+
+def _rebin(histogram: Dict[str, Any], width: float) -> Dict[str, Any]:
+    """Re-aggregate an absolute-grid histogram onto a coarser grid"""
+    counts = np.asarray(histogram["counts"], dtype=np.int64)
+    if not counts.size or np.isclose(histogram["bin_width"], width):
+        return {"bin_width": width, "start": histogram["start"], "counts": counts}
+    centers = (histogram["start"] + np.arange(counts.size) + 0.5) * histogram["bin_width"]
+    bins = np.floor(centers / width).astype(np.int64)
+    start = int(bins.min())
+    return {"bin_width": width, "start": start, "counts": np.bincount(bins - start, weights=counts).astype(np.int64)}
+
+
+def histogram_percentiles(histogram: Dict[str, Any], percentiles: Sequence[float] = PERCENTILES) -> Dict[str, float]:
+    """Percentiles from histogram counts, interpolated linearly inside bins"""
+    counts = np.asarray(histogram["counts"], dtype=np.float64)
+    total = counts.sum()
+    if total == 0:
+        return {}
+    width = histogram["bin_width"]
+    edges = (histogram["start"] + np.arange(counts.size + 1)) * width
+    cumulative = np.concatenate([[0.0], np.cumsum(counts)])
+    values = np.interp(np.asarray(percentiles, dtype=np.float64) / 100.0 * total, cumulative, edges)
+    return {f"p{q:g}": float(v) for q, v in zip(percentiles, values)}
+
+
+def merge_temperature_stats(items: Sequence[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Combine per-image stats into one (e.g. for a project). Counts, sums and
+    extremes are exact; percentiles come from the merged t-digest, or from
+    the merged histogram when an item has no digest. Memory is bounded by
+    histogram and digest sizes, independent of the pixel count.
+    """
+    items = [s for s in items if s and s.get("count")]
+    width = max((s["histogram"]["bin_width"] for s in items), default=settings.HISTOGRAM_BIN_WIDTH)
+    merged: Dict[str, Any] = {
+        "version": STATS_VERSION,
+        "images": len(items),
+        "count": sum(s["count"] for s in items),
+        "nan_count": sum(s.get("nan_count", 0) for s in items),
+        "min": min((s["min"] for s in items), default=None),
+        "max": max((s["max"] for s in items), default=None),
+        "mean": None,
+        "std": None,
+        "sum": float(sum(s["sum"] for s in items)),
+        "sum_sq": float(sum(s["sum_sq"] for s in items)),
+        "percentiles": {},
+        "histogram": {"bin_width": width, "start": 0, "counts": []},
+        "digest": None,
+    }
+    if not items:
+        return merged
+
+    hists = [_rebin(s["histogram"], width) for s in items]
+    hists = [h for h in hists if len(h["counts"])]
+    start = min(h["start"] for h in hists)
+    end = max(h["start"] + len(h["counts"]) for h in hists)
+    counts = np.zeros(end - start, dtype=np.int64)
+    for h in hists:
+        offset = h["start"] - start
+        counts[offset:offset + len(h["counts"])] += h["counts"]
+
+    mean = merged["sum"] / merged["count"]
+    merged["mean"] = mean
+    merged["std"] = float(np.sqrt(max(merged["sum_sq"] / merged["count"] - mean * mean, 0.0)))
+    merged["histogram"] = {"bin_width": width, "start": start, "counts": counts.tolist()}
+    if all(s.get("digest") for s in items):
+        merged["digest"] = merge_digests(s["digest"] for s in items)
+        merged["percentiles"] = {
+            f"p{q:g}": value
+            for q, value in zip(PERCENTILES, digest_quantiles(
+                merged["digest"], [q / 100.0 for q in PERCENTILES], merged["min"], merged["max"]
+            ).values())
+        }
+    else:
+        merged["percentiles"] = histogram_percentiles(merged["histogram"])
+    return merged
+
+
+def histogram_for_display(stats: Dict[str, Any], max_bins: int = 30) -> Optional[Dict[str, List[float]]]:
+    """Stored histogram coarsened to at most `max_bins` bars: {edges, counts}"""
+    histogram = stats.get("histogram") if stats else None
+    if not histogram or not histogram.get("counts"):
+        return None
+    width = histogram["bin_width"]
+    n = len(histogram["counts"])
+    factor = max(int(np.ceil(n / max_bins)), 1)
+    coarse = _rebin(histogram, width * factor) if factor > 1 else histogram
+    counts = np.asarray(coarse["counts"], dtype=np.int64)
+    edges = (coarse["start"] + np.arange(counts.size + 1)) * coarse["bin_width"]
+    return {"edges": edges.tolist(), "counts": counts.tolist()}
+
+
+def get_image_temperature_stats(image) -> Optional[Dict[str, Any]]:
+    """
+    Stored stats of an image; images ingested before stats (or before the
+    current stats version) existed are computed from their matrix and
+    written back onto the row (the caller commits). Outdated stats are
+    kept when the matrix is gone. Returns None when the image has no
+    temperature data.
+    """
+    stats = image.temperature_stats
+    if stats and stats.get("version") == STATS_VERSION:
+        return stats
+    try:
+        matrix = get_image_matrix(image)
+    except (FileNotFoundError, ValueError):
+        return stats or None
+    image.temperature_stats = compute_temperature_stats(matrix.data, matrix.step)
+    return image.temperature_stats
+
+
+def stats_quantiles(stats: Dict[str, Any], quantiles: Sequence[float]) -> Dict[str, float]:
+    """Quantiles (0..1) of stored or merged stats: from the t-digest, else the histogram"""
+    if not stats.get("count"):
+        return {}
+    if stats.get("digest"):
+        return digest_quantiles(stats["digest"], quantiles, stats["min"], stats["max"])
+    values = histogram_percentiles(stats["histogram"], [q * 100.0 for q in quantiles]).values()
+    return {f"{q:g}": value for q, value in zip(quantiles, values)}
+
+
+def stats_cdf(stats: Dict[str, Any], thresholds: Sequence[float]) -> Dict[str, float]:
+    """Fraction of valid pixels at or below each threshold, from the t-digest else the histogram"""
+    if not stats.get("count"):
+        return {}
+    if stats.get("digest"):
+        return digest_cdf(stats["digest"], thresholds, stats["min"], stats["max"])
+    histogram = stats["histogram"]
+    counts = np.asarray(histogram["counts"], dtype=np.float64)
+    edges = (histogram["start"] + np.arange(counts.size + 1)) * histogram["bin_width"]
+    cumulative = np.concatenate([[0.0], np.cumsum(counts)]) / counts.sum()
+    values = np.interp(np.asarray(thresholds, dtype=np.float64), edges, cumulative)
+    return {f"{t:g}": float(v) for t, v in zip(thresholds, values)}
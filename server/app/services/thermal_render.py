@@ -0,0 +1,128 @@
+# server/app/services/thermal_render.py
+import io
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.services.temperature_stats import histogram_percentiles
+
+# Palette anchors, cold to hot (iron matches the extractor's FLIR-like palette)
+_PALETTE_ANCHORS = {
+    "iron": [[0, 0, 0], [32, 0, 140], [145, 0, 160], [230, 60, 30], [255, 160, 0], [255, 230, 80], [255, 255, 255]],
+    "rainbow": [[0, 0, 130], [0, 60, 255], [0, 220, 255], [80, 255, 80], [255, 230, 0], [255, 60, 0], [160, 0, 0]],
+    "grayscale": [[0, 0, 0], [255, 255, 255]],
+}
+
+RANGE_MODES = ("auto", "custom", "percentile", "equalize")
+
+
+def _palette_lut(anchors, size: int = 256) -> np.ndarray:
+    anchors = np.asarray(anchors, dtype=np.float64)
+    positions = np.linspace(0.0, 1.0, len(anchors))
+    t = np.linspace(0.0, 1.0, size)
+    return np.stack([np.interp(t, positions, anchors[:, ch]) for ch in range(3)], axis=1).astype(np.uint8)
+
+
+PALETTES = {name: _palette_lut(anchors) for name, anchors in _PALETTE_ANCHORS.items()}
+
+
+def resolve_range(
+    stats: Dict[str, Any],
+    mode: str = "auto",
+    min_temp: Optional[float] = None,
+    max_temp: Optional[float] = None,
+    low_percentile: float = 1.0,
+    high_percentile: float = 99.0
+) -> Tuple[float, float]:
+    """
+    Display range from the stored image stats: full range ("auto" and
+    "equalize"), explicit bounds falling back to the full range ("custom"),
+    or percentiles of the stored histogram ("percentile").
+    """
+    lo, hi = stats["min"], stats["max"]
+    if mode == "custom":
+        lo = lo if min_temp is None else min_temp
+        hi = hi if max_temp is None else max_temp
+    elif mode == "percentile":
+        values = histogram_percentiles(stats["histogram"], [low_percentile, high_percentile])
+        if values:
+            lo, hi = values[f"p{low_percentile:g}"], values[f"p{high_percentile:g}"]
+    return float(min(lo, hi)), float(max(lo, hi))
+
+
+def equalization_curve(stats: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Bin edges and normalised cumulative counts of the stored histogram"""
+    histogram = stats["histogram"]
+    counts = np.asarray(histogram["counts"], dtype=np.float64)
+    edges = (histogram["start"] + np.arange(counts.size + 1)) * histogram["bin_width"]
+    cumulative = np.concatenate([[0.0], np.cumsum(counts)])
+    return edges, cumulative / max(cumulative[-1], 1.0)
+
+
+def colorize(
+    data: np.ndarray,
+    palette: str,
+    lo: float,
+    hi: float,
+    curve: Optional[Tuple[np.ndarray, np.ndarray]] = None
+) -> np.ndarray:
+    """
+    Temperatures as an RGBA array: linear over [lo, hi], or through the
+    histogram equalization `curve`. Pixels without data are transparent.
+    """
+    lut = PALETTES[palette]
+    values = np.asarray(data, dtype=np.float32)
+    nan = np.isnan(values)
+    if curve is not None:
+        t = np.interp(values, curve[0], curve[1])
+    else:
+        with np.errstate(invalid="ignore"):
+            t = (values - np.float32(lo)) / np.float32(max(hi - lo, 1e-6))
+    index = np.where(nan, 0, np.rint(np.clip(t, 0.0, 1.0) * (len(lut) - 1))).astype(np.intp)
+
+    rgba = np.empty(values.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = lut[index]
+    rgba[..., 3] = np.where(nan, 0, 255)
+    return rgba
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, "RGBA" if rgba.shape[-1] == 4 else "RGB").save(buffer, format="PNG", optimize=False)
+    return buffer.getvalue()
+
+
+def render_thermal_png(
+    data: np.ndarray,
+    palette: str,
+    lo: float,
+    hi: float,
+    curve: Optional[Tuple[np.ndarray, np.ndarray]] = None
+) -> bytes:
+    """Temperature matrix rendered as an RGBA PNG (see colorize)"""
+    return encode_png(colorize(data, palette, lo, hi, curve))
+
+
+def get_thermal_render(
+    matrix,
+    stats: Dict[str, Any],
+    palette: str = "iron",
+    mode: str = "auto",
+    min_temp: Optional[float] = None,
+    max_temp: Optional[float] = None,
+    low_percentile: float = 1.0,
+    high_percentile: float = 99.0
+) -> Dict[str, Any]:
+    """
+    Rendered PNG of a matrix with the resolved display range, cached per
+    (palette, range mode, range). Ranges come from the stored histogram, so
+    a range change costs one LUT pass over the matrix.
+    """
+    lo, hi = resolve_range(stats, mode, min_temp, max_temp, low_percentile, high_percentile)
+    key = ("thermal_render", palette, mode, round(lo, 3), round(hi, 3))
+
+    def build() -> Dict[str, Any]:
+        curve = equalization_curve(stats) if mode == "equalize" else None
+        return {"png": render_thermal_png(matrix.data, palette, lo, hi, curve), "min": lo, "max": hi}
+    return matrix.derived(key, build)
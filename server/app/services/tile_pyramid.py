@@ -0,0 +1,173 @@
+# server/app/services/tile_pyramid.py
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services.temperature_matrix import MATRIX_SUFFIX
+
+TILE_SIZE = 256
+AGGREGATES = ("mean", "min", "max")
+
+
+def _downsample(level: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    2x2 reduction of one pyramid level. Sums and counts are carried so
+    means stay exact; fmin/fmax skip NaN pixels. Odd edges are padded.
+    """
+    rows, cols = level["sum"].shape
+    pad = ((0, rows % 2), (0, cols % 2))
+
+    def blocks(values: np.ndarray, fill) -> np.ndarray:
+        padded = np.pad(values, pad, constant_values=fill)
+        return padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2)
+
+    total = blocks(level["sum"], 0.0).sum(axis=(1, 3))
+    count = blocks(level["count"], 0).sum(axis=(1, 3))
+    low = np.fmin.reduce(np.fmin.reduce(blocks(level["min"], np.nan), axis=3), axis=1)
+    high = np.fmax.reduce(np.fmax.reduce(blocks(level["max"], np.nan), axis=3), axis=1)
+    return {"sum": total, "count": count, "min": low, "max": high}
+
+
+class TilePyramid:
+    """
+    Multi-resolution view of a temperature matrix for zoom and pan.
+
+    Level 0 is the matrix itself; level k averages 2^k x 2^k pixels and also
+    keeps their min and max, so zoomed-out tiles do not hide hotspots.
+    Levels are added until the whole matrix fits into a single tile.
+    """
+
+    def __init__(self, data: np.ndarray, tile_size: int = TILE_SIZE):
+        self.tile_size = tile_size
+        values = np.asarray(data, dtype=np.float32)
+        valid = ~np.isnan(values)
+        base = {
+            "sum": np.where(valid, values, 0.0).astype(np.float64),
+            "count": valid.astype(np.int32),
+            "min": values,
+            "max": values,
+        }
+
+        self.levels: List[Dict[str, np.ndarray]] = []
+        level = base
+        while True:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = (level["sum"] / level["count"]).astype(np.float32)
+            self.levels.append({"mean": mean, "min": level["min"], "max": level["max"]})
+            rows, cols = mean.shape
+            if rows <= tile_size and cols <= tile_size:
+                break
+            level = _downsample(level)
+
+        self.nbytes = sum(a.nbytes for lvl in self.levels for a in lvl.values())
+
+    @classmethod
+    def from_levels(cls, levels: List[Dict[str, np.ndarray]], tile_size: int = TILE_SIZE) -> "TilePyramid":
+        """Pyramid over already reduced levels (e.g. memory-mapped from disk)"""
+        pyramid = cls.__new__(cls)
+        pyramid.tile_size = tile_size
+        pyramid.levels = levels
+        # Mapped levels are paged in by the OS, not held by the cache
+        pyramid.nbytes = sum(
+            a.nbytes for lvl in levels for a in lvl.values() if not isinstance(a, np.memmap)
+        )
+        return pyramid
+
+    def level_info(self, step: int = 1) -> List[Dict[str, Any]]:
+        """
+        Shape, tile grid and min/max/mean aggregate of every level. Block
+        means of partially valid and edge blocks would be over-weighted, so
+        the mean is the exact pixel mean of level 0 (the same at every level).
+        """
+        base = self.levels[0]["mean"]
+        valid = ~np.isnan(base)
+        mean_temp = float(np.mean(base[valid], dtype=np.float64)) if valid.any() else None
+        info = []
+        for index, level in enumerate(self.levels):
+            rows, cols = level["mean"].shape
+            any_valid = not np.all(np.isnan(level["mean"]))
+            info.append({
+                "level": index,
+                "scale": 1.0 / (2 ** index),
+                "pixel_size": step * (2 ** index),
+                "rows": rows,
+                "cols": cols,
+                "tiles_x": -(-cols // self.tile_size),
+                "tiles_y": -(-rows // self.tile_size),
+                "min_temp": float(np.nanmin(level["min"])) if any_valid else None,
+                "max_temp": float(np.nanmax(level["max"])) if any_valid else None,
+                "mean_temp": mean_temp if any_valid else None,
+            })
+        return info
+
+    def tile(self, level: int, tx: int, ty: int, aggregate: str = "mean") -> np.ndarray:
+        """
+        One tile of a level as a float32 array (edge tiles are smaller).
+        Raises IndexError for tiles outside the pyramid.
+        """
+        if not 0 <= level < len(self.levels) or aggregate not in AGGREGATES:
+            raise IndexError("Tile level out of range")
+        values = self.levels[level][aggregate]
+        rows, cols = values.shape
+        y0, x0 = ty * self.tile_size, tx * self.tile_size
+        if tx < 0 or ty < 0 or y0 >= rows or x0 >= cols:
+            raise IndexError("Tile out of range")
+        return np.ascontiguousarray(values[y0:y0 + self.tile_size, x0:x0 + self.tile_size])
+
+
+def pyramid_dir(npy_path: Path) -> Path:
+    """Directory holding the stored pyramid of a matrix sidecar (x.matrix.npy -> x.matrix.pyramid)"""
+    return npy_path.with_suffix(".pyramid")
+
+
+def save_tile_pyramid(pyramid: TilePyramid, directory: Path) -> None:
+    """
+    Store levels 1.. as .npy files (level 0 is the matrix itself) so large
+    matrices such as mosaics do not rebuild their pyramid on every load.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    for index, level in enumerate(pyramid.levels[1:], start=1):
+        for aggregate in AGGREGATES:
+            np.save(directory / f"level{index}_{aggregate}.npy", level[aggregate])
+    with open(directory / "pyramid.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "tile_size": pyramid.tile_size,
+            "levels": len(pyramid.levels),
+            "shape": list(pyramid.levels[0]["mean"].shape),
+        }, f)
+
+
+def load_tile_pyramid(data: np.ndarray, directory: Path) -> Optional[TilePyramid]:
+    """Memory-mapped stored pyramid of `data`; None when missing or stale"""
+    try:
+        with open(directory / "pyramid.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["shape"] != list(data.shape):
+            return None
+        levels = [{aggregate: data for aggregate in AGGREGATES}]
+        for index in range(1, meta["levels"]):
+            levels.append({
+                aggregate: np.load(directory / f"level{index}_{aggregate}.npy", mmap_mode="r")
+                for aggregate in AGGREGATES
+            })
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[TILES] Ignoring stored pyramid {directory}: {e}")
+        return None
+    return TilePyramid.from_levels(levels, meta["tile_size"])
+
+
+def get_tile_pyramid(matrix) -> TilePyramid:
+    """
+    Tile pyramid of a TemperatureMatrix, cached with it. A pyramid stored
+    next to a matrix sidecar is mapped instead of being rebuilt.
+    """
+    def build() -> TilePyramid:
+        source = matrix.source_path
+        if source is not None and source.name.endswith(MATRIX_SUFFIX):
+            stored = load_tile_pyramid(matrix.data, pyramid_dir(source))
+            if stored is not None:
+                return stored
+        return TilePyramid(matrix.data)
+    return matrix.derived("tile_pyramid", build)
@@ -0,0 +1,107 @@
+# server/app/services/units.py
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+# Matrices, stats and stored region/marker temperatures are kept in Celsius;
+# other units are produced on read. Each unit is an affine map of Celsius.
+CANONICAL_UNIT = "C"
+UNITS = {
+    "C": (1.0, 0.0),
+    "F": (1.8, 32.0),
+    "K": (1.0, 273.15),
+}
+UNIT_SYMBOLS = {"C": "°C", "F": "°F", "K": "K"}
+
+_ALIASES = {
+    "c": "C", "°c": "C", "celsius": "C",
+    "f": "F", "°f": "F", "fahrenheit": "F",
+    "k": "K", "kelvin": "K",
+}
+
+
+def normalize_unit(unit: Optional[str]) -> str:
+    """'F', 'fahrenheit', '°F' ... -> 'F'. Raises ValueError for unknown units."""
+    if unit is None:
+        return CANONICAL_UNIT
+    key = _ALIASES.get(unit.strip().lower())
+    if key is None:
+        raise ValueError(f"Unknown temperature unit: {unit}")
+    return key
+
+
+def from_celsius(values, unit: str):
+    """Absolute temperatures (scalar, array or None) from Celsius to `unit`"""
+    if values is None or unit == CANONICAL_UNIT:
+        return values
+    scale, offset = UNITS[unit]
+    if isinstance(values, np.ndarray):
+        return (values * np.float32(scale) + np.float32(offset)).astype(values.dtype, copy=False)
+    return values * scale + offset
+
+
+def to_celsius(values, unit: str):
+    """Absolute temperatures (scalar, array or None) from `unit` to Celsius"""
+    if values is None or unit == CANONICAL_UNIT:
+        return values
+    scale, offset = UNITS[unit]
+    return (values - offset) / scale
+
+
+def delta_from_celsius(values, unit: str):
+    """Temperature differences (ΔT, std, widths) from Celsius to `unit`"""
+    if values is None or unit == CANONICAL_UNIT:
+        return values
+    return values * UNITS[unit][0]
+
+
+def delta_to_celsius(values, unit: str):
+    """Temperature differences from `unit` to Celsius"""
+    if values is None or unit == CANONICAL_UNIT:
+        return values
+    return values / UNITS[unit][0]
+
+
+def convert_fields(item: Dict[str, Any], fields: Iterable[str], unit: str, delta_fields: Iterable[str] = ()) -> Dict[str, Any]:
+    """Copy of a serialized record with its temperature fields in `unit`"""
+    if unit == CANONICAL_UNIT:
+        return item
+    item = dict(item)
+    for field in fields:
+        if field in item:
+            item[field] = from_celsius(item[field], unit)
+    for field in delta_fields:
+        if field in item:
+            item[field] = delta_from_celsius(item[field], unit)
+    return item
+
+
+def convert_temperature_stats(stats: Optional[Dict[str, Any]], unit: str) -> Optional[Dict[str, Any]]:
+    """
+    Stored temperature stats in `unit`. Sums follow the affine map exactly;
+    the histogram keeps its counts and gets a scaled bin width plus an
+    `offset` (bin k covers [k*bin_width + offset, (k+1)*bin_width + offset)).
+    """
+    if not stats or unit == CANONICAL_UNIT:
+        return stats
+    scale, offset = UNITS[unit]
+    count = stats.get("count") or 0
+    converted = convert_fields(stats, ("min", "max", "mean"), unit, ("std",))
+    converted["sum"] = scale * stats["sum"] + offset * count
+    converted["sum_sq"] = scale * scale * stats["sum_sq"] + 2 * scale * offset * stats["sum"] + offset * offset * count
+    converted["percentiles"] = {k: from_celsius(v, unit) for k, v in stats.get("percentiles", {}).items()}
+    histogram = dict(stats["histogram"])
+    histogram["bin_width"] = histogram["bin_width"] * scale
+    histogram["offset"] = histogram.get("offset", 0.0) * scale + offset
+    converted["histogram"] = histogram
+    if stats.get("digest"):
+        converted["digest"] = dict(stats["digest"], means=[from_celsius(m, unit) for m in stats["digest"]["means"]])
+    converted["unit"] = unit
+    return converted
+
+
+def get_unit_data(matrix, unit: str) -> np.ndarray:
+    """Matrix data in `unit`, converted once and cached with the matrix"""
+    if unit == CANONICAL_UNIT:
+        return matrix.data
+    return matrix.derived(("unit_data", unit), lambda: from_celsius(np.asarray(matrix.data, dtype=np.float32), unit))
@@ -0,0 +1,140 @@
+# server/app/services/view_mapping.py
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.services.fusion import load_parallax_maps
+from app.services.line_profile import bilinear_sample
+
+# Grid cells of linear extrapolation around the maps, so points slightly
+# outside the overlap of both views still map
+_EXTRAPOLATION_PAD = 32
+_NEWTON_STEPS = 8
+_POLISH_STEPS = 2
+
+
+def _extend(grid: np.ndarray, pad: int = _EXTRAPOLATION_PAD) -> np.ndarray:
+    """Grid padded by point reflection, i.e. linear extrapolation at the borders"""
+    return np.pad(np.asarray(grid, dtype=np.float64), pad, mode="reflect", reflect_type="odd")
+
+
+def _sample(grid: np.ndarray, xs: np.ndarray, ys: np.ndarray, pad: int = _EXTRAPOLATION_PAD) -> np.ndarray:
+    return bilinear_sample(grid, np.asarray(xs) + pad, np.asarray(ys) + pad)
+
+
+@lru_cache(maxsize=1)
+def _forward_grids() -> Tuple[np.ndarray, np.ndarray]:
+    map_x, map_y = load_parallax_maps()
+    return _extend(map_x), _extend(map_y)
+
+
+def visual_to_thermal_frame(gx: np.ndarray, gy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Visual grid positions -> thermal grid positions (the T880 maps, interpolated)"""
+    grid_x, grid_y = _forward_grids()
+    return _sample(grid_x, gx, gy), _sample(grid_y, gx, gy)
+
+
+def _newton_inverse(tx: np.ndarray, ty: np.ndarray, gx: np.ndarray, gy: np.ndarray, steps: int):
+    """Refine visual positions g so that forward(g) = t, with a finite-difference Jacobian"""
+    h = 0.5
+    for _ in range(steps):
+        fx, fy = visual_to_thermal_frame(gx, gy)
+        ax_x, ax_y = visual_to_thermal_frame(gx + h, gy)
+        bx_x, bx_y = visual_to_thermal_frame(gx - h, gy)
+        ay_x, ay_y = visual_to_thermal_frame(gx, gy + h)
+        by_x, by_y = visual_to_thermal_frame(gx, gy - h)
+        j11, j21 = (ax_x - bx_x) / (2 * h), (ax_y - bx_y) / (2 * h)
+        j12, j22 = (ay_x - by_x) / (2 * h), (ay_y - by_y) / (2 * h)
+        det = j11 * j22 - j12 * j21
+        rx, ry = fx - tx, fy - ty
+        with np.errstate(invalid="ignore", divide="ignore"):
+            dx = (j22 * rx - j12 * ry) / det
+            dy = (-j21 * rx + j11 * ry) / det
+        ok = np.isfinite(dx) & np.isfinite(dy)
+        gx = np.where(ok, gx - dx, gx)
+        gy = np.where(ok, gy - dy, gy)
+    return gx, gy
+
+
+@lru_cache(maxsize=1)
+def inverse_parallax_grids() -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Visual grid position of every thermal grid node, computed once by
+    Newton iteration on the forward maps and padded for extrapolation.
+    """
+    map_x, _ = load_parallax_maps()
+    rows, cols = map_x.shape
+    ty, tx = np.mgrid[0:rows, 0:cols].astype(np.float64)
+    # The maps are close to the identity, which makes it a good start
+    gx, gy = _newton_inverse(tx.ravel(), ty.ravel(), tx.ravel(), ty.ravel(), _NEWTON_STEPS)
+    return _extend(gx.reshape(rows, cols)), _extend(gy.reshape(rows, cols))
+
+
+def thermal_to_visual_frame(tx: np.ndarray, ty: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Thermal grid positions -> visual grid positions (inverse grid lookup, Newton-polished)"""
+    inv_x, inv_y = inverse_parallax_grids()
+    gx, gy = _sample(inv_x, tx, ty), _sample(inv_y, tx, ty)
+    return _newton_inverse(np.asarray(tx, dtype=np.float64), np.asarray(ty, dtype=np.float64), gx, gy, _POLISH_STEPS)
+
+
+class ViewMapping:
+    """
+    Pixel coordinate mapping between a thermal image (`thermal_size`,
+    width x height in image pixels) and its visual photo (`visual_size`).
+    Both are scaled onto the parallax map grid, mapped, and scaled back.
+    """
+
+    def __init__(self, thermal_size: Tuple[int, int], visual_size: Tuple[int, int]):
+        self.thermal_size = thermal_size
+        self.visual_size = visual_size
+        map_x, _ = load_parallax_maps()
+        self.grid_rows, self.grid_cols = map_x.shape
+
+    def _to_grid(self, xs, ys, size):
+        xs, ys = np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+        return (xs + 0.5) * self.grid_cols / size[0] - 0.5, (ys + 0.5) * self.grid_rows / size[1] - 0.5
+
+    def _from_grid(self, gx, gy, size):
+        return (gx + 0.5) * size[0] / self.grid_cols - 0.5, (gy + 0.5) * size[1] / self.grid_rows - 0.5
+
+    def to_visual(self, xs, ys) -> Tuple[np.ndarray, np.ndarray]:
+        gx, gy = thermal_to_visual_frame(*self._to_grid(xs, ys, self.thermal_size))
+        return self._from_grid(gx, gy, self.visual_size)
+
+    def to_thermal(self, xs, ys) -> Tuple[np.ndarray, np.ndarray]:
+        gx, gy = visual_to_thermal_frame(*self._to_grid(xs, ys, self.visual_size))
+        return self._from_grid(gx, gy, self.thermal_size)
+
+    def map_shapes(self, shapes: Sequence[Sequence[Dict[str, float]]], to_visual: bool = True) -> List[List[Dict[str, float]]]:
+        """
+        Map a batch of point lists (points, polygons, region outlines) in a
+        single vectorized pass. Points that cannot be mapped come back as None.
+        """
+        lengths = [len(shape) for shape in shapes]
+        if not sum(lengths):
+            return [[] for _ in shapes]
+        xs = np.array([p["x"] for shape in shapes for p in shape], dtype=np.float64)
+        ys = np.array([p["y"] for shape in shapes for p in shape], dtype=np.float64)
+        mx, my = self.to_visual(xs, ys) if to_visual else self.to_thermal(xs, ys)
+        width, height = self.visual_size if to_visual else self.thermal_size
+
+        mapped = [
+            {"x": round(float(x), 2) + 0.0, "y": round(float(y), 2) + 0.0,
+             "inside": bool(-0.5 <= x <= width - 0.5 and -0.5 <= y <= height - 0.5)}
+            if np.isfinite(x) and np.isfinite(y) else None
+            for x, y in zip(mx, my)
+        ]
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        return [mapped[offsets[i]:offsets[i + 1]] for i in range(len(shapes))]
+
+
+def region_outline(region_type: str, points: List[Dict[str, float]]) -> Tuple[str, List[Dict[str, float]]]:
+    """
+    Region points ready for a non-linear mapping: rectangles become their
+    four corners as a polygon; other types map point by point.
+    """
+    if region_type == "rectangle" and len(points) >= 2:
+        (x0, y0), (x1, y1) = (points[0]["x"], points[0]["y"]), (points[1]["x"], points[1]["y"])
+        return "polygon", [{"x": x0, "y": y0}, {"x": x1, "y": y0}, {"x": x1, "y": y1}, {"x": x0, "y": y1}]
+    return region_type, points